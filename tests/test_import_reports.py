@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""tools/import_reports.py 的重复检测"""
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+from import_reports import Corpus, fingerprint  # noqa: E402
+
+
+def report_text(length, seed=7):
+    """长度为 length 的随机汉字正文（不含可被规范化去掉的字符）"""
+    rng = random.Random(seed)
+    return ''.join(chr(rng.randint(0x4e00, 0x9fa5)) for _ in range(length))
+
+
+def write_report(path, body):
+    path.write_text(f'---\ntitle: {path.stem}\n---\n\n{body}\n', encoding='utf-8')
+    return fingerprint(path)
+
+
+def test_short_fragment_of_long_report_is_duplicate(tmp_path):
+    base = report_text(300)
+    corpus = Corpus()
+    corpus.add('RP-1.md', write_report(tmp_path / 'RP-1.md', base))
+    match = corpus.duplicate_of(write_report(tmp_path / 'fragment.md', base[:255]))
+    assert match is not None
+    assert match[0] == 'RP-1.md'
+    assert match[1] >= 0.8
+
+
+def test_unrelated_reports_are_not_duplicates(tmp_path):
+    corpus = Corpus()
+    corpus.add('RP-1.md', write_report(tmp_path / 'RP-1.md', report_text(600, seed=1)))
+    assert corpus.duplicate_of(write_report(tmp_path / 'other.md', report_text(600, seed=2))) is None
@@ -1,16 +1,31 @@
 #!/usr/bin/env python3
 """为 chemical_aterials 文件添加 YAML front matter"""
+import argparse
 import os
-import re
-from datetime import datetime
+from datetime import datetime, timezone
 
-def extract_title(content):
+from content_index import SOURCE_DIR
+from executor import atomic_write
+from frontmatter_edit import derive, first_heading, mutate_text, set_key
+
+def _title(page):
     """从文件内容中提取标题"""
-    # 查找 # 标题行
-    match = re.search(r'^# (.+)$', content, re.MULTILINE)
-    if match:
-        return match.group(1).strip()
-    return "Unknown"
+    return first_heading(page) or "Unknown"
+
+def _now(page):
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+# 新建的 front matter（只用于还没有 front matter 的文件）
+MUTATIONS = [
+    set_key('wiki', 'drugs'),
+    derive('title', _title),
+    set_key('description', '化学物质'),
+    set_key('published', True),
+    derive('date', _now),
+    set_key('tags', None),
+    set_key('editor', 'markdown'),
+    derive('updated', _now),
+]
 
 def add_frontmatter(filepath):
     """为文件添加 YAML front matter"""
@@ -21,31 +36,15 @@ def add_frontmatter(filepath):
     if content.startswith('---'):
         return False
     
-    # 提取标题
-    title = extract_title(content)
-    
-    # 生成 front matter
-    frontmatter = f"""---
-wiki: drugs
-title: {title}
-description: 化学物质
-published: true
-date: {datetime.now().isoformat()}Z
-tags: 
-editor: markdown
-updated: {datetime.now().isoformat()}Z
----
-
-"""
-    
-    # 写入文件
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(frontmatter + content)
-    
+    atomic_write(filepath, mutate_text(content, MUTATIONS, create=True))
     return True
 
 def main():
-    base_dir = '/home/krvy/psydrugs.org/source/drugs/chemical_aterials'
+    parser = argparse.ArgumentParser(description='为没有 front matter 的化学物质页面添加 front matter')
+    parser.add_argument('--dir', default=str(SOURCE_DIR / 'drugs' / 'chemical_aterials'),
+                        help='页面所在目录')
+    args = parser.parse_args()
+    base_dir = args.dir
     count = 0
     
     for filename in sorted(os.listdir(base_dir)):
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+药物页面别名登记表（source/_data/aliases.yml）
+
+历史短代码、旧的英文分类路径、旧的中文路径和药物名统一登记在一个文件中，
+键和值都相对 /drugs/。加载后是一张普通的字典，解析一个地址只需一次哈希查找：
+
+    registry = load_registry()
+    resolve(registry, '/Drugs/PR')                 # '镇静剂/加巴喷丁类药物/普瑞巴林'
+    resolve(registry, '/zh/drugs/%E5%90%97%E5%95%A1')
+    canonical_url('兴奋剂/苯丙胺类兴奋剂/index')    # '/drugs/兴奋剂/苯丙胺类兴奋剂/'
+
+地址先按 link_graph.url_to_path 规范化（去掉站点域名、锚点和查询参数，解码百分号编码），
+再去掉 prefixes 中的任一前缀（/drugs/、/Drugs/、/zh/drugs/ …）和 .html 后缀。
+
+跳转页（hexo generate 之后运行）：为每个别名在 public/ 中生成 <前缀><别名>.html，
+用 meta refresh + location.replace 跳到规范页面（保留 #锚点），并声明 canonical，
+旧的外部链接不再 404。已生成的跳转页记录在 .cache/redirects.json 中：
+登记表没有变化时不重写任何文件；删除的别名对应的跳转页一并删除；不会覆盖 Hexo 生成的真实页面。
+
+    python3 tools/aliases.py --check              # 检查登记表（目标页面存在、别名不遮盖真实页面）
+    python3 tools/aliases.py --resolve /Drugs/PR
+    python3 tools/aliases.py --stubs              # 生成跳转页
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from urllib.parse import quote
+
+from content_index import CACHE_DIR, ROOT, SOURCE_DIR, load_index
+from executor import atomic_write
+from frontmatter import parse_block
+from link_graph import url_to_path
+from link_rewriter import compile_rewriter
+
+REGISTRY_PATH = SOURCE_DIR / '_data' / 'aliases.yml'
+PUBLIC_DIR = ROOT / 'public'
+STUBS_RECORD = CACHE_DIR / 'redirects.json'
+BASE_URL = '/drugs/'
+# Markdown 链接 [text](/drugs/别名)、/Drugs/别名、/zh/drugs/别名，别名后只允许 .html 和锚点/查询参数
+LINK_BEFORE = r'\[[^\]]+\]\((?:/zh)?/[Dd]rugs/'
+LINK_AFTER = r'(?:\.html)?(?:[#?][^)]*)?\)'
+
+STUB_TEMPLATE = '''<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>页面已移动</title>
+<meta name="robots" content="noindex">
+<link rel="canonical" href="{href}">
+<meta http-equiv="refresh" content="0; url={href}">
+<script>location.replace({js} + location.hash)</script>
+</head>
+<body><p>页面已移动到 <a href="{href}">{text}</a></p></body>
+</html>
+'''
+
+
+def _unquote_key(key):
+    key = str(key).strip()
+    if len(key) >= 2 and key[0] == key[-1] and key[0] in '\'"':
+        return key[1:-1]
+    return key
+
+
+def load_registry(path=REGISTRY_PATH):
+    """读取登记表，返回 {'version', 'digest', 'prefixes', 'legacy_dirs', 'aliases': {别名: 规范页面}}"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = parse_block(raw.decode('utf-8').split('\n'))
+    return {
+        'version': data.get('version'),
+        'digest': hashlib.blake2b(raw, digest_size=8).hexdigest(),
+        'prefixes': [str(prefix).strip('/') + '/' for prefix in data.get('prefixes') or [BASE_URL]],
+        'legacy_dirs': [str(name).strip('/') for name in data.get('legacy_dirs') or []],
+        'aliases': {_unquote_key(key): str(value) for key, value in (data.get('aliases') or {}).items()},
+    }
+
+
+def alias_key(registry, url):
+    """地址 -> 登记表中的键（不检查是否登记）；不在任何前缀之下的返回 None"""
+    path = url_to_path(url)
+    if path is None:
+        return None
+    for prefix in registry['prefixes']:
+        if path.startswith(prefix):
+            key = path[len(prefix):]
+            return key[:-len('.html')] if key.endswith('.html') else key
+    return None
+
+
+def resolve(registry, url):
+    """
+    地址或别名 -> 规范页面（相对 /drugs/），未登记的返回 None。
+    旧英文分类目录下的 <目录>/<药物名> 没有单独登记时按药物名查找
+    """
+    aliases = registry['aliases']
+    if url in aliases:
+        return aliases[url]
+    key = alias_key(registry, url)
+    if key is None:
+        return None
+    if key in aliases:
+        return aliases[key]
+    directory, _, name = key.partition('/')
+    if directory in registry['legacy_dirs'] and '/' not in name:
+        return aliases.get(name)
+    return None
+
+
+def canonical_url(target):
+    """规范页面 -> 站内地址（目录的 index 页以 / 结尾）"""
+    if target == 'index' or target.endswith('/index'):
+        return BASE_URL + target[:-len('index')]
+    return BASE_URL + target
+
+
+def link_rewriter(registry, aliases=None):
+    """
+    把指向别名的 Markdown 链接改为规范地址的改写函数（见 link_rewriter.compile_rewriter），
+    aliases 默认为整张登记表。完整登记的别名优先，其次是旧英文分类目录下按药物名查找
+    """
+    aliases = registry['aliases'] if aliases is None else aliases
+    names = {name: target for name, target in aliases.items() if '/' not in name}
+    legacy = '|'.join(re.escape(name) for name in registry['legacy_dirs'])
+
+    def replace(before, old, new):
+        # 页面名中的半角括号会提前结束 Markdown 链接
+        url = canonical_url(new).replace('(', '%28').replace(')', '%29')
+        return f'{before[:before.index("](") + 2]}{url}'
+
+    rules = [(LINK_BEFORE, aliases, LINK_AFTER, replace)]
+    if legacy:
+        rules.append((f'{LINK_BEFORE}(?:{legacy})/', names, LINK_AFTER, replace))
+    return compile_rewriter(rules)
+
+
+def check_registry(registry, index):
+    """检查登记表，返回问题列表：目标页面不存在、别名与真实页面或目录重名"""
+    pages = {rel[len('drugs/'):-len('.md')] for rel in index
+             if rel.startswith('drugs/') and rel.endswith('.md')}
+    dirs = {page.rsplit('/', depth)[0] for page in pages for depth in range(1, page.count('/') + 1)}
+    issues = []
+    for alias, target in registry['aliases'].items():
+        if target not in pages:
+            issues.append(f'{alias}: 目标页面不存在 drugs/{target}.md')
+        if alias in pages or alias in dirs:
+            issues.append(f'{alias}: 与真实页面或目录 drugs/{alias} 重名，别名不会生效')
+    return issues
+
+
+def stub_content(target):
+    url = canonical_url(target)
+    href = quote(url, safe='/')
+    return STUB_TEMPLATE.format(href=html.escape(href), js=json.dumps(href), text=html.escape(url))
+
+
+def stub_files(registry):
+    """{public/ 中的相对路径: 跳转页内容}"""
+    files = {}
+    for alias, target in registry['aliases'].items():
+        content = stub_content(target)
+        for prefix in registry['prefixes']:
+            files[f'{prefix}{alias}.html'] = content
+    return files
+
+
+def load_record(path=STUBS_RECORD):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_record(record, path=STUBS_RECORD):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(',', ':')))
+
+
+def write_stubs(registry, public_dir=PUBLIC_DIR, record_path=STUBS_RECORD):
+    """
+    生成跳转页，返回 {'written', 'unchanged', 'removed', 'skipped'}。
+    登记表的版本和哈希与上次相同且跳转页都在时直接返回
+    """
+    public_dir = Path(public_dir)
+    record = load_record(record_path)
+    previous = set(record.get('files', []))
+    files = stub_files(registry)
+    stats = {'written': 0, 'unchanged': 0, 'removed': 0, 'skipped': []}
+    if (record.get('version') == registry['version'] and record.get('digest') == registry['digest']
+            and all((public_dir / rel).exists() for rel in previous)):
+        stats['unchanged'] = len(previous)
+        return stats
+
+    written = []
+    for rel, content in sorted(files.items()):
+        path = public_dir / rel
+        if path.exists() and rel not in previous:
+            # Hexo 生成的真实页面，不覆盖
+            stats['skipped'].append(rel)
+            continue
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                same = f.read() == content
+        except FileNotFoundError:
+            same = False
+        if same:
+            stats['unchanged'] += 1
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(path, content)
+            stats['written'] += 1
+        written.append(rel)
+
+    for rel in sorted(previous - set(written)):
+        path = public_dir / rel
+        if path.exists():
+            path.unlink()
+            stats['removed'] += 1
+
+    save_record({'version': registry['version'], 'digest': registry['digest'], 'files': written},
+                record_path)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='药物页面别名登记表：检查、解析、生成跳转页')
+    parser.add_argument('--registry', default=str(REGISTRY_PATH), help='登记表路径')
+    parser.add_argument('--check', action='store_true', help='检查登记表（有问题时退出码为 1）')
+    parser.add_argument('--resolve', nargs='+', metavar='URL', help='解析地址或别名')
+    parser.add_argument('--stubs', action='store_true', help='在 public/ 中生成跳转页')
+    parser.add_argument('--public-dir', default=str(PUBLIC_DIR), help='Hexo 输出目录（默认 public/）')
+    args = parser.parse_args()
+
+    registry = load_registry(args.registry)
+    print(f"✓ 登记表 v{registry['version']}: {len(registry['aliases'])} 个别名", file=sys.stderr)
+    failed = False
+
+    if args.resolve:
+        for url in args.resolve:
+            target = resolve(registry, url)
+            print(f"{url} -> {canonical_url(target) if target else '（未登记）'}")
+            failed = failed or target is None
+
+    if args.check or not (args.resolve or args.stubs):
+        issues = check_registry(registry, load_index())
+        for issue in issues:
+            print(f"✗ {issue}")
+        print(f"{'✗' if issues else '✓'} 检查完成，问题数: {len(issues)}")
+        failed = failed or bool(issues)
+
+    if args.stubs:
+        if not os.path.isdir(args.public_dir):
+            print(f"✗ 目录不存在: {args.public_dir}（先运行 hexo generate）")
+            sys.exit(1)
+        stats = write_stubs(registry, args.public_dir)
+        for rel in stats['skipped']:
+            print(f"⚠ 跳过已存在的页面: {rel}")
+        print(f"✓ 跳转页: 写入 {stats['written']}，未变化 {stats['unchanged']}，删除 {stats['removed']}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
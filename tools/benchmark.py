@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+维护工具链性能基准
+
+为每个规模生成一份合成的 source/ 目录（中文文件名、真实格式的 front-matter、
+与现有站点相近的链接密度），然后依次计时各阶段：
+
+    scan        遍历 source/
+    parse       冷启动构建内容索引（解析全部页面并写缓存）
+    parse_warm  热缓存刷新索引
+    graph       构建链接图
+    rewrite     按链接图改写引用了被改名页面的文件（只在内存中替换）
+    tree        按目录结构修补所有 wiki 目录树（只计算，不写文件）
+    check       死链检查
+    writeback   事务提交改写结果和改名
+
+每个规模在独立的子进程中运行，记录每个阶段的耗时和截至该阶段的峰值内存（RSS）。
+结果写成 JSON（默认 .cache/bench/<时间>-<提交>.json），可以用 --compare 与旧结果对比：
+
+    python3 tools/benchmark.py                        # 500、5000、50000 页
+    python3 tools/benchmark.py --sizes 500 5000
+    python3 tools/benchmark.py --compare .cache/bench/旧结果.json
+"""
+import argparse
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from content_index import CACHE_DIR, ROOT, load_index, walk_source
+from link_graph import files_referencing, load_graph, wiki_files
+from link_rewriter import compile_rewriter
+from check_links import build_path_index, check_pages, check_trees
+from transaction import Transaction
+from wiki_tree import update_wiki
+
+BENCH_DIR = CACHE_DIR / 'bench'
+BENCH_VERSION = 1
+DEFAULT_SIZES = (500, 5000, 50000)
+STAGES = ('scan', 'parse', 'parse_warm', 'graph', 'rewrite', 'tree', 'check', 'writeback')
+
+CATEGORIES = {
+    '镇静剂': ['苯二氮卓类药物', '其他药物', 'Z类药物_ZDrugs'],
+    '止痛药': ['阿片类药物', '非甾体止痛药', '其他'],
+    '兴奋剂': ['苯丙胺类兴奋剂', '非苯丙胺类兴奋剂'],
+    '抗精神病药': ['典型', '非典型'],
+    '解离剂': ['NMDA拮抗剂'],
+    '抗抑郁药': ['SSRI', 'SNRI', '三环类'],
+    '补充剂': ['氨基酸'],
+}
+NAME_CHARS = '阿巴卡地多恩法格海吉克拉马尼欧帕奇瑞萨塔瓦西亚扎酮胺醇酯平泮仑林嗪唑酸钠'
+TEXT_CHARS = '药物剂量过量风险症状治疗患者使用注意事项代谢作用机制不良反应相互呼吸抑制'
+RENAME_RATIO = 0.05
+MISSING_RATIO = 0.02
+
+
+def peak_rss_kb():
+    """进程至今的峰值 RSS（KB），不支持的平台返回 None"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 返回字节，Linux 返回 KB
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def _text(rng, length):
+    return ''.join(rng.choice(TEXT_CHARS) for _ in range(length))
+
+
+def _link_count(rng):
+    """链接数：大多数页面只有几个链接，少数索引页有上百个"""
+    if rng.random() < 0.01:
+        return rng.randint(80, 200)
+    return int(rng.expovariate(1 / 4))
+
+
+def _link(rng, drug_urls, report_count):
+    """随机生成一条链接，格式与站点中出现的几种写法一致"""
+    kind = rng.random()
+    if kind < 0.45:
+        return rng.choice(drug_urls)
+    if kind < 0.6:
+        url = rng.choice(drug_urls)
+        return 'https://psydrugs.org' + quote(url) + '/'
+    if kind < 0.8:
+        return f'/reports/odw-reports/RP-{rng.randrange(report_count)}'
+    if kind < 0.8 + MISSING_RATIO:
+        return f'/drugs/不存在的页面{rng.randrange(1000)}'
+    return f'https://example.org/{rng.randrange(10 ** 6)}'
+
+
+def make_corpus(root, pages, seed=0):
+    """在 root 下生成合成 source/ 目录，返回 (source 目录, 药物页面路径列表)"""
+    rng = random.Random(seed)
+    source = Path(root) / 'source'
+    drug_count = int(pages * 0.55)
+    report_count = pages - drug_count
+
+    drug_paths = []
+    folders = [(cat, sub) for cat, subs in CATEGORIES.items() for sub in subs]
+    for i in range(drug_count):
+        cat, sub = folders[i % len(folders)]
+        name = ''.join(rng.choice(NAME_CHARS) for _ in range(rng.randint(2, 4))) + str(i)
+        drug_paths.append(f'drugs/{cat}/{sub}/{name}')
+    drug_urls = ['/' + rel for rel in drug_paths]
+
+    def write_page(rel, title, order, wiki):
+        lines = [
+            '---',
+            f'title: {title}',
+            f'wiki: {wiki}',
+            'layout: page',
+            f'order: {order}',
+            f'date: 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00',
+            f'updated: 2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00',
+            'categories: [药物]' if wiki == 'drugs' else 'categories: [报告]',
+            'tags:',
+            '  - 合成',
+            '---',
+            '',
+            f'# {title}',
+        ]
+        links = [_link(rng, drug_urls, report_count) for _ in range(_link_count(rng))]
+        for section in range(rng.randint(2, 6)):
+            lines += ['', f'## 第{section + 1}节', '']
+            for _ in range(rng.randint(1, 4)):
+                lines.append(_text(rng, rng.randint(40, 220)))
+            while links and rng.random() < 0.6:
+                lines.append(f'- [{_text(rng, 4)}]({links.pop()})')
+        lines += [f'- [{_text(rng, 4)}]({url})' for url in links]
+        path = source / (rel + '.md')
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    for i, rel in enumerate(drug_paths):
+        write_page(rel, Path(rel).name, i, 'drugs')
+    for i in range(report_count):
+        write_page(f'reports/odw-reports/RP-{i}', f'报告{i}', i, 'reports')
+
+    wiki_dir = source / '_data' / 'wiki'
+    wiki_dir.mkdir(parents=True, exist_ok=True)
+    tree = ['base_dir: /drugs/', 'tree:']
+    for cat, sub in folders:
+        tree.append(f"  '{cat}/{sub}':")
+        tree += [f'    - {rel[len("drugs/"):]}' for rel in drug_paths
+                 if rel.startswith(f'drugs/{cat}/{sub}/')]
+    (wiki_dir / 'drugs.yml').write_text('\n'.join(tree) + '\n', encoding='utf-8')
+    reports = ['base_dir: /reports/', 'tree:', "  '报告':"]
+    reports += [f'    - odw-reports/RP-{i}' for i in range(report_count)]
+    (wiki_dir / 'reports.yml').write_text('\n'.join(reports) + '\n', encoding='utf-8')
+    return source, drug_paths
+
+
+def run_single(pages, workdir, seed=0):
+    """在当前进程中对一个规模运行全部阶段，返回结果字典"""
+    root = Path(tempfile.mkdtemp(prefix=f'bench-{pages}-', dir=workdir))
+    try:
+        start = time.perf_counter()
+        source, drug_paths = make_corpus(root, pages, seed)
+        setup = time.perf_counter() - start
+
+        cache = root / 'cache'
+        stages = {}
+        state = {}
+
+        def timed(name, func):
+            start = time.perf_counter()
+            result = func()
+            stages[name] = {
+                'seconds': round(time.perf_counter() - start, 6),
+                'peak_rss_kb': peak_rss_kb(),
+            }
+            return result
+
+        timed('scan', lambda: walk_source(source))
+        index = timed('parse', lambda: load_index(source, cache / 'index.json', rebuild=True))
+        timed('parse_warm', lambda: load_index(source, cache / 'index.json'))
+        graph = timed('graph', lambda: load_graph(index, source, cache / 'graph.json', rebuild=True))
+
+        rng = random.Random(seed + 1)
+        renamed = rng.sample(drug_paths, max(1, int(len(drug_paths) * RENAME_RATIO)))
+        mapping = {rel[len('drugs/'):]: rel[len('drugs/'):] + '_新' for rel in renamed}
+
+        def rewrite():
+            rewriter = compile_rewriter([(r'/drugs/', mapping, r'[/)#\s]')])
+            changed = {}
+            for rel in files_referencing(graph, *renamed):
+                path = source / rel
+                content = path.read_text(encoding='utf-8')
+                new_content, count = rewriter(content)
+                if count:
+                    changed[path] = new_content
+            state['changed'] = changed
+            return changed
+
+        timed('rewrite', rewrite)
+        timed('tree', lambda: [update_wiki(path, index) for path in wiki_files(source / '_data' / 'wiki')])
+
+        def check():
+            paths = build_path_index(source)
+            return check_pages(index, paths, source_dir=source) + check_trees(paths, source)
+
+        problems = timed('check', check)
+
+        def writeback():
+            with Transaction(staging_root=cache) as tx:
+                for path, content in state['changed'].items():
+                    tx.write_text(path, content)
+                for rel in renamed:
+                    old = source / (rel + '.md')
+                    tx.rename(old, old.with_name(old.stem + '_新.md'))
+            return len(tx)
+
+        timed('writeback', writeback)
+
+        return {
+            'pages': len(index),
+            'bytes': sum(page['size'] for page in index.values()),
+            'links': sum(len(page['links']) for page in index.values()),
+            'renamed': len(renamed),
+            'rewritten_files': len(state['changed']),
+            'dead_links': len(problems),
+            'setup_seconds': round(setup, 3),
+            'stages': stages,
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def git_commit():
+    """当前提交的短哈希，不在 git 仓库中时返回 None"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def run_all(sizes, workdir, seed=0):
+    """每个规模在独立子进程中运行，避免峰值内存互相影响"""
+    runs = []
+    for pages in sizes:
+        print(f"→ {pages} 页 ...", file=sys.stderr)
+        result = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), '--single', str(pages),
+             '--workdir', str(workdir), '--seed', str(seed)],
+            capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr, file=sys.stderr)
+            raise SystemExit(f"✗ {pages} 页的基准运行失败")
+        run = json.loads(result.stdout)
+        runs.append(run)
+        print_run(run)
+    return {
+        'version': BENCH_VERSION,
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'runs': runs,
+    }
+
+
+def print_run(run):
+    print(f"\n{run['pages']} 页，{run['bytes'] / 1024 / 1024:.1f} MB，{run['links']} 个链接"
+          f"（生成耗时 {run['setup_seconds']:.1f} s）")
+    for name in STAGES:
+        stage = run['stages'][name]
+        rss = stage['peak_rss_kb']
+        rss_text = f"{rss / 1024:8.1f} MB" if rss is not None else '       -'
+        print(f"  {name:<11} {stage['seconds'] * 1000:10.1f} ms  {rss_text}")
+
+
+def compare(old, new):
+    """逐阶段对比两次结果（按页面数对应）"""
+    old_runs = {run['pages']: run for run in old['runs']}
+    print(f"\n对比 {old.get('commit')} → {new.get('commit')}")
+    for run in new['runs']:
+        base = old_runs.get(run['pages'])
+        if not base:
+            continue
+        print(f"\n{run['pages']} 页")
+        for name in STAGES:
+            if name not in base['stages']:
+                continue
+            before = base['stages'][name]['seconds']
+            after = run['stages'][name]['seconds']
+            ratio = after / before if before else float('inf')
+            flag = '  ⚠' if ratio > 1.2 else ''
+            print(f"  {name:<11} {before * 1000:10.1f} → {after * 1000:10.1f} ms  ×{ratio:.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='维护工具链性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='合成页面数（默认 500 5000 50000）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--output', help='结果 JSON 路径（默认 .cache/bench/<时间>-<提交>.json）')
+    parser.add_argument('--compare', metavar='JSON', help='与之前的结果对比')
+    parser.add_argument('--workdir', default=tempfile.gettempdir(), help='生成合成目录的位置')
+    parser.add_argument('--single', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        json.dump(run_single(args.single, args.workdir, args.seed), sys.stdout)
+        return
+
+    results = run_all(args.sizes, args.workdir, args.seed)
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = BENCH_DIR / f"{stamp}-{results['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+死链与失效目录项检查
+
+一次遍历检查：
+    - 所有页面中的站内链接（Markdown 链接、HTML href、自动链接、
+      https://psydrugs.org/... 网址，百分号编码的中文路径会先解码）
+    - source/_data/wiki/*.yml 中 tree: 下的每个条目
+
+链接和条目都在内存中的路径集合里解析（source/ 下的所有文件），不访问磁盘；
+页面链接取自内容索引，只有发现死链的页面才会重新读取以定位行号。
+热缓存下整个检查只需几十毫秒，可以在每次保存时运行：
+
+    python3 tools/check_links.py                       # 检查全部
+    python3 tools/check_links.py source/drugs/索引.md  # 只检查指定文件
+
+输出格式为 文件:行号: 链接，发现问题时退出码为 1。
+"""
+import argparse
+import bisect
+import os
+import sys
+import time
+from pathlib import Path
+
+from content_index import AUTOLINK_RE, HREF_RE, MD_LINK_RE, SKIP_DIRS, SOURCE_DIR, load_index
+from link_graph import read_wiki_tree, resolve_path, tree_slug_to_path, url_to_path, wiki_files
+
+
+def build_path_index(source_dir=SOURCE_DIR):
+    """source/ 下所有文件（包括图片等资源）的相对路径集合"""
+    paths = set()
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+        rel_root = os.path.relpath(root, source_dir).replace(os.sep, '/')
+        prefix = '' if rel_root == '.' else rel_root + '/'
+        for name in files:
+            paths.add(prefix + name)
+    return paths
+
+
+def is_dead(path, paths):
+    """站内路径是否无法对应到任何文件（站点根目录由 Hexo 生成，视为存在）"""
+    return path != '' and resolve_path(path, paths) is None
+
+
+def dead_links(page, paths):
+    """页面中无法解析的站内链接"""
+    dead = []
+    for url in page['links']:
+        path = url_to_path(url, page['path'])
+        if path is not None and is_dead(path, paths):
+            dead.append(url)
+    return dead
+
+
+def locate_links(file_path, urls):
+    """重新读取页面，返回死链所在的 [(行号, 链接)]"""
+    content = Path(file_path).read_text(encoding='utf-8', errors='replace')
+    line_starts = [0]
+    line_starts.extend(i + 1 for i, ch in enumerate(content) if ch == '\n')
+    wanted = set(urls)
+    found = []
+    for regex in (MD_LINK_RE, HREF_RE, AUTOLINK_RE):
+        for match in regex.finditer(content):
+            if match.group(1) in wanted:
+                found.append((bisect.bisect_right(line_starts, match.start()), match.group(1)))
+    return sorted(found)
+
+
+def check_pages(index, paths, only=None, source_dir=SOURCE_DIR):
+    """检查页面中的链接，返回 [(文件, 行号, 链接)]"""
+    problems = []
+    for rel in sorted(index):
+        if only is not None and rel not in only:
+            continue
+        urls = dead_links(index[rel], paths)
+        if not urls:
+            continue
+        for lineno, url in locate_links(Path(source_dir) / rel, urls):
+            problems.append((f'source/{rel}', lineno, url))
+    return problems
+
+
+def check_trees(paths, source_dir=SOURCE_DIR, only=None):
+    """检查 wiki 配置中的 tree: 条目，返回 [(文件, 行号, 条目)]"""
+    problems = []
+    for yml_path in wiki_files(Path(source_dir) / '_data' / 'wiki'):
+        rel = yml_path.relative_to(source_dir).as_posix()
+        if only is not None and rel not in only:
+            continue
+        base_dir, entries = read_wiki_tree(yml_path)
+        for lineno, slug in entries:
+            if is_dead(tree_slug_to_path(base_dir, slug), paths):
+                problems.append((f'source/{rel}', lineno, slug))
+    return problems
+
+
+def _source_relative(path):
+    """命令行参数转换为相对 source/ 的路径"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(SOURCE_DIR).as_posix()
+    except ValueError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='检查站内死链和 wiki 目录中失效的条目')
+    parser.add_argument('files', nargs='*', help='只检查这些文件（默认检查全部页面和 wiki 配置）')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    only = None
+    if args.files:
+        only = {rel for rel in map(_source_relative, args.files) if rel}
+    index = load_index()
+    paths = build_path_index()
+    problems = check_pages(index, paths, only) + check_trees(paths, only=only)
+    elapsed = time.perf_counter() - start
+
+    for file, lineno, target in problems:
+        print(f"{file}:{lineno}: {target}")
+    files = len({file for file, _, _ in problems})
+    if problems:
+        print(f"\n✗ {len(problems)} 个失效链接/条目，涉及 {files} 个文件（{elapsed * 1000:.1f} ms）",
+              file=sys.stderr)
+        sys.exit(1)
+    print(f"✓ 没有发现失效链接（{elapsed * 1000:.1f} ms）", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
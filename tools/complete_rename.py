@@ -11,6 +11,10 @@ import shutil
 from pathlib import Path
 from collections import defaultdict
 
+from content_index import ROOT
+from link_graph import files_referencing, load_graph
+from transaction import Transaction
+
 def sanitize_filename(title):
     """将标题转换为有效的文件名（处理特殊字符）"""
     # 将斜杠替换为下划线
@@ -38,8 +42,8 @@ def get_drug_mapping():
     
     return mapping
 
-def rename_files(mapping):
-    """重命名所有药物文件"""
+def rename_files(mapping, tx):
+    """重命名所有药物文件（暂存到事务中）"""
     drugs_dir = Path("./source/drugs")
     renamed_count = 0
     
@@ -47,9 +51,9 @@ def rename_files(mapping):
         old_path = drugs_dir / f"{code}.md"
         new_path = drugs_dir / f"{info['filename']}.md"
         
-        if old_path.exists():
-            if not new_path.exists():
-                old_path.rename(new_path)
+        if tx.exists(old_path):
+            if not tx.exists(new_path):
+                tx.rename(old_path, new_path)
                 print(f"✓ {code:12} -> {info['filename']}")
                 renamed_count += 1
             else:
@@ -59,15 +63,15 @@ def rename_files(mapping):
     
     return renamed_count
 
-def update_drugs_yml(mapping):
-    """更新 source/_data/wiki/drugs.yml"""
+def update_drugs_yml(mapping, tx):
+    """更新 source/_data/wiki/drugs.yml（暂存到事务中）"""
     yml_path = Path("./source/_data/wiki/drugs.yml")
     
     if not yml_path.exists():
         print(f"⚠ {yml_path} 不存在")
         return False
     
-    content = yml_path.read_text(encoding='utf-8')
+    content = tx.read_text(yml_path)
     original = content
     
     # 替换树结构中的代码引用
@@ -80,96 +84,94 @@ def update_drugs_yml(mapping):
         )
     
     if content != original:
-        yml_path.write_text(content, encoding='utf-8')
+        tx.write_text(yml_path, content)
         print(f"✓ 更新 source/_data/wiki/drugs.yml")
         return True
     return False
 
-def update_markdown_files(mapping):
-    """更新所有 markdown 文件中的链接"""
+def referencing_files(mapping, graph):
+    """从链接图中找出引用待改名药物（及其子目录）的页面，只需改写这些文件"""
+    files = files_referencing(graph, *(f"drugs/{code}" for code in mapping))
+    return [Path("./source") / rel for rel in files if not rel.startswith('_data/')]
+
+def update_markdown_files(mapping, tx, files):
+    """更新引用了待改名药物的 markdown 文件中的链接（暂存到事务中）"""
     updated_count = 0
     
-    for root, dirs, files in os.walk("./source"):
-        # 跳过某些目录
-        dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules', '.hexo_asset_dir']]
-        
-        for file in files:
-            if file.endswith('.md'):
-                filepath = Path(root) / file
+    for filepath in files:
+        if filepath.suffix == '.md':
+            try:
+                content = tx.read_text(filepath)
+                original = content
                 
-                try:
-                    content = filepath.read_text(encoding='utf-8')
-                    original = content
+                for code, info in mapping.items():
+                    # 替换 Markdown 链接中的代码
+                    # [text](/drugs/CODE) -> [text](/drugs/FILENAME)
+                    content = re.sub(
+                        rf'(/drugs/){re.escape(code)}(?=/|\'|\"|\s|$|\])',
+                        rf'\1{info["filename"]}',
+                        content
+                    )
                     
-                    for code, info in mapping.items():
-                        # 替换 Markdown 链接中的代码
-                        # [text](/drugs/CODE) -> [text](/drugs/FILENAME)
-                        content = re.sub(
-                            rf'(/drugs/){re.escape(code)}(?=/|\'|\"|\s|$|\])',
-                            rf'\1{info["filename"]}',
-                            content
-                        )
-                        
-                        # 替换列表项中的代码引用（带缩进）
-                        content = re.sub(
-                            rf'^(\s+)- {re.escape(code)}($|\n)',
-                            rf'\1- {info["filename"]}\n',
-                            content,
-                            flags=re.MULTILINE
-                        )
-                        
-                        # 替换 CODE/xxx 格式的嵌套引用
-                        content = re.sub(
-                            rf'(\s+- ){re.escape(code)}/([a-zA-Z0-9_/]+)',
-                            rf'\1{info["filename"]}/\2',
-                            content
-                        )
+                    # 替换列表项中的代码引用（带缩进）
+                    content = re.sub(
+                        rf'^(\s+)- {re.escape(code)}($|\n)',
+                        rf'\1- {info["filename"]}\n',
+                        content,
+                        flags=re.MULTILINE
+                    )
                     
-                    if content != original:
-                        filepath.write_text(content, encoding='utf-8')
-                        updated_count += 1
-                        print(f"✓ 更新 {filepath.relative_to('.')}")
+                    # 替换 CODE/xxx 格式的嵌套引用
+                    content = re.sub(
+                        rf'(\s+- ){re.escape(code)}/([a-zA-Z0-9_/]+)',
+                        rf'\1{info["filename"]}/\2',
+                        content
+                    )
                 
-                except Exception as e:
-                    print(f"✗ 错误处理 {filepath}: {e}")
+                if content != original:
+                    tx.write_text(filepath, content)
+                    updated_count += 1
+                    print(f"✓ 更新 {filepath.relative_to('.')}")
+            
+            except Exception as e:
+                # 不跳过出错的文件：向上抛出，由 main() 回滚整个事务
+                print(f"✗ 错误处理 {filepath}: {e}")
+                raise
     
     return updated_count
 
-def update_html_files(mapping):
-    """更新 HTML 文件中的链接"""
+def update_html_files(mapping, tx, files):
+    """更新引用了待改名药物的 HTML 文件中的链接（暂存到事务中）"""
     updated_count = 0
     
-    for root, dirs, files in os.walk("./source"):
-        dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules']]
-        
-        for file in files:
-            if file.endswith('.html'):
-                filepath = Path(root) / file
+    for filepath in files:
+        if filepath.suffix == '.html':
+            try:
+                content = tx.read_text(filepath)
+                original = content
                 
-                try:
-                    content = filepath.read_text(encoding='utf-8')
-                    original = content
-                    
-                    for code, info in mapping.items():
-                        # 替换 HTML 中的链接
-                        content = re.sub(
-                            rf'(/drugs/){re.escape(code)}(?=/|\'|\"|\s|>)',
-                            rf'\1{info["filename"]}',
-                            content
-                        )
-                    
-                    if content != original:
-                        filepath.write_text(content, encoding='utf-8')
-                        updated_count += 1
-                        print(f"✓ 更新 {filepath.relative_to('.')}")
+                for code, info in mapping.items():
+                    # 替换 HTML 中的链接
+                    content = re.sub(
+                        rf'(/drugs/){re.escape(code)}(?=/|\'|\"|\s|>)',
+                        rf'\1{info["filename"]}',
+                        content
+                    )
                 
-                except Exception as e:
-                    print(f"✗ 错误处理 {filepath}: {e}")
+                if content != original:
+                    tx.write_text(filepath, content)
+                    updated_count += 1
+                    print(f"✓ 更新 {filepath.relative_to('.')}")
+            
+            except Exception as e:
+                # 不跳过出错的文件：向上抛出，由 main() 回滚整个事务
+                print(f"✗ 错误处理 {filepath}: {e}")
+                raise
     
     return updated_count
 
-def handle_subdirectories(mapping):
-    """处理药物的子目录（如 DXM/、MGT/）"""
+def handle_subdirectories(mapping, tx):
+    """处理药物的子目录（如 DXM/、MGT/）（暂存到事务中）"""
     drugs_dir = Path("./source/drugs")
     updated_count = 0
     
@@ -178,8 +180,8 @@ def handle_subdirectories(mapping):
         new_dir = drugs_dir / info['filename']
         
         if old_dir.exists() and old_dir.is_dir():
-            if not new_dir.exists():
-                old_dir.rename(new_dir)
+            if not tx.exists(new_dir):
+                tx.rename(old_dir, new_dir)
                 print(f"✓ 重命名目录 {code}/ -> {info['filename']}/")
                 updated_count += 1
             else:
@@ -188,7 +190,7 @@ def handle_subdirectories(mapping):
     return updated_count
 
 def main():
-    os.chdir("/home/krvy/psydrugs.org")
+    os.chdir(ROOT)
     
     print("\n" + "=" * 70)
     print("药物文件名称中文化工具 - 完整执行")
@@ -199,6 +201,10 @@ def main():
     mapping = get_drug_mapping()
     print(f"✓ 找到 {len(mapping)} 个药物文件")
     
+    # 只改写链接图中引用了这些药物的文件，不再扫描整个 source/
+    files = referencing_files(mapping, load_graph())
+    print(f"✓ {len(files)} 个文件引用了这些药物")
+    
     # 显示映射预览
     print("\n映射预览：")
     for i, (code, info) in enumerate(sorted(mapping.items())[:8]):
@@ -206,29 +212,41 @@ def main():
     if len(mapping) > 8:
         print(f"  ... 还有 {len(mapping) - 8} 个")
     
-    # 第二步：重命名文件
-    print("\n[2/6] 重命名药物文件...")
-    renamed = rename_files(mapping)
-    print(f"✓ 共重命名 {renamed} 个文件")
-    
-    # 第三步：处理子目录
-    print("\n[3/6] 重命名药物子目录...")
-    renamed_dirs = handle_subdirectories(mapping)
-    print(f"✓ 共重命名 {renamed_dirs} 个目录")
-    
-    # 第四步：更新 YAML 配置
-    print("\n[4/6] 更新 YAML 配置文件...")
-    update_drugs_yml(mapping)
-    
-    # 第五步：更新 Markdown 文件引用
-    print("\n[5/6] 更新 Markdown 文件中的引用...")
-    md_updated = update_markdown_files(mapping)
-    print(f"✓ 共更新 {md_updated} 个 Markdown 文件")
-    
-    # 第六步：更新 HTML 文件引用
-    print("\n[6/6] 更新 HTML 文件中的引用...")
-    html_updated = update_html_files(mapping)
-    print(f"✓ 共更新 {html_updated} 个 HTML 文件")
+    # 所有写入和改名先暂存，最后一次性提交；任何一步失败都不会改动目录树。
+    # 先改内容、后改名：暂存时按当前路径读取文件，提交时按顺序执行。
+    tx = Transaction()
+    try:
+        # 第二步：更新 YAML 配置
+        print("\n[2/6] 更新 YAML 配置文件...")
+        update_drugs_yml(mapping, tx)
+        
+        # 第三步：更新 Markdown 文件引用
+        print("\n[3/6] 更新 Markdown 文件中的引用...")
+        md_updated = update_markdown_files(mapping, tx, files)
+        print(f"✓ 共更新 {md_updated} 个 Markdown 文件")
+        
+        # 第四步：更新 HTML 文件引用
+        print("\n[4/6] 更新 HTML 文件中的引用...")
+        html_updated = update_html_files(mapping, tx, files)
+        print(f"✓ 共更新 {html_updated} 个 HTML 文件")
+        
+        # 第五步：重命名文件
+        print("\n[5/6] 重命名药物文件...")
+        renamed = rename_files(mapping, tx)
+        print(f"✓ 共重命名 {renamed} 个文件")
+        
+        # 第六步：处理子目录
+        print("\n[6/6] 重命名药物子目录...")
+        renamed_dirs = handle_subdirectories(mapping, tx)
+        print(f"✓ 共重命名 {renamed_dirs} 个目录")
+        
+        print(f"\n提交 {len(tx)} 个操作...")
+        tx.commit()
+        print("✓ 提交成功")
+    except Exception as e:
+        tx.discard()
+        print(f"✗ 出错，所有修改已回滚: {e}")
+        raise
     
     print("\n" + "=" * 70)
     print("完成！")
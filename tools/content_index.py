@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容索引：一次性解析 source/ 下的所有页面，并缓存到磁盘
+
+每个页面对应一条记录：
+    path        相对 source/ 的路径（posix 格式）
+    frontmatter front-matter 字典（没有则为 None）
+    title       front-matter 中的 title，缺失时取第一个标题
+    headings    [[级别, 文本], ...]
+    links       页面中的所有外链/站内链接
+    size, mtime 文件大小与修改时间，用于判断缓存是否失效
+
+其他维护脚本通过 load_index() 查询索引，不再各自遍历、读取整个 source/。
+热缓存下只需要对每个文件做一次 stat。
+"""
+import argparse
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+from frontmatter import parse_block
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE_DIR = ROOT / 'source'
+CACHE_DIR = ROOT / '.cache'
+INDEX_PATH = CACHE_DIR / 'content_index.json'
+INDEX_VERSION = 2
+
+PAGE_SUFFIXES = ('.md', '.html')
+SKIP_DIRS = {'.git', 'node_modules', '_data'}
+
+FRONTMATTER_RE = re.compile(r'^---\s*\n(.*?)\n---[ \t]*(?:\n|$)', re.DOTALL)
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+MD_LINK_RE = re.compile(r'\]\(\s*<?([^)\s>]+)')
+HREF_RE = re.compile(r'href\s*=\s*["\']([^"\']+)["\']')
+AUTOLINK_RE = re.compile(r'<(https?://[^>\s]+)>')
+
+
+def parse_frontmatter_block(block):
+    """解析 front-matter 文本，规则与流式读取（frontmatter.parse_block）一致"""
+    return parse_block(block.split('\n'))
+
+
+def split_frontmatter(content):
+    """拆分 front-matter 与正文，返回 (front-matter 文本或 None, 正文)"""
+    match = FRONTMATTER_RE.match(content)
+    if not match:
+        return None, content
+    return match.group(1), content[match.end():]
+
+
+def extract_headings(body):
+    """提取 Markdown 标题（忽略代码块中的 #）"""
+    headings = []
+    in_fence = False
+    for line in body.split('\n'):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = HEADING_RE.match(line)
+        if match:
+            headings.append([len(match.group(1)), match.group(2)])
+    return headings
+
+
+def extract_links(content):
+    """提取 Markdown 链接、HTML href 和自动链接，保持出现顺序"""
+    found = []
+    for regex in (MD_LINK_RE, HREF_RE, AUTOLINK_RE):
+        found.extend((m.start(), m.group(1)) for m in regex.finditer(content))
+    found.sort()
+    return [url for _, url in found]
+
+
+def parse_page(path, source_dir=SOURCE_DIR, stat=None):
+    """读取并解析单个页面，返回索引记录"""
+    path = Path(path)
+    stat = stat or path.stat()
+    content = path.read_text(encoding='utf-8', errors='replace')
+
+    block, body = split_frontmatter(content)
+    frontmatter = parse_frontmatter_block(block) if block is not None else None
+    headings = extract_headings(body) if path.suffix == '.md' else []
+
+    title = frontmatter.get('title') if frontmatter else None
+    if title is not None:
+        title = str(title).strip() or None
+    if not title:
+        title = next((text for level, text in headings if level == 1), None)
+
+    return {
+        'path': path.relative_to(source_dir).as_posix(),
+        'frontmatter': frontmatter,
+        'title': title,
+        'headings': headings,
+        'links': extract_links(content),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+    }
+
+
+def walk_source(source_dir=SOURCE_DIR):
+    """遍历 source/ 下的所有页面文件，按路径排序"""
+    paths = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+        for name in files:
+            if name.endswith(PAGE_SUFFIXES):
+                paths.append(Path(root) / name)
+    return sorted(paths)
+
+
+def build_index(source_dir=SOURCE_DIR, previous=None):
+    """
+    构建索引。previous 为旧索引时，大小和修改时间未变的页面直接复用旧记录。
+    返回 (index, 重新解析的页面数)
+    """
+    source_dir = Path(source_dir)
+    previous = previous or {}
+    index = {}
+    parsed = 0
+    for path in walk_source(source_dir):
+        rel = path.relative_to(source_dir).as_posix()
+        stat = path.stat()
+        old = previous.get(rel)
+        if old and old['size'] == stat.st_size and old['mtime'] == stat.st_mtime:
+            index[rel] = old
+            continue
+        index[rel] = parse_page(path, source_dir, stat)
+        parsed += 1
+    return index, parsed
+
+
+def read_cache(cache_path=INDEX_PATH, source_dir=SOURCE_DIR):
+    """读取磁盘缓存；版本或 source 目录不匹配时返回空字典"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != INDEX_VERSION or data.get('source') != str(source_dir):
+        return {}
+    return data.get('pages', {})
+
+
+def save_index(index, cache_path=INDEX_PATH, source_dir=SOURCE_DIR):
+    """将索引写入磁盘（先写临时文件再替换，避免中途失败留下半个文件）"""
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'source': str(source_dir), 'pages': index},
+                  f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, cache_path)
+
+
+def load_index(source_dir=SOURCE_DIR, cache_path=INDEX_PATH, rebuild=False):
+    """
+    加载索引：读取缓存，只重新解析有变化的页面，必要时写回缓存。
+    所有维护脚本都应通过这个函数获取页面信息。
+    """
+    source_dir = Path(source_dir)
+    previous = {} if rebuild else read_cache(cache_path, source_dir)
+    index, parsed = build_index(source_dir, previous)
+    if parsed or set(index) != set(previous):
+        save_index(index, cache_path, source_dir)
+    return index
+
+
+def iter_pages(index, prefix='', suffix='.md'):
+    """按路径前缀（如 'drugs/'）和后缀筛选页面记录"""
+    for rel in sorted(index):
+        if rel.startswith(prefix) and rel.endswith(suffix):
+            yield index[rel]
+
+
+def pages_linking(index, pattern, prefix=''):
+    """返回含有匹配 pattern（正则）链接的页面记录"""
+    regex = re.compile(pattern)
+    return [page for page in iter_pages(index, prefix, suffix='')
+            if any(regex.search(link) for link in page['links'])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='构建/刷新 source/ 内容索引')
+    parser.add_argument('--rebuild', action='store_true', help='忽略缓存，完整重建')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = load_index(rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+
+    total_links = sum(len(page['links']) for page in index.values())
+    total_size = sum(page['size'] for page in index.values())
+    print(f"✓ 索引页面数: {len(index)}")
+    print(f"✓ 链接总数: {total_links}")
+    print(f"✓ 内容大小: {total_size / 1024:.1f} KB")
+    print(f"✓ 耗时: {elapsed * 1000:.1f} ms")
+    print(f"  缓存位置: {INDEX_PATH.relative_to(ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
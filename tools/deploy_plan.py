@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量部署计划：只上传有变化的文件
+
+对 public/ 中的每个文件计算内容哈希（多进程并行），与上次成功部署时记录的
+部署清单比较，得出最小的 新增 / 修改 / 删除 集合：
+
+    python3 tools/deploy_plan.py                          # 显示部署计划
+    python3 tools/deploy_plan.py --files-from plan.txt    # 生成 rsync 文件列表
+    rsync -a --files-from=plan.txt --delete-missing-args public/ host:/srv/site/
+    python3 tools/deploy_plan.py --mark-deployed          # rsync 成功后记录本次部署
+
+    python3 tools/deploy_plan.py --target /srv/site       # 部署到本地目录（也用于测试）
+
+文件列表包含新增、修改和删除的文件（相对 public/）；配合 --delete-missing-args，
+rsync 会在目标上删除列表中本地已不存在的文件。--json 输出完整计划，
+可用于 git 部署时只暂存变化的文件（git add / git rm）。
+
+部署清单 {相对路径: [大小, 哈希]} 默认保存在 .cache/deploy_manifest.json；
+部署到本地目录时保存在目标目录的 .deploy-manifest.json 中，跟随目标。
+清单只在部署成功后更新，中途失败的部署下次会重新上传。
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from content_index import CACHE_DIR, ROOT
+from executor import add_jobs_argument, run_parallel
+from manifest import file_hash
+
+PUBLIC_DIR = ROOT / 'public'
+DEPLOY_MANIFEST = CACHE_DIR / 'deploy_manifest.json'
+TARGET_MANIFEST = '.deploy-manifest.json'
+DEPLOY_VERSION = 1
+
+
+def list_files(public_dir):
+    """public/ 中所有文件的相对路径（posix 格式，排序）"""
+    files = []
+    for root, dirs, names in os.walk(public_dir):
+        rel_root = os.path.relpath(root, public_dir).replace(os.sep, '/')
+        prefix = '' if rel_root == '.' else rel_root + '/'
+        files.extend(prefix + name for name in names)
+    return sorted(files)
+
+
+def hash_entry(path):
+    """[大小, 哈希]（在工作进程中运行）"""
+    return [os.path.getsize(path), file_hash(path)]
+
+
+def hash_tree(public_dir, jobs=1):
+    """计算所有文件的 {相对路径: [大小, 哈希]}，读取失败的文件抛出 OSError"""
+    files = list_files(public_dir)
+    results = run_parallel(hash_entry, [os.path.join(public_dir, rel) for rel in files], jobs=jobs)
+    current = {}
+    for rel, (_, entry, error) in zip(files, results):
+        if error:
+            raise OSError(f'{rel}: {error}')
+        current[rel] = entry
+    return current
+
+
+def load_deployed(path):
+    """读取上次成功部署的清单，不存在或版本不匹配时返回空字典（即全部上传）"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != DEPLOY_VERSION:
+        return {}
+    return data.get('files', {})
+
+
+def save_deployed(path, files):
+    """写入部署清单（临时文件 + 替换）"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': DEPLOY_VERSION, 'deployed_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                   'files': files}, f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def plan(current, deployed):
+    """比较两份清单，返回 {'added': [...], 'changed': [...], 'deleted': [...], 'unchanged': 数量}"""
+    added = [rel for rel in current if rel not in deployed]
+    changed = [rel for rel in current if rel in deployed and deployed[rel] != current[rel]]
+    deleted = sorted(rel for rel in deployed if rel not in current)
+    return {'added': added, 'changed': changed, 'deleted': deleted,
+            'unchanged': len(current) - len(added) - len(changed)}
+
+
+def transfer_size(result, current):
+    return sum(current[rel][0] for rel in result['added'] + result['changed'])
+
+
+def write_files_from(result, path):
+    """rsync --files-from 列表：新增、修改和删除的文件（配合 --delete-missing-args）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for rel in result['added'] + result['changed'] + result['deleted']:
+            f.write(rel + '\n')
+
+
+def apply_local(result, public_dir, target_dir):
+    """把计划应用到本地目标目录：复制新增和修改的文件，删除已删除的文件"""
+    target_dir = Path(target_dir)
+    for rel in result['added'] + result['changed']:
+        destination = target_dir / rel
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = destination.with_name(destination.name + '.deploy-tmp')
+        shutil.copy2(Path(public_dir) / rel, tmp_path)
+        os.replace(tmp_path, destination)
+    for rel in result['deleted']:
+        destination = target_dir / rel
+        if destination.exists():
+            destination.unlink()
+        # 删除因此变空的目录
+        parent = destination.parent
+        while parent != target_dir and parent.is_dir() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比较 public/ 与上次部署，生成增量部署计划')
+    parser.add_argument('--public-dir', default=str(PUBLIC_DIR), help='Hexo 输出目录（默认 public/）')
+    parser.add_argument('--manifest', help=f'部署清单路径（默认 {DEPLOY_MANIFEST.relative_to(ROOT)}，'
+                                           f'部署到本地目录时为目标目录中的 {TARGET_MANIFEST}）')
+    parser.add_argument('--target', help='部署到本地目录：按计划复制/删除文件，成功后更新清单')
+    parser.add_argument('--files-from', help='输出 rsync --files-from 文件列表')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出完整计划')
+    parser.add_argument('--mark-deployed', action='store_true', help='外部部署成功后，把当前状态记录为已部署')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.public_dir):
+        print(f"✗ 目录不存在: {args.public_dir}（先运行 hexo generate）", file=sys.stderr)
+        sys.exit(1)
+    manifest_path = args.manifest or (Path(args.target) / TARGET_MANIFEST if args.target else DEPLOY_MANIFEST)
+
+    start = time.perf_counter()
+    current = hash_tree(args.public_dir, args.jobs)
+    deployed = load_deployed(manifest_path)
+    result = plan(current, deployed)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for key, mark in (('added', '+'), ('changed', '~'), ('deleted', '-')):
+            for rel in result[key]:
+                print(f"{mark} {rel}")
+    if args.files_from:
+        write_files_from(result, args.files_from)
+
+    print(f"{'✓' if deployed else '⚠ 没有部署记录，全部文件视为新增；'} 新增 {len(result['added'])}，"
+          f"修改 {len(result['changed'])}，删除 {len(result['deleted'])}，未变化 {result['unchanged']}，"
+          f"需上传 {transfer_size(result, current) / 1024:.1f} KB（{elapsed * 1000:.1f} ms）", file=sys.stderr)
+
+    if args.target:
+        Path(args.target).mkdir(parents=True, exist_ok=True)
+        apply_local(result, args.public_dir, args.target)
+        save_deployed(manifest_path, current)
+        print(f"✓ 已部署到 {args.target}", file=sys.stderr)
+    elif args.mark_deployed:
+        save_deployed(manifest_path, current)
+        print(f"✓ 已记录部署清单 {manifest_path}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
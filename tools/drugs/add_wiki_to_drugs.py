@@ -1,35 +1,53 @@
 #!/usr/bin/env python3
 """Add wiki: drugs to all drugs markdown files if missing"""
-import os
-import re
+import argparse
+import sys
 from pathlib import Path
 
-root = Path('/home/krvy/Psydrugs.icu/source/drugs')
-files = list(root.rglob('*.md'))
-updated = 0
-skipped = 0
-
-for fp in files:
-    text = fp.read_text(encoding='utf-8')
-    m = re.match(r'^---\s*\n(.*?)\n---\s*\n', text, re.DOTALL)
-    if not m:
-        skipped += 1
-        continue
-    front = m.group(1)
-    if re.search(r'^wiki:\s*drugs\b', front, re.MULTILINE):
-        skipped += 1
-        continue
-    # insert wiki: drugs after first line in frontmatter
-    lines = front.split('\n')
-    if lines and lines[0].strip() == '':
-        insert_at = 1
-    else:
-        insert_at = 0
-    new_front = lines[:insert_at] + ['wiki: drugs'] + lines[insert_at:]
-    new_front_text = '\n'.join(new_front)
-    new_text = f"---\n{new_front_text}\n---\n" + text[m.end():]
-    fp.write_text(new_text, encoding='utf-8')
-    updated += 1
-    print(f"added wiki to {fp.relative_to(root)}")
-
-print(f"done. updated={updated} skipped={skipped} total={len(files)}")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from content_index import SOURCE_DIR, iter_pages, load_index
+from executor import add_jobs_argument
+from frontmatter_edit import insert_after, mutate_files
+from manifest import filter_changed, load_manifest, save_manifest, update_manifest
+
+MANIFEST_NAME = 'add_wiki_to_drugs'
+# put wiki: drugs first in the frontmatter (a wrong value such as 'durgs' is replaced)
+MUTATIONS = [insert_after('wiki', 'drugs')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='add wiki: drugs to drugs pages')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='only process files changed since the last run')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    root = SOURCE_DIR / 'drugs'
+    pages = {SOURCE_DIR / page['path']: page for page in iter_pages(load_index(), 'drugs/')}
+    manifest = load_manifest(MANIFEST_NAME)
+    paths = filter_changed(pages, manifest) if args.changed_only else list(pages)
+    updated = 0
+    skipped = 0
+
+    # the index already knows the frontmatter, only open files that need the field
+    candidates = [fp for fp in paths
+                  if pages[fp]['frontmatter'] is not None
+                  and pages[fp]['frontmatter'].get('wiki') != 'drugs']
+    skipped += len(paths) - len(candidates)
+
+    for fp, written, error in mutate_files(candidates, MUTATIONS, args.jobs):
+        if error:
+            print(f"error in {fp.relative_to(root)}: {error}")
+        if not written:
+            skipped += 1
+            continue
+        updated += 1
+        print(f"added wiki to {fp.relative_to(root)}")
+
+    update_manifest(manifest, paths)
+    save_manifest(MANIFEST_NAME, manifest)
+    print(f"done. updated={updated} skipped={skipped} checked={len(paths)} total={len(pages)}")
+
+
+if __name__ == '__main__':
+    main()
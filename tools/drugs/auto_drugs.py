@@ -3,10 +3,17 @@
 综合drugs自动处理脚本
 执行所有与drugs相关的维护任务
 """
-import os
+import argparse
 import sys
-import subprocess
 from datetime import datetime
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(TOOLS_DIR.parent))
+from content_index import load_index
+from generate_drugs_yml import update_drugs_yml_file
+from pipeline import print_timings, run_pipeline, succeeded
+from validate_drugs import validate_drugs
 
 def print_section(title):
     """打印分隔符和标题"""
@@ -14,66 +21,82 @@ def print_section(title):
     print(f"  {title}")
     print(f"{'='*60}")
 
-def run_command(cmd, description):
-    """运行命令并报告结果"""
-    try:
-        print(f"\n→ {description}")
-        result = subprocess.run(cmd, shell=True, cwd='/home/krvy/Psydrugs.icu', 
-                              capture_output=True, text=True)
-        if result.returncode == 0:
-            print(f"✓ 成功")
-            if result.stdout:
-                print(result.stdout)
-        else:
-            print(f"✗ 失败")
-            if result.stderr:
-                print(result.stderr)
-        return result.returncode == 0
-    except Exception as e:
-        print(f"✗ 错误: {e}")
-        return False
-
-def count_drug_files():
-    """统计drugs文件数量"""
-    drugs_dir = '/home/krvy/Psydrugs.icu/source/drugs'
+def count_drug_files(index):
+    """统计drugs文件数量（基于内容索引）"""
     count = 0
     subdirs = []
     
-    for item in os.listdir(drugs_dir):
-        item_path = os.path.join(drugs_dir, item)
-        if item.endswith('.md') and os.path.isfile(item_path):
+    for rel in index:
+        parts = Path(rel).parts
+        if parts[0] != 'drugs' or not rel.endswith('.md'):
+            continue
+        if len(parts) == 2:
             count += 1
-        elif os.path.isdir(item_path) and not item.startswith('.'):
-            subdirs.append(item)
+        elif parts[1] not in subdirs:
+            subdirs.append(parts[1])
     
-    return count, subdirs
+    return count, sorted(subdirs)
 
-def main():
-    """主函数"""
-    print_section("🔧 Drugs 自动处理工具")
-    
-    print(f"\n执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    # 1. 显示当前状态
-    print_section("📊 当前状态")
-    drug_count, subdirs = count_drug_files()
+def stage_index(ctx):
+    """刷新内容索引，后续阶段共用这一份结果"""
+    index = load_index()
+    print(f"内容索引: {len(index)} 个页面")
+    return index
+
+def stage_status(ctx):
+    """显示当前状态"""
+    drug_count, subdirs = count_drug_files(ctx['index'])
     print(f"药物文件数: {drug_count}")
     print(f"药物子目录: {len(subdirs)}")
     if subdirs:
         for subdir in subdirs:
             print(f"  - {subdir}/")
+    return drug_count
+
+def stage_validate(ctx):
+    """验证所有drugs文件的front-matter（--fix 时补写缺少的）；补写了文件时增量刷新索引"""
+    stats = validate_drugs(ctx['index'], fix=ctx.get('fix', False))
+    if stats['added_frontmatter']:
+        ctx['index'] = load_index()
+    return stats
+
+def stage_drugs_yml(ctx):
+    """生成/更新 drugs.yml"""
+    update_drugs_yml_file(ctx['index'])
+
+# 各阶段按依赖顺序在同一进程中运行，共享同一份内容索引
+STAGES = {
+    'index': {'func': stage_index, 'requires': [], 'description': '📊 刷新内容索引'},
+    'status': {'func': stage_status, 'requires': ['index'], 'description': '📊 当前状态'},
+    'validate': {'func': stage_validate, 'requires': ['index'], 'description': '✓ 验证 Drugs 文件'},
+    'drugs_yml': {'func': stage_drugs_yml, 'requires': ['index', 'validate'],
+                  'description': '🔄 更新 Drugs 配置'},
+}
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='执行所有与drugs相关的维护任务')
+    parser.add_argument('stages', nargs='*', metavar='STAGE',
+                        help=f"只运行这些阶段及其依赖（可选: {', '.join(STAGES)}）")
+    parser.add_argument('--fix', action='store_true', help='为完全没有 front-matter 的drugs文件新建')
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"未知阶段: {', '.join(unknown)}")
+    
+    print_section("🔧 Drugs 自动处理工具")
     
-    # 2. 验证drugs文件
-    print_section("✓ 验证 Drugs 文件")
-    run_command('python3 validate_drugs.py', '验证所有drugs文件的front-matter')
+    print(f"\n执行时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    # 3. 更新drugs.yml配置
-    print_section("🔄 更新 Drugs 配置")
-    run_command('python3 generate_drugs_yml.py', '生成/更新 drugs.yml')
+    context, timings = run_pipeline(
+        STAGES, args.stages or None, context={'fix': args.fix},
+        on_start=lambda name, stage: print_section(stage['description']))
     
-    # 4. 显示最终结果
-    print_section("✅ 完成")
-    print(f"""
+    print_section("✅ 完成" if succeeded(timings) else "⚠ 部分阶段未成功")
+    print_timings(timings, STAGES)
+    drug_count = context.get('status')
+    if not args.stages and succeeded(timings):
+        print(f"""
 所有drugs相关处理已完成！
 
 已执行的操作:
@@ -86,6 +109,8 @@ def main():
   2. 运行 hexo server 启动本地服务器查看效果
   3. 确认drug页面显示正确
     """)
+    if not succeeded(timings):
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -1,61 +1,80 @@
 #!/usr/bin/env python3
 """
 验证和修复drugs文件的front-matter
-确保所有drugs文件都有正确的metadata
+确保所有drugs文件（包括各分类子目录）都有正确的metadata，
+规则与 tools/validate_frontmatter.py 的 drugs 板块一致
 """
+import argparse
 import os
 import re
-from datetime import datetime
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from content_index import FRONTMATTER_RE, SOURCE_DIR, iter_pages, load_index
+from frontmatter import FENCE, read_frontmatter
+from frontmatter_edit import mutate_text, set_key
+from manifest import filter_changed, load_manifest, save_manifest, update_manifest, write_if_changed
+from validate_frontmatter import SCHEMAS, check_frontmatter
+
+MANIFEST_NAME = 'validate_drugs'
+# 形如 front-matter 键的行（title: ...）
+KEY_LINE_RE = re.compile(r'^[A-Za-z_][\w-]*:(?:\s|$)')
 
 def get_frontmatter_from_file(filepath):
-    """从文件中提取front-matter"""
+    """从文件中提取front-matter（流式读取，读到结束的 --- 即停止），返回字典"""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 匹配YAML frontmatter
-        match = re.match(r'^---\s*\n(.*?)\n---', content, re.DOTALL)
-        if match:
-            return match.group(1)
-        
         # 如果没有frontmatter，返回None
-        return None
+        return read_frontmatter(filepath)
     except Exception as e:
         print(f"Error reading {filepath}: {e}")
         return None
 
+def frontmatter_problem(content):
+    """
+    没有被识别为 front-matter 的文件：返回格式问题的描述；
+    完全没有 front-matter（开头没有任何键）时返回 None
+    """
+    lines = content.split('\n')
+    if lines[0].strip() == FENCE:
+        return '开头的 --- 之后没有结束的 ---'
+    if KEY_LINE_RE.match(lines[0]) and any(line.strip() == FENCE for line in lines[1:]):
+        return 'front-matter 缺少开头的 ---'
+    return None
+
 def ensure_frontmatter(filepath, drug_name):
-    """确保文件有基本的front-matter"""
+    """
+    为完全没有 front-matter 的文件新建基本的 front-matter，返回是否写入；
+    日期取文件的修改时间（而不是运行脚本的时间），重复运行或在不同机器上运行得到相同的结果
+    """
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
-    
-    # 检查是否已有front-matter
-    if content.startswith('---'):
-        return False  # 已有front-matter
-    
-    # 创建基础front-matter
-    frontmatter = f"""---
-title: {drug_name}
-description: 
-published: true
-date: {datetime.now().strftime('%Y-%m-%dT%H:%M:%S.000Z')}
-tags: 
-editor: markdown
-updated: {datetime.now().strftime('%Y-%m-%dT%H:%M:%S.000Z')}
----
+    if FRONTMATTER_RE.match(content) or frontmatter_problem(content):
+        return False  # 已有（或格式有误的）front-matter，不再追加一份
 
-"""
-    
-    # 添加front-matter到文件开头
-    new_content = frontmatter + content
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(new_content)
-    
-    return True
+    modified = datetime.fromtimestamp(os.path.getmtime(filepath), timezone.utc)
+    stamp = modified.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    mutations = [
+        set_key('title', drug_name),
+        set_key('description', None),
+        set_key('published', True),
+        set_key('date', stamp),
+        set_key('tags', None),
+        set_key('editor', 'markdown'),
+        set_key('updated', stamp),
+        set_key('wiki', 'drugs'),
+    ]
+    rel = Path(filepath).relative_to(SOURCE_DIR).as_posix()
+    return write_if_changed(filepath, mutate_text(content, mutations, rel, create=True))
 
-def validate_drugs():
-    """验证所有drugs文件"""
-    drugs_dir = '/home/krvy/Psydrugs.icu/source/drugs'
+def validate_drugs(index=None, changed_only=False, fix=False):
+    """
+    验证所有drugs文件（front-matter 信息取自内容索引）；
+    fix=True 时为完全没有 front-matter 的文件新建，格式有误的只报告
+    """
+    index = index if index is not None else load_index()
+    manifest = load_manifest(MANIFEST_NAME)
     stats = {
         'total': 0,
         'with_frontmatter': 0,
@@ -64,28 +83,43 @@ def validate_drugs():
         'issues': []
     }
     
-    for filename in sorted(os.listdir(drugs_dir)):
-        if filename.endswith('.md'):
-            filepath = os.path.join(drugs_dir, filename)
-            drug_name = filename.replace('.md', '')
-            
-            stats['total'] += 1
-            
-            # 检查是否是一级文件（不是子目录中的文件）
-            if os.path.isfile(filepath):
-                frontmatter = get_frontmatter_from_file(filepath)
-                
-                if frontmatter:
-                    stats['with_frontmatter'] += 1
-                else:
-                    stats['without_frontmatter'] += 1
-                    # 尝试添加front-matter
-                    if ensure_frontmatter(filepath, drug_name):
-                        stats['added_frontmatter'] += 1
-                        print(f"✓ 为 {drug_name} 添加了front-matter")
+    pages = {SOURCE_DIR / page['path']: page for page in iter_pages(index, 'drugs/')}
+    paths = filter_changed(pages, manifest) if changed_only else list(pages)
+    
+    clean = []
+    for filepath in paths:
+        page = pages[filepath]
+        drug_name = filepath.stem
+        
+        stats['total'] += 1
+        issue_count = len(stats['issues'])
+        
+        if page['frontmatter'] is not None:
+            stats['with_frontmatter'] += 1
+            for issue in check_frontmatter(page['frontmatter'], SCHEMAS['drugs']):
+                stats['issues'].append(f"{page['path']}: {issue}")
+        else:
+            stats['without_frontmatter'] += 1
+            with open(filepath, 'r', encoding='utf-8') as f:
+                problem = frontmatter_problem(f.read())
+            if problem:
+                stats['issues'].append(f"{page['path']}: {problem}")
+            elif fix and ensure_frontmatter(filepath, drug_name):
+                stats['added_frontmatter'] += 1
+                print(f"✓ 为 {drug_name} 添加了front-matter")
+            else:
+                stats['issues'].append(f"{page['path']}: 缺少 front-matter")
+        if len(stats['issues']) == issue_count:
+            clean.append(filepath)
+    
+    # 只记录没有问题的文件，有问题的文件在 --changed-only 时仍会被检查、报告
+    update_manifest(manifest, clean)
+    save_manifest(MANIFEST_NAME, manifest)
     
     # 打印统计信息
     print("\n=== Drugs 文件验证报告 ===")
+    if changed_only:
+        print(f"（仅检查有变化的文件，跳过 {len(pages) - len(paths)} 个未变化文件）")
     print(f"总文件数: {stats['total']}")
     print(f"已有front-matter: {stats['with_frontmatter']}")
     print(f"缺少front-matter: {stats['without_frontmatter']}")
@@ -97,6 +131,13 @@ def validate_drugs():
             print(f"  - {issue}")
     else:
         print("\n✓ 所有drugs文件验证完毕，无问题")
+    
+    return stats
 
 if __name__ == '__main__':
-    validate_drugs()
+    parser = argparse.ArgumentParser(description='验证和修复drugs文件的front-matter')
+    parser.add_argument('--changed-only', action='store_true', help='只检查上次运行后有变化的文件')
+    parser.add_argument('--fix', action='store_true', help='为完全没有 front-matter 的文件新建（格式有误的只报告）')
+    args = parser.parse_args()
+    stats = validate_drugs(changed_only=args.changed_only, fix=args.fix)
+    sys.exit(1 if stats['issues'] else 0)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行文件处理与原子写入
+
+run_parallel() 把逐文件的处理函数分发到进程池：
+    - 结果按输入顺序返回，报告输出与串行运行完全一致
+    - 单个文件出错不会中断整批，错误信息随结果一起返回
+    - jobs=1 时直接在当前进程运行，没有进程池开销
+
+处理函数必须是模块级函数（可被 pickle）；需要预先编译的状态
+（例如改写器）通过 initializer 在每个工作进程中构造一次。
+
+atomic_write() 先写同目录下的临时文件再 os.replace，
+中途崩溃不会留下写了一半的页面。
+"""
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+
+def add_jobs_argument(parser):
+    """为脚本添加统一的 --jobs 参数"""
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='并行进程数（默认 1；0 表示使用全部 CPU 核心）')
+
+
+def resolve_jobs(jobs):
+    """将 --jobs 参数转换为实际进程数"""
+    if not jobs or jobs < 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _call(func, item):
+    """在工作进程中执行处理函数，把异常转换为错误信息"""
+    try:
+        return func(item), None
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def _call_many(func, items):
+    """批量执行，减少进程间通信次数"""
+    return [_call(func, item) for item in items]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_parallel(func, items, jobs=1, initializer=None, initargs=()):
+    """
+    对每个 item 执行 func(item)，返回 [(item, 结果, 错误信息或 None), ...]，
+    顺序与 items 一致。
+    """
+    items = list(items)
+    jobs = min(resolve_jobs(jobs), len(items)) if items else 1
+
+    if jobs <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        outcomes = _call_many(func, items)
+    else:
+        chunk_size = max(1, len(items) // (jobs * 4))
+        chunks = list(_chunks(items, chunk_size))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=initializer,
+                                 initargs=initargs) as pool:
+            outcomes = [outcome
+                        for batch in pool.map(_call_many, [func] * len(chunks), chunks)
+                        for outcome in batch]
+
+    return [(item, result, error) for item, (result, error) in zip(items, outcomes)]
+
+
+def atomic_write(path, content, encoding='utf-8'):
+    """
+    原子地写入文件：临时文件写完并 fsync 后再替换原文件，保留原权限。
+    content 为 bytes 时按二进制写入
+    """
+    path = os.fspath(path)
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.',
+                                    suffix='.tmp')
+    try:
+        if isinstance(content, bytes):
+            f = os.fdopen(fd, 'wb')
+        else:
+            f = os.fdopen(fd, 'w', encoding=encoding, newline='')
+        with f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
@@ -4,52 +4,74 @@
 第二阶段：更新所有还未转换的英文代码引用为中文名
 """
 
+import argparse
 import os
-import re
 from pathlib import Path
 
-def get_all_mapping():
-    """获取所有文件（包括已转换的）的完整映射"""
+from content_index import ROOT, SOURCE_DIR, iter_pages, load_index
+from executor import add_jobs_argument, run_parallel
+from frontmatter import read_frontmatter
+from link_rewriter import compile_rewriter, rewrite_file
+
+def get_all_mapping(index=None):
+    """
+    获取所有文件（包括已转换的）的完整映射。
+    传入内容索引时标题直接取自索引；否则逐个文件流式读取 front-matter，
+    读到结束的 --- 即停止，不读取正文。
+    """
     mapping = {}
-    drugs_dir = Path("./source/drugs")
+    if index is not None:
+        titles = ((Path(page['path']).stem, (page['frontmatter'] or {}).get('title'))
+                  for page in iter_pages(index, 'drugs/')
+                  if Path(page['path']).parent == Path('drugs'))
+    else:
+        titles = ((path.stem, (read_frontmatter(path) or {}).get('title'))
+                  for path in sorted((SOURCE_DIR / 'drugs').glob('*.md')))
     
     # 列出所有文件并建立映射
-    for md_file in sorted(drugs_dir.glob("*.md")):
-        if md_file.stem not in ["index", "compound", "introduction-to-overdose", "new-page"]:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # 查找 title 字段
-                match = re.search(r'^title: (.+)$', content, re.MULTILINE)
-                if match:
-                    title = match.group(1).strip()
-                    # 用下划线替代斜杠
-                    filename = title.replace('/', '_')
-                    mapping[md_file.stem] = {
-                        'title': title,
-                        'filename': filename
-                    }
+    for stem, title in titles:
+        if stem not in ["index", "compound", "introduction-to-overdose", "new-page"]:
+            # 查找 title 字段
+            if title is not None and str(title).strip():
+                title = str(title).strip()
+                # 用下划线替代斜杠
+                filename = title.replace('/', '_')
+                mapping[stem] = {
+                    'title': title,
+                    'filename': filename
+                }
     
     return mapping
 
+def build_rewriters(mapping):
+    """
+    将所有代码编译成单个正则（最长匹配优先，避免短代码误匹配），
+    返回 (YAML 改写器, Markdown 改写器)
+    """
+    filenames = {code: info['filename'] for code, info in mapping.items()}
+    
+    # 列表项：- CODE -> - FILENAME（使用更严格的匹配，确保是独立的单词）
+    list_item = (r'(?m:^)\s+- ', filenames, r'(?m:$)')
+    
+    yaml_rewriter = compile_rewriter([list_item])
+    markdown_rewriter = compile_rewriter([
+        # 1. 链接格式：[text](/drugs/CODE) -> [text](/drugs/FILENAME)
+        (r'/drugs/', filenames, r'/|\'|"'),
+        # 2. 列表项：- CODE -> - FILENAME
+        list_item,
+        # 3. 嵌套格式：CODE/xxx -> FILENAME/xxx
+        (r'\s+- ', filenames, r'/[a-zA-Z0-9_/]+'),
+    ])
+    return yaml_rewriter, markdown_rewriter
+
 def fix_yaml_references(mapping):
     """修复 YAML 文件中的所有引用"""
     yml_path = Path("./source/_data/wiki/drugs.yml")
     content = yml_path.read_text(encoding='utf-8')
     original = content
     
-    # 按照题目字符数从长到短排序，避免短代码误匹配
-    sorted_codes = sorted(mapping.keys(), key=len, reverse=True)
-    
-    for code in sorted_codes:
-        info = mapping[code]
-        # 替换 - CODE 格式的行
-        # 使用更严格的匹配，确保是独立的单词
-        content = re.sub(
-            rf'^(\s+)- {re.escape(code)}($)',
-            rf'\1- {info["filename"]}',
-            content,
-            flags=re.MULTILINE
-        )
+    yaml_rewriter, _ = build_rewriters(mapping)
+    content, _ = yaml_rewriter(content)
     
     if content != original:
         yml_path.write_text(content, encoding='utf-8')
@@ -59,61 +81,41 @@ def fix_yaml_references(mapping):
         print("✗ source/_data/wiki/drugs.yml 没有需要修改的内容")
     return False
 
-def fix_markdown_references(mapping):
-    """修复所有 markdown 文件中的引用"""
+# 每个工作进程中编译一次的 Markdown 改写器
+_markdown_rewriter = None
+
+def _init_markdown_rewriter(mapping):
+    """工作进程初始化：根据映射编译改写器"""
+    global _markdown_rewriter
+    _, _markdown_rewriter = build_rewriters(mapping)
+
+def fix_markdown_file(filepath):
+    """修复单个 markdown 文件，返回是否有变更（列表项规则不是链接，需要改写整个文件）"""
+    return rewrite_file(filepath, _markdown_rewriter, links_only=False) > 0
+
+def fix_markdown_references(mapping, index=None, jobs=1):
+    """修复所有 markdown 文件中的引用（每个文件只扫描一遍）"""
     updated_count = 0
     
-    sorted_codes = sorted(mapping.keys(), key=len, reverse=True)
-    
-    for root, dirs, files in os.walk("./source"):
-        dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules']]
-        
-        for file in files:
-            if file.endswith('.md'):
-                filepath = Path(root) / file
-                
-                try:
-                    content = filepath.read_text(encoding='utf-8')
-                    original = content
-                    
-                    for code in sorted_codes:
-                        info = mapping[code]
-                        
-                        # 替换各种格式的引用
-                        # 1. 链接格式：[text](/drugs/CODE) -> [text](/drugs/FILENAME)
-                        content = re.sub(
-                            rf'(/drugs/){re.escape(code)}(?=/|\'|\")',
-                            rf'\1{info["filename"]}',
-                            content
-                        )
-                        
-                        # 2. 列表项：- CODE -> - FILENAME
-                        content = re.sub(
-                            rf'^(\s+)- {re.escape(code)}($)',
-                            rf'\1- {info["filename"]}',
-                            content,
-                            flags=re.MULTILINE
-                        )
-                        
-                        # 3. 嵌套格式：CODE/xxx -> FILENAME/xxx
-                        content = re.sub(
-                            rf'(\s+)- {re.escape(code)}/([a-zA-Z0-9_/]+)',
-                            rf'\1- {info["filename"]}/\2',
-                            content
-                        )
-                    
-                    if content != original:
-                        filepath.write_text(content, encoding='utf-8')
-                        updated_count += 1
-                        print(f"✓ {filepath.relative_to('.')}")
-                
-                except Exception as e:
-                    print(f"✗ {filepath}: {e}")
+    index = index if index is not None else load_index()
+    filepaths = [Path("./source") / page['path'] for page in iter_pages(index)]
+    
+    for filepath, changed, error in run_parallel(fix_markdown_file, filepaths, jobs,
+                                                 _init_markdown_rewriter, (mapping,)):
+        if error:
+            print(f"✗ {filepath}: {error}")
+        elif changed:
+            updated_count += 1
+            print(f"✓ {filepath.relative_to('.')}")
     
     return updated_count
 
 def main():
-    os.chdir("/home/krvy/psydrugs.org")
+    parser = argparse.ArgumentParser(description='更新所有还未转换的英文代码引用为中文名')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    
+    os.chdir(ROOT)
     
     print("\n" + "=" * 70)
     print("药物文件名称中文化工具 - 第二阶段（修复引用）")
@@ -121,7 +123,8 @@ def main():
     
     # 获取完整映射
     print("\n[1/2] 读取完整映射...")
-    mapping = get_all_mapping()
+    index = load_index()
+    mapping = get_all_mapping(index)
     print(f"✓ 找到 {len(mapping)} 个药物")
     
     # 显示预览
@@ -137,7 +140,7 @@ def main():
     print("\n[2/2] 修复所有引用...")
     fix_yaml_references(mapping)
     
-    md_count = fix_markdown_references(mapping)
+    md_count = fix_markdown_references(mapping, index, args.jobs)
     print(f"✓ 共修复 {md_count} 个 Markdown 文件")
     
     print("\n" + "=" * 70)
@@ -4,57 +4,25 @@
 修复剩余的短代码链接
 """
 
-import os
 import re
-from pathlib import Path
 
-# 额外的短代码映射
-SHORT_CODE_MAPPING = {
-    'SPM': '补充剂/补充剂',  # GABA 可能是补充剂相关
-    'PR': 'antipsychotics/普瑞巴林',
-    'TPL': '补充剂/茶碱',
-    'TAN': '补充剂/茶氨酸',
-    'EI': '补充剂/酶抑制剂',
-    'THP': 'sedatives/苯海索',
-    'MGT': '补充剂/苏糖酸镁',
-    'GBP': 'antipsychotics/加巴喷丁',
-    'RPD': 'antipsychotics/利培酮',
-    'MMT': 'dissociatives/美金刚',
-}
+from aliases import link_rewriter, load_registry
+from content_index import SOURCE_DIR, load_index, pages_linking
+from link_rewriter import rewrite_file
+
+# 短代码取自别名登记表 source/_data/aliases.yml 中由 2~5 个字母组成的别名
+SHORT_CODE_RE = re.compile(r'^[A-Za-z]{2,5}$')
+REGISTRY = load_registry()
+SHORT_CODE_MAPPING = {code: target for code, target in REGISTRY['aliases'].items()
+                      if SHORT_CODE_RE.match(code)}
+
+# 所有短代码编译成一个正则：[text](/drugs/短代码、/Drugs/短代码 或 /zh/drugs/短代码 + 可选锚点)
+rewrite_short_codes = link_rewriter(REGISTRY, SHORT_CODE_MAPPING)
 
 def fix_short_code_links_in_file(file_path):
     """修复单个文件中的短代码链接"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        original_content = content
-        modified = False
-        
-        # 匹配所有 /drugs/xxx 格式的链接，其中 xxx 是短代码
-        pattern = r'\[([^\]]+)\]\(/drugs/([A-Z]{2,5})(/[^)]*)?(\))'
-        
-        def replace_link(match):
-            nonlocal modified
-            link_text = match.group(1)
-            short_code = match.group(2)
-            suffix = match.group(3) or ''
-            closing = match.group(4)
-            
-            # 查找对应的新路径
-            if short_code in SHORT_CODE_MAPPING:
-                new_path = SHORT_CODE_MAPPING[short_code]
-                modified = True
-                return f'[{link_text}](/drugs/{new_path}{suffix}{closing}'
-            else:
-                # 保持原样
-                return match.group(0)
-        
-        content = re.sub(pattern, replace_link, content)
-        
-        if modified:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+        if rewrite_file(file_path, rewrite_short_codes):
             return True, file_path
         return False, None
         
@@ -64,13 +32,15 @@ def fix_short_code_links_in_file(file_path):
 
 def main():
     """主函数"""
-    source_dir = Path('/home/krvy/psydrugs.org/source')
+    index = load_index()
     
     modified_files = []
     
-    # 遍历所有 .md 文件
-    for file_path in source_dir.glob('**/*.md'):
-        was_modified, path = fix_short_code_links_in_file(file_path)
+    # 只处理索引中含有 /drugs/短代码 链接的 .md 文件
+    for page in pages_linking(index, r'^(?:/zh)?/[Dd]rugs/[A-Za-z]{2,5}([#?.]|$)'):
+        if not page['path'].endswith('.md'):
+            continue
+        was_modified, path = fix_short_code_links_in_file(SOURCE_DIR / page['path'])
         if was_modified:
             modified_files.append(path)
     
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式 front-matter 读取
+
+逐行读取文件，遇到结束的 --- 就停止，不再读取正文：
+只需要 title 等字段的脚本每个文件只读几百字节，而不是整个文件
+（例如 90 KB 的 odw-reports/RP-7.md）。
+
+    data = read_frontmatter(path)        # dict 或 None（没有 front-matter）
+    page = read_page(path)
+    page.frontmatter                     # 同上
+    page.body                            # 正文，第一次访问时才从文件中读取
+    page.first_heading()                 # 逐行读取正文直到第一个一级标题
+
+解析的是 front-matter 中常用的 YAML 子集：标量、行内列表 [a, b]、
+缩进列表和一层缩进的子字段。标量会转换为对应类型：
+整数、浮点数、true/false、null/空值（None），其余为字符串。
+日期保持字符串形式（Hexo 中格式不统一），需要时用 parse_date() 转换。
+"""
+import re
+from datetime import datetime, timezone
+
+FENCE = '---'
+INT_RE = re.compile(r'^[-+]?(0|[1-9]\d*)$')
+FLOAT_RE = re.compile(r'^[-+]?\d+\.\d+$')
+HEADING_RE = re.compile(r'^#\s+(.+?)\s*$')
+DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+)
+
+
+def parse_scalar(value):
+    """将 YAML 标量转换为 Python 值"""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '\'"':
+        return value[1:-1]
+    if value in ('', '~', 'null', 'Null', 'NULL'):
+        return None
+    if value in ('true', 'True', 'TRUE'):
+        return True
+    if value in ('false', 'False', 'FALSE'):
+        return False
+    if INT_RE.match(value):
+        return int(value)
+    if FLOAT_RE.match(value):
+        return float(value)
+    return value
+
+
+def parse_block(lines):
+    """解析 front-matter 行（不含两侧的 ---），返回有序字典"""
+    data = {}
+    current_key = None
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        stripped = line.strip()
+        if line[0] in ' \t' or stripped.startswith('- '):
+            # 上一个键的缩进列表项或子字段
+            if current_key is None:
+                continue
+            if stripped.startswith('-'):
+                if not isinstance(data.get(current_key), list):
+                    data[current_key] = []
+                data[current_key].append(parse_scalar(stripped[1:]))
+            elif ':' in stripped:
+                if not isinstance(data.get(current_key), dict):
+                    data[current_key] = {}
+                sub_key, _, sub_value = stripped.partition(':')
+                data[current_key][sub_key.strip()] = parse_scalar(sub_value)
+            continue
+        key, sep, value = line.partition(':')
+        if not sep:
+            continue
+        current_key = key.strip()
+        value = value.strip()
+        if value.startswith('[') and value.endswith(']'):
+            data[current_key] = [parse_scalar(v) for v in value[1:-1].split(',') if v.strip()]
+        else:
+            data[current_key] = parse_scalar(value)
+    return data
+
+
+def parse_date(value):
+    """将 front-matter 中的日期转换为带时区的 datetime（无时区的按 UTC），失败返回 None"""
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    text = value.strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        parsed = None
+        for fmt in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _read_block(f):
+    """
+    从二进制文件对象读取 front-matter 行，停在结束的 --- 之后。
+    返回 (行列表或 None, 正文起始字节偏移)
+    """
+    first = f.readline()
+    if first.decode('utf-8', errors='replace').lstrip('﻿').rstrip() != FENCE:
+        return None, 0
+    lines = []
+    while True:
+        raw = f.readline()
+        if not raw:
+            # 没有结束的 ---，不算 front-matter
+            return None, 0
+        line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        if line.rstrip() == FENCE:
+            return lines, f.tell()
+        lines.append(line)
+
+
+class Page:
+    """已读取 front-matter 的页面，正文按需读取"""
+
+    def __init__(self, path, lines, body_offset):
+        self.path = path
+        self.frontmatter_lines = lines
+        self.frontmatter = parse_block(lines) if lines is not None else None
+        self.body_offset = body_offset
+        self._body = None
+
+    @property
+    def body(self):
+        """正文（front-matter 之后的内容），第一次访问时读取"""
+        if self._body is None:
+            with open(self.path, 'rb') as f:
+                f.seek(self.body_offset)
+                self._body = f.read().decode('utf-8', errors='replace')
+        return self._body
+
+    def first_heading(self):
+        """逐行读取正文，返回第一个一级标题（找到即停止）"""
+        if self._body is not None:
+            lines = self._body.split('\n')
+        else:
+            lines = self._iter_body_lines()
+        for line in lines:
+            match = HEADING_RE.match(line)
+            if match:
+                return match.group(1)
+        return None
+
+    def _iter_body_lines(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.body_offset)
+            for raw in f:
+                yield raw.decode('utf-8', errors='replace').rstrip('\r\n')
+
+
+def read_page(path):
+    """读取页面的 front-matter（不读正文）"""
+    with open(path, 'rb') as f:
+        lines, offset = _read_block(f)
+    return Page(path, lines, offset)
+
+
+def read_frontmatter(path):
+    """只读取并解析 front-matter，没有时返回 None"""
+    return read_page(path).frontmatter
+
+
+def read_title(path):
+    """返回 front-matter 中的 title，缺失时取正文第一个一级标题"""
+    page = read_page(path)
+    title = (page.frontmatter or {}).get('title')
+    if title is not None and str(title).strip():
+        return str(title).strip()
+    return page.first_heading()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量修改 front-matter：声明式的修改操作，每个文件只读、解析、写一次
+
+    from frontmatter_edit import derive, insert_after, mutate_files, rename, set_key, unset
+
+    mutations = [
+        set_key('wiki', 'drugs'),                       # 修改原位置的值，缺少时追加到末尾
+        set_key('published', True, missing_only=True),  # 只在缺少时设置
+        unset('editor'),
+        insert_after('order', 3, 'title'),              # 放到 title 之后（已有的先移走；anchor=None 表示最前面）
+        rename('categories', 'category'),
+        derive('order', rp_number, after='title'),      # 由页面计算：func(page) -> 值（None 表示不修改）
+    ]
+    for path, changed, error in mutate_files(paths, mutations, jobs=0):
+        ...
+
+front-matter 按顶层键切分成条目（键所在行 + 缩进的列表项/子字段/注释），
+修改只替换涉及的条目，其余行（包括引号、注释和格式）原样保留，键的顺序不变。
+值与原有的值相同（按 frontmatter.parse_block 解析后比较）时不改写该行；
+整个文件没有变化时不写文件，不刷新修改时间。
+
+derive 的函数接收 {'path': 相对 source/ 的路径, 'frontmatter': 当前的字典, 'body': 正文}，
+DERIVERS 中是常用的几个（文件名、RP 编号、所在板块、第一个标题）。
+jobs > 1 时修改操作要传给工作进程，derive 的函数必须是模块级函数。
+
+    python3 tools/frontmatter_edit.py 'drugs/**/*.md' --set wiki=drugs --dry-run
+    python3 tools/frontmatter_edit.py 'reports/odw-reports/RP-*.md' --derive order=rp_number --after title
+    python3 tools/frontmatter_edit.py 'Others/*.md' --rename categories=category --unset editor -j 0
+"""
+import argparse
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from content_index import FRONTMATTER_RE, SOURCE_DIR
+from executor import add_jobs_argument, run_parallel
+from frontmatter import parse_block, parse_scalar
+from manifest import write_if_changed
+
+FIRST_HEADING_RE = re.compile(r'^#\s+(.+?)\s*$', re.MULTILINE)
+RP_NUMBER_RE = re.compile(r'^RP-(\d+)$')
+# 以这些字符开头，或含有 ': '、' #' 的字符串需要加引号
+YAML_SPECIAL = tuple('[]{}&*!|>\'"%@`#,?:-')
+
+
+def set_key(key, value, missing_only=False):
+    """设置键的值：已有的原位修改，缺少时追加到末尾"""
+    return {'op': 'set', 'key': key, 'value': value, 'missing_only': missing_only}
+
+
+def unset(key):
+    """删除键（连同它的列表项和子字段）"""
+    return {'op': 'unset', 'key': key}
+
+
+def insert_after(key, value, anchor=None):
+    """把键放到 anchor 之后（anchor 为 None 时放到最前面，anchor 不存在时追加到末尾）"""
+    return {'op': 'insert_after', 'key': key, 'value': value, 'anchor': anchor}
+
+
+def rename(old, new):
+    """改名，保留值和位置；新键已存在时不修改"""
+    return {'op': 'rename', 'key': old, 'new': new}
+
+
+def derive(key, func, after=None, missing_only=False):
+    """由页面计算值：func(page) -> 值，返回 None 时不修改；after 为缺少时插入的位置"""
+    return {'op': 'derive', 'key': key, 'func': func, 'after': after, 'missing_only': missing_only}
+
+
+def format_value(value):
+    """Python 值 -> YAML 标量"""
+    if value is None:
+        return ''
+    if value is True or value is False:
+        return 'true' if value else 'false'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value)
+    if (text != text.strip() or text.startswith(YAML_SPECIAL) or ': ' in text or ' #' in text
+            or parse_scalar(text) != text):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+def format_entry(key, value):
+    """键和值 -> front-matter 行（列表写成缩进的列表项）"""
+    if isinstance(value, (list, tuple)):
+        return [f'{key}:'] + [f'  - {format_value(item)}' for item in value]
+    return [f'{key}: {format_value(value)}'.rstrip()]
+
+
+def split_entries(block):
+    """front-matter 文本 -> [[键或 None, 行列表], ...]，缩进行、列表项和注释归入上一个键"""
+    entries = []
+    for line in block.split('\n'):
+        key, sep, _ = line.partition(':')
+        if sep and line[:1] not in ' \t-#' and line.strip():
+            entries.append([key.strip(), [line]])
+        elif entries:
+            entries[-1][1].append(line)
+        else:
+            entries.append([None, [line]])
+    return entries
+
+
+def entry_value(entry):
+    return parse_block(entry[1]).get(entry[0])
+
+
+def _find(entries, key):
+    return next((i for i, entry in enumerate(entries) if entry[0] == key), None)
+
+
+def _place(entries, key, value, after):
+    """缺少的键按 after 插入（None 追加到末尾，'' 放到最前面）"""
+    entry = [key, format_entry(key, value)]
+    if after is None:
+        entries.append(entry)
+        return
+    anchor = _find(entries, after) if after else -1
+    entries.insert(len(entries) if anchor is None else anchor + 1, entry)
+
+
+def apply_mutations(entries, mutations, page):
+    """就地修改条目列表，返回是否有变化"""
+    changed = False
+    for mutation in mutations:
+        op, key = mutation['op'], mutation['key']
+        index = _find(entries, key)
+        if op == 'unset':
+            if index is not None:
+                del entries[index]
+                changed = True
+        elif op == 'rename':
+            new = mutation['new']
+            if index is not None and _find(entries, new) is None:
+                first = entries[index][1][0]
+                entries[index] = [new, [new + first[first.index(':'):]] + entries[index][1][1:]]
+                changed = True
+        elif op == 'insert_after':
+            value, anchor = mutation['value'], mutation['anchor']
+            target = _find(entries, anchor) if anchor else -1
+            if index is not None and target is not None and index == target + 1 \
+                    and entry_value(entries[index]) == entry_value([key, format_entry(key, value)]):
+                continue
+            if index is not None:
+                del entries[index]
+            _place(entries, key, value, anchor or '')
+            changed = True
+        else:
+            if index is not None and mutation['missing_only']:
+                continue
+            if op == 'derive':
+                page['frontmatter'] = parse_block(line for entry in entries for line in entry[1])
+                value = mutation['func'](page)
+                if value is None:
+                    continue
+                after = mutation['after']
+            else:
+                value, after = mutation['value'], None
+            new_lines = format_entry(key, value)
+            if index is None:
+                _place(entries, key, value, after)
+                changed = True
+            elif entry_value(entries[index]) != entry_value([key, new_lines]):
+                entries[index] = [key, new_lines]
+                changed = True
+    return changed
+
+
+def mutate_text(text, mutations, rel='', create=False):
+    """
+    对一个文件的内容执行全部修改，返回新内容（没有变化时返回原内容）。
+    没有 front-matter 的文件在 create=True 时新建，否则不修改
+    """
+    match = FRONTMATTER_RE.match(text)
+    if match is None and not create:
+        return text
+    if match is None:
+        entries, body = [], text
+    else:
+        entries, body = split_entries(match.group(1)), text[match.end():]
+    page = {'path': rel, 'frontmatter': None, 'body': body}
+    if not apply_mutations(entries, mutations, page):
+        return text
+    block = '\n'.join(line for entry in entries for line in entry[1])
+    if match is None:
+        return f'---\n{block}\n---\n\n{text}'
+    start, end = match.span(1)
+    return text[:start] + block + text[end:]
+
+
+# 工作进程中的修改操作（由 initializer 设置）
+_mutations = None
+_options = {}
+
+
+def _init_worker(mutations, options):
+    global _mutations, _options
+    _mutations, _options = mutations, options
+
+
+def _relative(path, source_dir):
+    try:
+        return Path(path).resolve().relative_to(Path(source_dir).resolve()).as_posix()
+    except ValueError:
+        return Path(path).as_posix()
+
+
+def mutate_file(path):
+    """修改单个文件（在工作进程中运行），返回是否有变化（dry_run 时不写文件）"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        text = f.read()
+    rel = _relative(path, _options.get('source_dir', SOURCE_DIR))
+    new_text = mutate_text(text, _mutations, rel, _options.get('create', False))
+    if new_text == text:
+        return False
+    if not _options.get('dry_run'):
+        write_if_changed(path, new_text)
+    return True
+
+
+def mutate_files(paths, mutations, jobs=1, create=False, dry_run=False, source_dir=SOURCE_DIR):
+    """对每个文件执行全部修改，返回 [(路径, 是否有变化, 错误信息或 None), ...]"""
+    options = {'create': create, 'dry_run': dry_run, 'source_dir': str(source_dir)}
+    return run_parallel(mutate_file, paths, jobs, _init_worker, (mutations, options))
+
+
+def glob_pages(patterns, source_dir=SOURCE_DIR):
+    """相对 source/ 的通配符（支持 **）-> 排序去重后的文件列表"""
+    paths = set()
+    for pattern in patterns:
+        paths.update(path for path in Path(source_dir).glob(pattern) if path.is_file())
+    return sorted(paths)
+
+
+def stem(page):
+    """文件名（不含扩展名）"""
+    return Path(page['path']).stem
+
+
+def rp_number(page):
+    """RP-N 报告的编号"""
+    match = RP_NUMBER_RE.match(stem(page))
+    return int(match.group(1)) if match else None
+
+
+def section(page):
+    """所在板块（source/ 下的顶层目录）"""
+    return page['path'].split('/', 1)[0] if '/' in page['path'] else None
+
+
+def first_heading(page):
+    """正文中的第一个一级标题"""
+    match = FIRST_HEADING_RE.search(page['body'])
+    return match.group(1) if match else None
+
+
+DERIVERS = {
+    'stem': stem,
+    'rp_number': rp_number,
+    'section': section,
+    'heading': first_heading,
+}
+
+
+def _pair(text, parser, option):
+    key, sep, value = text.partition('=')
+    if not sep or not key:
+        parser.error(f'{option} 需要 KEY=VALUE 格式: {text!r}')
+    return key.strip(), value.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='批量修改 front-matter（每个文件一次读写）')
+    parser.add_argument('patterns', nargs='+', metavar='GLOB', help="相对 source/ 的通配符，如 'drugs/**/*.md'")
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE', help='设置键')
+    parser.add_argument('--default', action='append', default=[], metavar='KEY=VALUE',
+                        help='只在缺少时设置')
+    parser.add_argument('--unset', action='append', default=[], metavar='KEY', help='删除键')
+    parser.add_argument('--rename', action='append', default=[], metavar='OLD=NEW', help='改名')
+    parser.add_argument('--derive', action='append', default=[], metavar='KEY=FUNC',
+                        help=f"由路径计算（可选: {', '.join(DERIVERS)}）")
+    parser.add_argument('--after', metavar='KEY', help='--derive 的键缺少时插入到该键之后')
+    parser.add_argument('--create', action='store_true', help='为没有 front-matter 的文件新建')
+    parser.add_argument('--dry-run', action='store_true', help='只列出会被修改的文件')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    mutations = []
+    for text in args.set:
+        key, value = _pair(text, parser, '--set')
+        mutations.append(set_key(key, parse_scalar(value)))
+    for text in args.default:
+        key, value = _pair(text, parser, '--default')
+        mutations.append(set_key(key, parse_scalar(value), missing_only=True))
+    mutations.extend(unset(key) for key in args.unset)
+    for text in args.rename:
+        mutations.append(rename(*_pair(text, parser, '--rename')))
+    for text in args.derive:
+        key, name = _pair(text, parser, '--derive')
+        if name not in DERIVERS:
+            parser.error(f'未知的 --derive 函数: {name}')
+        mutations.append(derive(key, DERIVERS[name], after=args.after))
+    if not mutations:
+        parser.error('至少需要一个修改操作')
+
+    paths = glob_pages(args.patterns)
+    changed = 0
+    for path, result, error in mutate_files(paths, mutations, args.jobs, args.create, args.dry_run):
+        if error:
+            print(f"✗ {_relative(path, SOURCE_DIR)}: {error}")
+        elif result:
+            changed += 1
+            print(f"{'~' if args.dry_run else '✓'} {_relative(path, SOURCE_DIR)}")
+    action = '需要修改' if args.dry_run else '已修改'
+    print(f"✓ 匹配 {len(paths)} 个文件，{action} {changed} 个", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
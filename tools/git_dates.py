@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按 git 历史回填 front-matter 中的 date / updated
+
+一次流式读取 git log --name-status（不对每个文件单独运行 git log），
+从新到旧跟踪改名，得到 {source/ 下的当前路径: (首次提交时间, 最后提交时间)}：
+
+    times = commit_times()
+    times['drugs/安眠药/佐匹克隆.md']     # (1767225600, 1792300000)
+    times['drugs/index.md']                # (1767225600, None)：只有根提交
+
+修正规则：
+    date     缺失、无法解析，或晚于首次提交时间 -> 首次提交时间
+    updated  缺失、无法解析，或早于 date       -> max(date, 最后提交时间)（没有最后提交时间时为 date）
+
+已有且不早于 date 的 updated 不改动。根提交（整仓导入）只作为首次提交时间，不算作修改；.git-blame-ignore-revs 中列出的提交
+（批量格式化、回填本身）完全忽略。新写入的日期沿用页面原有的写法：以 Z 结尾的按 UTC
+写成 2024-01-30T11:16:42.000Z，其余按站点时区（_config.yml 的 timezone）写成 2024-01-30 19:16:42。
+只改写 front-matter 中的 date / updated 两行，所有页面在一个事务中一次写入。
+
+    python3 tools/git_dates.py --dry-run     # 只列出需要修正的页面
+    python3 tools/git_dates.py
+"""
+import argparse
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+from content_index import FRONTMATTER_RE, ROOT, SOURCE_DIR, load_index
+from frontmatter import parse_date
+from transaction import Transaction
+
+IGNORE_REVS = ROOT / '.git-blame-ignore-revs'
+# 与 _config.yml 的 timezone: Asia/Shanghai 一致
+SITE_TZ = timezone(timedelta(hours=8))
+UTC_FORMAT = '%Y-%m-%dT%H:%M:%S.000Z'
+LOCAL_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def ignored_revs(path=IGNORE_REVS):
+    """.git-blame-ignore-revs 中的完整提交哈希"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {line.strip() for line in f if line.strip() and not line.startswith('#')}
+    except OSError:
+        return set()
+
+
+def _tokens(stream, chunk_size=1 << 16):
+    """把 git log -z 的输出流按 NUL 切成字段，不把整个输出读入内存"""
+    pending = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        parts = (pending + chunk).split(b'\0')
+        pending = parts.pop()
+        for part in parts:
+            yield part.decode('utf-8', errors='surrogateescape').lstrip('\n')
+    if pending.strip():
+        yield pending.decode('utf-8', errors='surrogateescape').lstrip('\n')
+
+
+def commit_times(prefix='source', ignore=None):
+    """
+    一次 git log 得到 {prefix/ 下的当前相对路径: (首次提交时间, 最后提交时间)}（Unix 时间戳），
+    只被根提交修改过的文件最后提交时间为 None。
+    日志从新到旧：改名时把旧路径的历史并入新路径；删除后再出现的同名文件只算删除之后的历史
+    """
+    ignore = ignored_revs() if ignore is None else ignore
+    cmd = ['git', '-c', 'core.quotepath=off', 'log', '-z', '--name-status', '-M',
+           '--format=%x01%H %ct %P', '--', prefix]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    base = prefix.rstrip('/') + '/'
+    # 历史路径 -> 当前路径（None 表示该路径在更新的提交中已删除）
+    current = {}
+    times = {}
+    stamp, root, skip = 0, False, False
+
+    def touch(path):
+        path = current.get(path, path)
+        if path is None or not path.startswith(base):
+            return
+        first, last = times.get(path, (stamp, None))
+        if not root:
+            last = stamp if last is None else max(last, stamp)
+        times[path] = (min(first, stamp), last)
+
+    tokens = _tokens(proc.stdout)
+    for token in tokens:
+        if token.startswith('\x01'):
+            sha, ct, *parents = token[1:].split()
+            stamp, root, skip = int(ct), not parents, sha in ignore
+            continue
+        status = token[:1]
+        if status and status in 'RC':
+            old, new = next(tokens), next(tokens)
+            if skip:
+                continue
+            touch(new)
+            if status == 'R':
+                current[old] = current.get(new, new)
+        elif status:
+            path = next(tokens)
+            if skip:
+                continue
+            if status == 'D':
+                current.setdefault(path, None)
+            else:
+                touch(path)
+    proc.wait()
+    if proc.returncode:
+        raise RuntimeError(f'git log 失败（退出码 {proc.returncode}）')
+    return {path[len(base):]: (first, last) for path, (first, last) in times.items()}
+
+
+def format_date(stamp, like=None):
+    """时间戳 -> front-matter 日期，沿用 like（原有的值）的写法"""
+    if isinstance(like, str) and like.strip().endswith('Z'):
+        return datetime.fromtimestamp(stamp, timezone.utc).strftime(UTC_FORMAT)
+    return datetime.fromtimestamp(stamp, SITE_TZ).strftime(LOCAL_FORMAT)
+
+
+def page_date(value):
+    """front-matter 日期 -> datetime；与 Hexo 一致，没有时区的按站点时区解释"""
+    parsed = parse_date(value)
+    if parsed is None or not isinstance(value, str):
+        return parsed
+    text = value.strip()
+    if not (text.endswith('Z') or '+' in text[10:] or '-' in text[10:]):
+        parsed = parsed.replace(tzinfo=SITE_TZ)
+    return parsed
+
+
+def corrected_dates(frontmatter, first, last):
+    """按修正规则返回需要改写的 {键: 新值}"""
+    changes = {}
+    date_value = frontmatter.get('date')
+    date = page_date(date_value)
+    if date is None or date.timestamp() > first:
+        changes['date'] = format_date(first, date_value or frontmatter.get('updated'))
+        date = datetime.fromtimestamp(first, timezone.utc)
+    updated_value = frontmatter.get('updated')
+    updated = page_date(updated_value)
+    if updated is None or updated < date:
+        stamp = date.timestamp() if last is None else max(date.timestamp(), last)
+        changes['updated'] = format_date(stamp, updated_value or date_value)
+    return changes
+
+
+def rewrite_dates(text, changes):
+    """只替换 front-matter 中的 date / updated 行，缺少的键追加到末尾；没有 front-matter 返回 None"""
+    match = FRONTMATTER_RE.match(text)
+    if match is None:
+        return None
+    lines = match.group(1).split('\n')
+    pending = dict(changes)
+    for i, line in enumerate(lines):
+        key, sep, _ = line.partition(':')
+        if sep and line[:1] not in ' \t' and key.strip() in pending:
+            lines[i] = f'{key.strip()}: {pending.pop(key.strip())}'
+    lines.extend(f'{key}: {value}' for key, value in pending.items())
+    start, end = match.span(1)
+    return text[:start] + '\n'.join(lines) + text[end:]
+
+
+def plan(index, times):
+    """[(路径, {键: (旧值, 新值)}), ...]：内容索引中有 git 历史且需要修正的页面"""
+    fixes = []
+    for rel in sorted(index):
+        page = index[rel]
+        if not rel.endswith('.md') or page['frontmatter'] is None or rel not in times:
+            continue
+        changes = corrected_dates(page['frontmatter'], *times[rel])
+        if changes:
+            fixes.append((rel, {key: (page['frontmatter'].get(key), value)
+                                for key, value in changes.items()}))
+    return fixes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按 git 历史回填 front-matter 中的 date / updated')
+    parser.add_argument('--dry-run', action='store_true', help='只列出需要修正的页面，不写文件')
+    parser.add_argument('-v', '--verbose', action='store_true', help='列出每个页面的新旧值')
+    args = parser.parse_args()
+
+    times = commit_times()
+    fixes = plan(load_index(), times)
+    print(f"✓ git 历史: {len(times)} 个文件，需要修正: {len(fixes)} 个页面", file=sys.stderr)
+    if args.dry_run or args.verbose:
+        for rel, changes in fixes:
+            print(rel)
+            for key, (old, new) in changes.items():
+                print(f"  {key}: {old!r} -> {new}")
+    if args.dry_run or not fixes:
+        return
+
+    written = 0
+    with Transaction() as tx:
+        for rel, changes in fixes:
+            path = SOURCE_DIR / rel
+            text = rewrite_dates(tx.read_text(path), {key: new for key, (_, new) in changes.items()})
+            if text is not None:
+                tx.write_text(path, text)
+                written += 1
+    print(f"✓ 已修正 {written} 个页面")
+
+
+if __name__ == '__main__':
+    main()
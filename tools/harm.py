@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+药物危害等级（星级）评估
+
+等级数据保存在 source/_data/harm.yml（关键词表 + 分类默认值），
+页面 front-matter 中的 harm: N 优先于推断结果。
+
+所有关键词编译成一个正则（link_rewriter.build_pattern 的前缀树），
+标题和文件名各扫描一遍即可找出全部关键词，不再按等级逐个做子串查找。
+每个关键词预先取它自身及其所有前缀关键词中的最高等级，
+所以同一位置只看最长匹配就与“任一关键词命中取最高等级”的结果一致。
+
+评估结果缓存在内容索引的页面记录中（page['harm']），并记录数据表的哈希：
+页面或数据表没有变化时直接复用，生成 索引.md 只需遍历一遍页面。
+
+    table = load_table()
+    level = page_harm(page, table)       # 整数等级
+    stars(level)                         # '★★★'
+"""
+import argparse
+import hashlib
+import posixpath
+import re
+from pathlib import Path
+
+from content_index import SOURCE_DIR, iter_pages, load_index, save_index
+from frontmatter import parse_block
+from link_rewriter import build_pattern
+
+TABLE_PATH = SOURCE_DIR / '_data' / 'harm.yml'
+DRUGS_PREFIX = 'drugs/'
+
+
+def load_table(path=TABLE_PATH):
+    """
+    读取并编译等级数据表，返回
+    {'digest', 'regex', 'levels': {关键词: 等级}, 'categories': {目录: 等级}, 'default'}
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    data = parse_block(raw.decode('utf-8').split('\n'))
+
+    keywords = {}
+    for key, words in data.items():
+        if not (isinstance(key, str) and key.isdigit() and isinstance(words, list)):
+            continue
+        for word in words:
+            word = str(word)
+            keywords[word] = max(keywords.get(word, 0), int(key))
+
+    # 同一位置正则只给出最长匹配，因此把前缀关键词的等级并入更长的关键词
+    levels = {word: max(level for prefix, level in keywords.items() if word.startswith(prefix))
+              for word in keywords}
+    pattern = build_pattern(levels)
+    categories = {str(k).strip('/'): int(v) for k, v in (data.get('categories') or {}).items()}
+    return {
+        'digest': hashlib.blake2b(raw, digest_size=8).hexdigest(),
+        'regex': re.compile(f'(?=({pattern}))') if pattern else None,
+        'levels': levels,
+        'categories': categories,
+        'default': int(data.get('default') or 2),
+    }
+
+
+def infer_level(table, *texts):
+    """在文本中查找关键词，返回匹配到的最高等级（没有匹配返回 None）"""
+    if table['regex'] is None:
+        return None
+    found = None
+    for text in texts:
+        for match in table['regex'].finditer(text):
+            level = table['levels'][match.group(1)]
+            if found is None or level > found:
+                found = level
+    return found
+
+
+def category_level(table, rel):
+    """按页面所在分类目录（最长前缀）取等级"""
+    directory = posixpath.dirname(rel[len(DRUGS_PREFIX):] if rel.startswith(DRUGS_PREFIX) else rel)
+    while directory:
+        if directory in table['categories']:
+            return table['categories'][directory]
+        directory = posixpath.dirname(directory)
+    return table['default']
+
+
+def assess(page, table):
+    """不使用缓存，直接评估页面的等级"""
+    explicit = (page['frontmatter'] or {}).get('harm')
+    if isinstance(explicit, int) and not isinstance(explicit, bool):
+        return explicit
+    name = Path(page['path']).stem
+    level = infer_level(table, str(page.get('title') or ''), name)
+    return level if level is not None else category_level(table, page['path'])
+
+
+def page_harm(page, table):
+    """返回页面的等级，优先使用索引记录中的缓存结果"""
+    memo = page.get('harm')
+    if memo and memo[0] == table['digest']:
+        return memo[1]
+    level = assess(page, table)
+    page['harm'] = [table['digest'], level]
+    return level
+
+
+def rate_pages(index, table=None, prefix=DRUGS_PREFIX, save=True):
+    """
+    评估 prefix 下所有页面，返回 {页面路径: 等级}；
+    有新的评估结果时把缓存写回内容索引
+    """
+    table = table or load_table()
+    ratings = {}
+    computed = 0
+    for page in iter_pages(index, prefix):
+        memo = page.get('harm')
+        if not (memo and memo[0] == table['digest']):
+            computed += 1
+        ratings[page['path']] = page_harm(page, table)
+    if computed and save:
+        save_index(index)
+    return ratings
+
+
+def stars(level):
+    return '★' * level
+
+
+def main():
+    parser = argparse.ArgumentParser(description='评估药物页面的危害等级')
+    parser.add_argument('paths', nargs='*', help='只显示这些页面（相对 source/ 的路径）')
+    args = parser.parse_args()
+
+    ratings = rate_pages(load_index())
+    for rel, level in ratings.items():
+        if not args.paths or rel in args.paths:
+            print(f"{stars(level):<6} {rel}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量导入社区报告到 source/reports/odw-reports
+
+外部目录（默认 RP/）中的报告只导入新增和修改过的：
+    - 文件状态记录在 .cache/manifest/import_reports.json（大小、修改时间、内容哈希），
+      没有变化的文件不再读取
+    - 每个来源文件导入到哪个 RP-N（或被判定为哪个报告的重复）记录在 .cache/report_imports.json，
+      来源文件修改后更新原来的 RP-N，不会再导入一份
+    - 导入前与现有报告和本批中已接受的报告比较：
+        完全重复   正文规范化（去掉空白、标点、RP 编号，统一小写）后的哈希相同
+        近似重复   字符 5-gram 的 Jaccard 相似度或被包含比例 ≥ --threshold（默认 0.8），
+                   通过倒排表只与有共同 5-gram 的报告比较
+      重复的报告不导入，只列出
+    - 解析和计算指纹在进程池中并行（--jobs），新文件按 convert_rp_v2 的格式补齐 front-matter、
+      设置 order，在一个事务中写入，最后用 misc/update_tree.py 登记到 reports.yml
+
+来源文件名为 RP-N.md 且 RP-N 未被占用时沿用编号，否则使用下一个空闲编号。
+
+    python3 tools/import_reports.py --src ~/safeoverwiki/RP --dry-run
+    python3 tools/import_reports.py --src ~/safeoverwiki/RP -j 0
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from content_index import CACHE_DIR, ROOT, SOURCE_DIR, split_frontmatter
+from executor import add_jobs_argument, atomic_write, run_parallel
+from frontmatter_edit import insert_after, mutate_text
+from manifest import filter_changed, load_manifest, save_manifest, update_manifest
+from misc.convert_rp_v2 import MUTATIONS as REPORT_MUTATIONS
+from misc.update_tree import update_reports_tree
+from transaction import Transaction
+
+REPORTS_DIR = SOURCE_DIR / 'reports'
+TARGET_DIR = REPORTS_DIR / 'odw-reports'
+RECORD_PATH = CACHE_DIR / 'report_imports.json'
+RECORD_VERSION = 1
+MANIFEST_NAME = 'import_reports'
+REPORT_RE = re.compile(r'^RP-(\d+)\.md$')
+
+SHINGLE_SIZE = 5
+# 只保留哈希值能被 SAMPLE 整除的 5-gram：所有报告用同一个条件抽样，抽样后的集合仍可相互比较
+# （片段的抽样集合是完整报告抽样集合的子集），相似度的估计不变，倒排表和比较量约为 1/SAMPLE
+SAMPLE = 4
+THRESHOLD = 0.8
+# 出现在超过这么多报告中的 5-gram 不用于找候选；每个报告最多精确比较的候选数
+COMMON_POSTINGS = 32
+CANDIDATES = 8
+# 规范化时去掉的内容：RP 编号、空白和标点（保留汉字、字母和数字）
+RP_NUMBER_RE = re.compile(r'RP-?\d+(?:-\d+)?', re.IGNORECASE)
+NOISE_RE = re.compile(r'[\W_]+')
+
+
+def normalize(body):
+    """正文 -> 用于比较的文本"""
+    return NOISE_RE.sub('', RP_NUMBER_RE.sub('', body)).lower()
+
+
+def shingles(text, size=SHINGLE_SIZE, sample=SAMPLE):
+    """字符 size-gram 的稳定哈希集合（按 sample 抽样，sample=1 不抽样；文本过短时整段作为一个）"""
+    if len(text) < size:
+        return {zlib.crc32(text.encode('utf-8'))} if text else set()
+    # UTF-32 每个字符 4 字节，按字节切片即可得到字符 n-gram，不用逐个编码
+    data = text.encode('utf-32-le')
+    width = size * 4
+    hashes = map(zlib.crc32, [data[i:i + width] for i in range(0, len(data) - width + 4, 4)])
+    return {h for h in hashes if h % sample == 0}
+
+
+def fingerprint(path):
+    """读取一个报告，返回 {'text', 'body_hash', 'shingles'}（在工作进程中运行）"""
+    text = Path(path).read_text(encoding='utf-8')
+    _, body = split_frontmatter(text)
+    normalized = normalize(body)
+    return {
+        'text': text,
+        'body_hash': hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest(),
+        'shingles': shingles(normalized),
+    }
+
+
+class Corpus:
+    """
+    已有报告的指纹：正文哈希表 + 5-gram 倒排表。
+    找候选时跳过出现在很多报告中的常见 5-gram（模板、套话），
+    按共同的罕见 5-gram 数量取前几个候选，再用集合交集计算准确的相似度
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.shingles = {}
+        self.postings = {}
+
+    def add(self, name, fp):
+        self.hashes.setdefault(fp['body_hash'], name)
+        self.shingles[name] = fp['shingles']
+        for h in fp['shingles']:
+            self.postings.setdefault(h, []).append(name)
+
+    def duplicate_of(self, fp, threshold=THRESHOLD, exclude=None):
+        """返回 (重复的报告, 相似度) 或 None；完全重复时相似度为 None"""
+        exact = self.hashes.get(fp['body_hash'])
+        if exact is not None and exact != exclude:
+            return exact, None
+        current = fp['shingles']
+        if not current:
+            return None
+        shared = Counter()
+        for h in current:
+            names = self.postings.get(h)
+            if names and len(names) <= COMMON_POSTINGS:
+                shared.update(names)
+        best = None
+        for name, _ in shared.most_common(CANDIDATES + 1):
+            if name == exclude:
+                continue
+            other = self.shingles[name]
+            inter = len(current & other)
+            score = max(inter / (len(current) + len(other) - inter), inter / len(current))
+            if score >= threshold and (best is None or score > best[1]):
+                best = (name, score)
+        return best
+
+
+def load_record(path=RECORD_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get('sources', {}) if data.get('version') == RECORD_VERSION else {}
+
+
+def save_record(sources, path=RECORD_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps({'version': RECORD_VERSION, 'sources': sources},
+                                  ensure_ascii=False, sort_keys=True, separators=(',', ':')))
+
+
+def source_key(path):
+    """导入记录中的键：相对仓库根目录的 posix 路径（仓库外的用绝对路径）"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def report_sort_key(path):
+    """RP-N 按编号排序，其他文件排在后面按名称排序"""
+    number = report_number(path.name)
+    return (number is None, number or 0, path.name)
+
+
+def report_number(name):
+    match = REPORT_RE.match(name)
+    return int(match.group(1)) if match else None
+
+
+def plan_imports(incoming, corpus, sources, taken, threshold=THRESHOLD):
+    """
+    按来源文件名顺序决定每个报告的去向，返回 [(来源, 动作, 目标或重复的报告, 相似度), ...]，
+    动作为 'new'、'update' 或 'duplicate'。接受的报告随即加入 corpus，本批内的重复也能发现
+    """
+    plan = []
+    next_number = max((report_number(name) or 0 for name in taken), default=0) + 1
+    for path, fp in incoming:
+        previous = sources.get(source_key(path), {}).get('target')
+        if previous and previous in taken:
+            match = corpus.duplicate_of(fp, threshold, exclude=previous)
+            if match:
+                plan.append((path, 'duplicate', match[0], match[1]))
+            else:
+                plan.append((path, 'update', previous, None))
+            continue
+        match = corpus.duplicate_of(fp, threshold)
+        if match:
+            plan.append((path, 'duplicate', match[0], match[1]))
+            continue
+        number = report_number(path.name)
+        if number is None or path.name in taken:
+            number = next_number
+        next_number = max(next_number, number + 1)
+        target = f'RP-{number}.md'
+        taken.add(target)
+        corpus.add(target, fp)
+        plan.append((path, 'new', target, None))
+    return plan
+
+
+def convert(text, target):
+    """按 odw-reports 的格式补齐 front-matter，order 为 RP 编号"""
+    mutations = REPORT_MUTATIONS + [insert_after('order', report_number(target), 'title')]
+    return mutate_text(text, mutations, f'reports/odw-reports/{target}', create=True)
+
+
+def fingerprint_all(paths, jobs):
+    """并行计算指纹，返回 ([(路径, 指纹), ...], [(路径, 错误), ...])"""
+    done, errors = [], []
+    for path, fp, error in run_parallel(fingerprint, paths, jobs):
+        if error:
+            errors.append((path, error))
+        else:
+            done.append((path, fp))
+    return done, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description='增量导入社区报告到 source/reports/odw-reports')
+    parser.add_argument('--src', default=str(ROOT / 'RP'), help='待导入的报告目录（默认 RP/）')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'近似重复的相似度阈值（默认 {THRESHOLD}）')
+    parser.add_argument('--all', action='store_true', help='忽略导入记录，重新检查所有来源文件')
+    parser.add_argument('--dry-run', action='store_true', help='只显示导入计划，不写文件')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    src = Path(args.src)
+    if not src.is_dir():
+        print(f"✗ 目录不存在: {src}")
+        sys.exit(1)
+    start = time.perf_counter()
+    manifest = {} if args.all else load_manifest(MANIFEST_NAME)
+    sources = load_record()
+    candidates = filter_changed(sorted(src.glob('*.md'), key=report_sort_key), manifest)
+    if not candidates:
+        print("✓ 没有新增或修改的报告")
+        return
+
+    existing = sorted(TARGET_DIR.glob('RP-*.md'), key=report_sort_key)
+    fingerprints, errors = fingerprint_all(existing + candidates, args.jobs)
+    for path, error in errors:
+        print(f"✗ {path}: {error}")
+    corpus = Corpus()
+    incoming = []
+    existing_set = set(existing)
+    for path, fp in fingerprints:
+        if path in existing_set:
+            corpus.add(path.name, fp)
+        else:
+            incoming.append((path, fp))
+
+    taken = {path.name for path in existing}
+    plan = plan_imports(incoming, corpus, sources, taken, args.threshold)
+    texts = dict(incoming)
+    writes = {}
+    for path, action, target, score in plan:
+        if action == 'duplicate':
+            kind = '完全重复' if score is None else f'近似重复 {score:.2f}'
+            print(f"~ {path.name}: 与 {target} {kind}，跳过")
+            sources[source_key(path)] = {'duplicate_of': target}
+            continue
+        content = convert(texts[path]['text'], target)
+        if action == 'update' and (TARGET_DIR / target).read_text(encoding='utf-8') == content:
+            continue
+        writes[TARGET_DIR / target] = content
+        sources[source_key(path)] = {'target': target}
+        print(f"{'+' if action == 'new' else '✓'} {path.name} -> {target}")
+
+    counts = Counter(action for _, action, _, _ in plan)
+    print(f"✓ 检查 {len(incoming)} 个报告：新增 {counts['new']}，更新 {counts['update']}，"
+          f"重复 {counts['duplicate']}（{time.perf_counter() - start:.2f} 秒）", file=sys.stderr)
+    if args.dry_run:
+        return
+
+    if writes:
+        with Transaction() as tx:
+            for path, content in writes.items():
+                tx.write_text(path, content)
+        written, _ = update_reports_tree(REPORTS_DIR, SOURCE_DIR / '_data' / 'wiki' / 'reports.yml')
+        print("✓ 已更新 reports.yml" if written else "  reports.yml 无变化")
+    failed = {path for path, _ in errors}
+    update_manifest(manifest, [path for path in candidates if path not in failed])
+    save_manifest(MANIFEST_NAME, manifest)
+    save_record(sources)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+站内链接图：记录哪些页面链接到哪些页面，并缓存到磁盘
+
+边的来源：
+    - Markdown 链接、HTML href、自动链接（取自内容索引）
+    - /drugs/... 等站内绝对路径和相对路径
+    - https://psydrugs.org/... 完整网址（百分号编码的中文路径会先解码）
+    - source/_data/wiki/*.yml 中 tree: 下的条目（相对 base_dir 的 slug）
+
+节点是相对 source/ 的文件路径，例如 'drugs/止痛药/吗啡.md'，
+wiki 配置文件记为 '_data/wiki/drugs.yml'。
+
+    graph = load_graph()
+    backlinks(graph, 'drugs/止痛药/吗啡.md')     # 引用该页面的文件
+    files_referencing(graph, 'drugs/止痛药')     # 引用该目录下任意页面的文件
+
+改名脚本只需要改写 files_referencing() 返回的文件，不必扫描整个 source/。
+页面记录沿用内容索引的 (size, mtime)，未变化的页面直接复用缓存中的出边。
+"""
+import argparse
+import json
+import os
+import posixpath
+import re
+import time
+from pathlib import Path
+from urllib.parse import unquote
+
+from content_index import CACHE_DIR, ROOT, SOURCE_DIR, load_index
+from link_rewriter import build_pattern
+
+GRAPH_PATH = CACHE_DIR / 'link_graph.json'
+GRAPH_VERSION = 1
+WIKI_DIR = SOURCE_DIR / '_data' / 'wiki'
+
+SITE_RE = re.compile(r'^https?://(?:www\.)?psydrugs\.org(?=[/?#]|$)', re.IGNORECASE)
+SCHEME_RE = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*:')
+TREE_ITEM_RE = re.compile(r'^\s*-\s+(.+?)\s*$')
+BASE_DIR_RE = re.compile(r'^base_dir:\s*(.+?)\s*$')
+
+
+def url_to_path(url, src=''):
+    """
+    将链接转换为站内路径（相对站点根目录、已解码、无锚点和查询参数）。
+    外部链接、mailto: 等以及页内锚点返回 None。
+    src 为链接所在文件（相对 source/），用于解析相对链接。
+    """
+    url = url.strip()
+    site = SITE_RE.match(url)
+    if site:
+        url = url[site.end():] or '/'
+    if not url or url.startswith('#'):
+        return None
+    if url.startswith('//') or SCHEME_RE.match(url):
+        return None
+    path = unquote(url.split('#', 1)[0].split('?', 1)[0])
+    if not path.startswith('/'):
+        path = posixpath.join('/' + posixpath.dirname(src), path)
+    path = posixpath.normpath(path)
+    return path.strip('/') if path != '/' else ''
+
+
+def resolve_path(path, pages):
+    """
+    将站内路径匹配到 source/ 下的文件，依次尝试：
+    原路径、去掉 .html 后的 .md、补 .md/.html、目录下的 index.md/index.html。
+    找不到返回 None
+    """
+    candidates = [path] if path else []
+    stem = path[:-len('.html')] if path.endswith('.html') else path
+    if stem:
+        candidates += [stem + '.md', stem + '.html']
+    prefix = stem + '/' if stem else ''
+    candidates += [prefix + 'index.md', prefix + 'index.html']
+    for candidate in candidates:
+        if candidate in pages:
+            return candidate
+    return None
+
+
+def resolve_link(url, src, pages):
+    """解析一条链接，返回目标文件（相对 source/）或 None"""
+    path = url_to_path(url, src)
+    if path is None:
+        return None
+    return resolve_path(path, pages)
+
+
+def read_wiki_tree(yml_path):
+    """
+    读取 wiki 配置中的 base_dir 和 tree: 条目，
+    返回 (base_dir, [(行号, slug), ...])。只识别行首顶层键与缩进的列表项
+    """
+    base_dir = '/'
+    entries = []
+    in_tree = False
+    with open(yml_path, 'r', encoding='utf-8') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+            if line and not line[0].isspace() and not line.startswith('#'):
+                in_tree = line.startswith('tree:')
+                match = BASE_DIR_RE.match(line)
+                if match:
+                    base_dir = match.group(1).strip('\'"')
+                continue
+            if not in_tree:
+                continue
+            match = TREE_ITEM_RE.match(line)
+            if match:
+                entries.append((lineno, match.group(1).strip('\'"')))
+    return base_dir, entries
+
+
+def tree_slug_to_path(base_dir, slug):
+    """将 tree 条目转换为站内路径（'/' 表示 base_dir 本身）"""
+    if slug == '/':
+        return url_to_path(base_dir)
+    return url_to_path(posixpath.join(base_dir, slug))
+
+
+def wiki_files(wiki_dir=WIKI_DIR):
+    """所有 wiki 配置文件"""
+    return sorted(Path(wiki_dir).glob('*.yml'))
+
+
+def page_edges(page, pages):
+    """单个页面的出边：{目标文件: [原始链接, ...]}"""
+    edges = {}
+    for url in page['links']:
+        target = resolve_link(url, page['path'], pages)
+        if target and target != page['path']:
+            edges.setdefault(target, []).append(url)
+    return edges
+
+
+def wiki_edges(yml_path, pages):
+    """wiki 配置文件的出边：{目标文件: [tree 条目, ...]}"""
+    base_dir, entries = read_wiki_tree(yml_path)
+    edges = {}
+    for _, slug in entries:
+        target = resolve_path(tree_slug_to_path(base_dir, slug), pages)
+        if target:
+            edges.setdefault(target, []).append(slug)
+    return edges
+
+
+def invert(forward):
+    """由出边计算入边：{目标文件: [来源文件, ...]}"""
+    backward = {}
+    for src in sorted(forward):
+        for target in forward[src]:
+            backward.setdefault(target, []).append(src)
+    return backward
+
+
+def build_graph(index, previous=None, source_dir=SOURCE_DIR):
+    """
+    构建链接图。previous 为旧图时，页面集合不变且页面记录未变化的来源
+    直接复用旧出边（页面集合变化会影响链接能否解析，此时全部重新解析）。
+    返回 (graph, 重新解析的来源数)
+    """
+    previous = previous or {}
+    pages = set(index)
+    reuse = previous.get('pages') == sorted(pages)
+    old_stamps = previous.get('stamps', {}) if reuse else {}
+    old_forward = previous.get('forward', {}) if reuse else {}
+
+    stamps = {}
+    forward = {}
+    resolved = 0
+    sources = [(rel, page, [page['size'], page['mtime']]) for rel, page in index.items()]
+    for yml_path in wiki_files(Path(source_dir) / '_data' / 'wiki'):
+        stat = yml_path.stat()
+        rel = yml_path.relative_to(source_dir).as_posix()
+        sources.append((rel, yml_path, [stat.st_size, stat.st_mtime]))
+
+    for rel, source, stamp in sources:
+        stamps[rel] = stamp
+        if old_stamps.get(rel) == stamp:
+            edges = old_forward.get(rel, {})
+        elif isinstance(source, Path):
+            edges = wiki_edges(source, pages)
+            resolved += 1
+        else:
+            edges = page_edges(source, pages)
+            resolved += 1
+        if edges:
+            forward[rel] = edges
+
+    graph = {
+        'pages': sorted(pages),
+        'stamps': stamps,
+        'forward': forward,
+        'backward': invert(forward),
+    }
+    return graph, resolved
+
+
+def read_graph(graph_path=GRAPH_PATH, source_dir=SOURCE_DIR):
+    """读取磁盘缓存；版本或 source 目录不匹配时返回空字典"""
+    try:
+        with open(graph_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != GRAPH_VERSION or data.get('source') != str(source_dir):
+        return {}
+    return data.get('graph', {})
+
+
+def save_graph(graph, graph_path=GRAPH_PATH, source_dir=SOURCE_DIR):
+    """将链接图写入磁盘（临时文件 + 替换）"""
+    graph_path = Path(graph_path)
+    graph_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = graph_path.with_name(graph_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': GRAPH_VERSION, 'source': str(source_dir), 'graph': graph},
+                  f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, graph_path)
+
+
+def load_graph(index=None, source_dir=SOURCE_DIR, graph_path=GRAPH_PATH, rebuild=False):
+    """加载链接图：基于内容索引增量更新，有变化时写回缓存"""
+    source_dir = Path(source_dir)
+    if index is None:
+        index = load_index(source_dir)
+    previous = {} if rebuild else read_graph(graph_path, source_dir)
+    graph, resolved = build_graph(index, previous, source_dir)
+    if resolved or graph['stamps'] != previous.get('stamps'):
+        save_graph(graph, graph_path, source_dir)
+    return graph
+
+
+def backlinks(graph, target):
+    """引用 target（相对 source/ 的文件路径）的来源文件"""
+    return list(graph['backward'].get(target, []))
+
+
+def files_referencing(graph, *prefixes):
+    """
+    引用 prefixes 对应页面或其目录下任意页面的来源文件，
+    prefix 可以带或不带扩展名，例如 'drugs/止痛药/吗啡' 或 'drugs/止痛药'。
+    多个 prefix 编译成一个正则，只遍历一次反向链接表
+    """
+    stems = {re.sub(r'\.(?:md|html)$', '', prefix.rstrip('/')) for prefix in prefixes}
+    pattern = build_pattern(stems)
+    if not pattern:
+        return []
+    regex = re.compile(f'(?:{pattern})(?:\\.(?:md|html))?(?:/|$)')
+    found = set()
+    for target, sources in graph['backward'].items():
+        if regex.match(target):
+            found.update(sources)
+    return sorted(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='构建站内链接图并查询反向链接')
+    parser.add_argument('--rebuild', action='store_true', help='忽略缓存，完整重建')
+    parser.add_argument('--backlinks', metavar='PATH',
+                        help="列出引用该页面或目录的文件，例如 drugs/止痛药/吗啡")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = load_graph(rebuild=args.rebuild)
+    elapsed = time.perf_counter() - start
+
+    if args.backlinks:
+        for src in files_referencing(graph, args.backlinks):
+            print(src)
+        return
+
+    edges = sum(len(targets) for targets in graph['forward'].values())
+    print(f"✓ 来源文件数: {len(graph['forward'])}")
+    print(f"✓ 被引用页面数: {len(graph['backward'])}")
+    print(f"✓ 边数: {edges}")
+    print(f"✓ 耗时: {elapsed * 1000:.1f} ms")
+    print(f"  缓存位置: {GRAPH_PATH.relative_to(ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
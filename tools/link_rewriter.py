@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多模式链接改写引擎
+
+把所有 旧→新 映射编译成一个正则：映射键先构造成前缀树（trie），
+再展开为嵌套的分组表达式，同一位置上的候选键共享前缀、首字符互斥，
+所以每个文件只需线性扫描一遍，且总是优先匹配最长的键。
+
+用法：
+    rewrite = compile_rewriter([
+        # (前置上下文, 映射表, 后置上下文（只做断言，不消耗）, 替换格式)
+        (r'\\]\\(/drugs/', {'DXM': '解离剂/右美沙芬_愈美片'}, r'[/)]', '{before}{new}'),
+    ])
+    new_text, count = rewrite(text)
+
+替换格式可以是字符串（可用 {before}、{old}、{new}），也可以是
+callable(before, old, new) -> str。默认保留前置上下文，只替换键本身。
+
+rewrite_file() 默认只把 md_links 切分出的链接片段（行内链接、引用定义、自动链接、href）
+交给改写函数，代码块、{% note %}/{% quot %} 标签和正文中的文字不会被改写；
+规则的前置上下文因此只能依赖链接片段本身（例如 [text](/drugs/）。
+"""
+import re
+
+from executor import atomic_write
+from md_links import cached_spans, patch_spans
+
+DEFAULT_FORMAT = '{before}{new}'
+
+
+def build_trie(keys):
+    """将所有键构造成字符前缀树，'' 标记一个键的结尾"""
+    trie = {}
+    for key in keys:
+        if not key:
+            continue
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    return trie
+
+
+def trie_to_regex(node):
+    """
+    将前缀树展开为正则。分支按字符排序，结尾标记对应可选分组，
+    由于 ? 是贪婪的，同一位置会先尝试更长的键，失败后再回退到较短的键。
+    """
+    alternatives = [re.escape(ch) + trie_to_regex(child)
+                    for ch, child in sorted(node.items()) if ch]
+    if not alternatives:
+        return ''
+    is_end = '' in node
+    if len(alternatives) == 1 and not is_end:
+        return alternatives[0]
+    return '(?:' + '|'.join(alternatives) + ')' + ('?' if is_end else '')
+
+
+def build_pattern(keys):
+    """返回匹配任意一个键的正则（最长匹配优先）"""
+    return trie_to_regex(build_trie(keys))
+
+
+def compile_rewriter(rules, flags=0):
+    """
+    将多组规则编译成单个正则，返回 rewrite(text) -> (new_text, count)。
+
+    rules: [(before, mapping, after, fmt), ...]，fmt 可省略。
+    多组规则按顺序组成一个分支表达式，同一位置靠前的规则优先。
+    """
+    parts = []
+    compiled_rules = []
+    for i, rule in enumerate(rules):
+        before, mapping, after = rule[:3]
+        fmt = rule[3] if len(rule) > 3 else DEFAULT_FORMAT
+        keys_pattern = build_pattern(mapping)
+        if not keys_pattern:
+            continue
+        part = f'(?P<b{i}>{before})(?P<k{i}>{keys_pattern})'
+        if after:
+            part += f'(?={after})'
+        parts.append(part)
+        compiled_rules.append((i, mapping, fmt))
+
+    if not parts:
+        return lambda text: (text, 0)
+
+    regex = re.compile('|'.join(parts), flags)
+
+    def replace(match):
+        for i, mapping, fmt in compiled_rules:
+            old = match.group(f'k{i}')
+            if old is None:
+                continue
+            before = match.group(f'b{i}')
+            new = mapping[old]
+            if callable(fmt):
+                return fmt(before, old, new)
+            return fmt.format(before=before, old=old, new=new)
+        return match.group(0)
+
+    def rewrite(text):
+        return regex.subn(replace, text)
+
+    return rewrite
+
+
+def rewrite_file(path, rewrite, links_only=True):
+    """
+    用编译好的改写器处理单个文件，内容有变化时才写回，返回替换次数。
+    links_only=False 时改写整个文件（规则针对的不是链接时使用）
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if links_only:
+        spans = cached_spans(data)
+        if not spans:
+            return 0
+        new_data, count = patch_spans(data, spans, rewrite)
+    else:
+        content = data.decode('utf-8')
+        new_content, count = rewrite(content)
+        new_data = new_content.encode('utf-8')
+    if new_data != data:
+        atomic_write(path, new_data)
+        return count
+    return 0
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量处理清单：记录每个文件的 (mtime, size, blake2 哈希)
+
+每个工具各有一份清单（.cache/manifest/<工具名>.json），记录它上次处理后
+文件的状态。--changed-only 模式下只处理清单之后有变化的文件：
+大小和修改时间都没变的直接跳过；变了再比较哈希，内容没变的也跳过。
+
+write_if_changed() 在输出与原内容相同时不写文件，避免无意义地刷新 mtime
+（否则 hexo generate 会重新渲染没有改动的页面）。
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from content_index import CACHE_DIR, ROOT
+from executor import atomic_write
+
+MANIFEST_DIR = CACHE_DIR / 'manifest'
+MANIFEST_VERSION = 1
+
+
+def file_hash(path):
+    """计算文件内容的 blake2b 哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_path(name):
+    """返回指定工具的清单文件路径"""
+    return MANIFEST_DIR / f'{name}.json'
+
+
+def load_manifest(name):
+    """读取工具清单，不存在或版本不匹配时返回空字典"""
+    try:
+        with open(manifest_path(name), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data.get('files', {})
+
+
+def save_manifest(name, manifest):
+    """写回工具清单（临时文件 + 替换）"""
+    path = manifest_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': manifest},
+                  f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _key(path):
+    """清单中的键：相对仓库根目录的 posix 路径"""
+    path = Path(path).resolve()
+    try:
+        return path.relative_to(ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def file_state(path):
+    """返回文件当前的 [mtime, size, hash]"""
+    stat = os.stat(path)
+    return [stat.st_mtime, stat.st_size, file_hash(path)]
+
+
+def is_dirty(path, manifest):
+    """判断文件相对清单是否有变化；只是 mtime 变了而内容没变时顺便更新清单"""
+    entry = manifest.get(_key(path))
+    if not entry:
+        return True
+    stat = os.stat(path)
+    mtime, size, digest = entry
+    if stat.st_mtime == mtime and stat.st_size == size:
+        return False
+    if stat.st_size != size or file_hash(path) != digest:
+        return True
+    entry[0] = stat.st_mtime
+    return False
+
+
+def filter_changed(paths, manifest):
+    """从 paths 中筛选出有变化的文件，保持原顺序"""
+    return [path for path in paths if is_dirty(path, manifest)]
+
+
+def update_manifest(manifest, paths):
+    """记录文件处理后的状态，已删除的文件从清单中移除"""
+    for path in paths:
+        if os.path.exists(path):
+            manifest[_key(path)] = file_state(path)
+        else:
+            manifest.pop(_key(path), None)
+
+
+def write_if_changed(path, content, encoding='utf-8'):
+    """仅在内容不同的时候写文件，返回是否写入"""
+    try:
+        with open(path, 'r', encoding=encoding) as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    atomic_write(path, content, encoding)
+    return True
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Markdown 链接切分：记录每个链接在文件中的字节偏移，按文件内容哈希缓存
+
+一个正则从头到尾扫描一遍正文，按出现位置依次识别：
+    跳过    front-matter、代码块（``` / ~~~）、行内代码、HTML 注释、
+            {% note ... %} / {% quot ... %} 标签（到第一个 %} 为止）
+    link    行内链接和图片 [text](url "title")、![alt](src)
+    ref     引用定义 [label]: url
+    auto    自动链接 <https://...>
+    href    HTML 属性 href="..."
+每个链接记录为 [类型, 起点, 终点, 网址起点, 网址终点]（相对文件开头的字节偏移）。
+
+链接改写器（link_rewriter.rewrite_file）只把这些片段交给改写函数，
+正文、代码块和提示框中的文字不会被误改，没有链接的文件不做任何正则替换。
+
+切分结果按内容的 blake2b 哈希缓存在 .cache/md_links/ 下（每个哈希一个小文件，
+多个工作进程同时写入也不冲突），内容没变的文件不再扫描：
+
+    spans = file_spans(path)                # [[kind, start, end, url_start, url_end], ...]
+    data, count = patch_spans(data, spans, rewrite)
+
+    python3 tools/md_links.py source/drugs/索引.md   # 列出文件中的链接
+    python3 tools/md_links.py --prune                # 删除不再对应任何页面的缓存
+"""
+import argparse
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+
+from content_index import CACHE_DIR, SOURCE_DIR, iter_pages, load_index
+from executor import atomic_write
+
+SPANS_DIR = CACHE_DIR / 'md_links'
+SPANS_VERSION = 1
+
+FRONTMATTER_RE = re.compile(rb'\A---[ \t]*\r?\n.*?\n---[ \t]*(?:\r?\n|\Z)', re.DOTALL)
+TOKEN_RE = re.compile(rb'''
+    (?P<fence>^[ \t]*(?P<mark>```|~~~)[^\n]*\n.*?(?:^[ \t]*(?P=mark)[^\n]*$|\Z))
+  | (?P<tag>\{%[ \t]*(?:note|quot)\b.*?%\})
+  | (?P<comment><!--.*?(?:-->|\Z))
+  | (?P<code>`+[^`\n]+`+)
+  | (?P<link>!?\[(?:[^\[\]\n]|\[[^\[\]\n]*\])*\]\([ \t]*
+        (?P<link_url><[^>\n]*>|(?:[^()\s]|\([^()\s]*\))+)
+        (?:[ \t]+(?:"[^"\n]*"|'[^'\n]*'))?[ \t]*\))
+  | (?P<ref>^[ ]{0,3}\[[^\]\n]+\]:[ \t]*(?P<ref_url><[^>\n]*>|\S+))
+  | (?P<auto><(?P<auto_url>(?:https?|mailto):[^>\s]+)>)
+  | (?P<href>\bhref[ \t]*=[ \t]*(?:"(?P<href_dq>[^"]*)"|'(?P<href_sq>[^']*)'))
+''', re.VERBOSE | re.MULTILINE | re.DOTALL)
+URL_GROUPS = {
+    'link': ('link_url',),
+    'ref': ('ref_url',),
+    'auto': ('auto_url',),
+    'href': ('href_dq', 'href_sq'),
+}
+
+
+def content_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def scan(data):
+    """切分 bytes 内容，返回 [[类型, 起点, 终点, 网址起点, 网址终点], ...]"""
+    match = FRONTMATTER_RE.match(data)
+    pos = match.end() if match else 0
+    spans = []
+    for match in TOKEN_RE.finditer(data, pos):
+        kind = match.lastgroup
+        if kind not in URL_GROUPS:
+            continue
+        group = next(name for name in URL_GROUPS[kind] if match.group(name) is not None)
+        url_start, url_end = match.span(group)
+        if data[url_start:url_start + 1] == b'<' and kind != 'auto':
+            url_start, url_end = url_start + 1, url_end - 1
+        spans.append([kind, match.start(), match.end(), url_start, url_end])
+    return spans
+
+
+def span_cache_path(digest):
+    return SPANS_DIR / digest[:2] / f'{digest}.json'
+
+
+def cached_spans(data, digest=None):
+    """按内容哈希读取切分结果，没有缓存时扫描并写入缓存"""
+    digest = digest or content_hash(data)
+    path = span_cache_path(digest)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('version') == SPANS_VERSION:
+            return cached['spans']
+    except (OSError, ValueError):
+        pass
+    spans = scan(data)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps({'version': SPANS_VERSION, 'spans': spans},
+                                  separators=(',', ':')))
+    return spans
+
+
+def file_spans(path):
+    """读取文件并返回其中的链接片段"""
+    with open(path, 'rb') as f:
+        return cached_spans(f.read())
+
+
+def patch_spans(data, spans, rewrite):
+    """
+    只对链接片段调用 rewrite(text) -> (new_text, count)，拼接出新内容。
+    返回 (新的 bytes, 替换次数)；没有替换时原样返回 data
+    """
+    parts = []
+    total = 0
+    last = 0
+    for _, start, end, _, _ in spans:
+        text = data[start:end].decode('utf-8', errors='surrogateescape')
+        new_text, count = rewrite(text)
+        if count and new_text != text:
+            parts.append(data[last:start])
+            parts.append(new_text.encode('utf-8', errors='surrogateescape'))
+            last = end
+            total += count
+    if last == 0:
+        return data, 0
+    parts.append(data[last:])
+    return b''.join(parts), total
+
+
+def prune_cache(index=None, source_dir=SOURCE_DIR):
+    """删除不对应任何现有页面内容的缓存文件，返回删除的数量"""
+    index = index if index is not None else load_index()
+    live = set()
+    for page in iter_pages(index):
+        try:
+            live.add(content_hash((Path(source_dir) / page['path']).read_bytes()))
+        except OSError:
+            continue
+    removed = 0
+    for path in SPANS_DIR.glob('*/*.json'):
+        if path.stem not in live:
+            path.unlink()
+            removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='列出 Markdown 文件中的链接片段（带字节偏移）')
+    parser.add_argument('files', nargs='*', help='要切分的文件')
+    parser.add_argument('--prune', action='store_true', help='删除不再对应任何页面的缓存')
+    args = parser.parse_args()
+    if not args.files and not args.prune:
+        parser.error('需要指定文件或 --prune')
+
+    for name in args.files:
+        with open(name, 'rb') as f:
+            data = f.read()
+        for kind, start, end, url_start, url_end in cached_spans(data):
+            url = data[url_start:url_end].decode('utf-8', errors='replace')
+            print(f"{name}:{start}-{end}: {kind} {url}")
+    if args.prune:
+        print(f"✓ 删除缓存 {prune_cache()} 个", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
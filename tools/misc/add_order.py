@@ -1,61 +1,70 @@
 #!/usr/bin/env python3
+import argparse
 import os
 import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from content_index import SOURCE_DIR
+from frontmatter_edit import insert_after, mutate_text
+from manifest import filter_changed, load_manifest, save_manifest, update_manifest, write_if_changed
+
+MANIFEST_NAME = 'add_order'
 
 def add_order_to_frontmatter(content, order_num):
-    # 提取原始 front-matter
-    match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', content, re.DOTALL)
-    if not match:
-        return content
-    
-    frontmatter = match.group(1)
-    body = match.group(2)
-    
-    # 如果已经有 order 字段，先移除
-    frontmatter = re.sub(r'order:.*\n', '', frontmatter)
-    
-    # 在 title 后面添加 order 字段
-    lines = frontmatter.split('\n')
-    new_lines = []
-    for line in lines:
-        new_lines.append(line)
-        if line.startswith('title:'):
-            new_lines.append(f'order: {order_num}')
-    
-    new_frontmatter = '\n'.join(new_lines)
-    
-    return f'---\n{new_frontmatter}\n---\n{body}'
-
-# 处理所有 RP 文件
-reports_dir = '/home/krvy/safeoverwiki/source/reports'
-count = 0
-
-# 获取所有 RP 文件并按数字排序
-rp_files = []
-for filename in os.listdir(reports_dir):
-    if filename.startswith('RP-') and filename.endswith('.md'):
-        # 提取数字
-        num_match = re.search(r'RP-(\d+)\.md', filename)
-        if num_match:
-            num = int(num_match.group(1))
-            rp_files.append((num, filename))
-
-# 按数字排序
-rp_files.sort(key=lambda x: x[0])
-
-# 处理文件
-for num, filename in rp_files:
-    filepath = os.path.join(reports_dir, filename)
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    new_content = add_order_to_frontmatter(content, num)
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(new_content)
-    
-    count += 1
-    if count <= 5 or count % 20 == 0:
-        print(f'已处理: {filename} (order: {num})')
-
-print(f'\n完成！共处理 {count} 个文件')
+    # order 紧跟在 title 之后（已有的 order 先移走），其余键和顺序不变
+    return mutate_text(content, [insert_after('order', order_num, 'title')])
+
+def main():
+    parser = argparse.ArgumentParser(description='为 RP 报告的 front-matter 添加 order 字段')
+    parser.add_argument('--dir', default=str(SOURCE_DIR / 'reports' / 'odw-reports'),
+                        help='RP 文件所在目录')
+    parser.add_argument('--changed-only', action='store_true', help='只处理上次运行后有变化的文件')
+    args = parser.parse_args()
+
+    # 处理所有 RP 文件
+    reports_dir = args.dir
+    count = 0
+    written = 0
+
+    # 获取所有 RP 文件并按数字排序
+    rp_files = []
+    for filename in os.listdir(reports_dir):
+        if filename.startswith('RP-') and filename.endswith('.md'):
+            # 提取数字
+            num_match = re.search(r'RP-(\d+)\.md', filename)
+            if num_match:
+                num = int(num_match.group(1))
+                rp_files.append((num, filename))
+
+    # 按数字排序
+    rp_files.sort(key=lambda x: x[0])
+
+    manifest = load_manifest(MANIFEST_NAME)
+    if args.changed_only:
+        changed = set(filter_changed([os.path.join(reports_dir, f) for _, f in rp_files], manifest))
+        rp_files = [(num, f) for num, f in rp_files if os.path.join(reports_dir, f) in changed]
+
+    # 处理文件
+    for num, filename in rp_files:
+        filepath = os.path.join(reports_dir, filename)
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        new_content = add_order_to_frontmatter(content, num)
+
+        # 内容没变时不写文件，避免刷新 mtime
+        if write_if_changed(filepath, new_content):
+            written += 1
+
+        count += 1
+        if count <= 5 or count % 20 == 0:
+            print(f'已处理: {filename} (order: {num})')
+
+    update_manifest(manifest, [os.path.join(reports_dir, f) for _, f in rp_files])
+    save_manifest(MANIFEST_NAME, manifest)
+    print(f'\n完成！共处理 {count} 个文件，写入 {written} 个')
+
+if __name__ == '__main__':
+    main()
@@ -1,59 +1,75 @@
 #!/usr/bin/env python3
+import argparse
 import os
-import re
+import sys
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from content_index import ROOT
+from frontmatter_edit import derive, insert_after, mutate_text, set_key, stem
+from manifest import filter_changed, load_manifest, save_manifest, update_manifest, write_if_changed
+
+MANIFEST_NAME = 'convert_rp_v2'
+
+def _now(page):
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _date(page):
+    return page['frontmatter'].get('date')
+
+
+# 按 reports 目录的格式补齐 front-matter：已有的 title/date/updated 保留，其余键统一设置
+MUTATIONS = [
+    insert_after('layout', 'page'),
+    derive('title', stem, after='layout', missing_only=True),
+    derive('date', _now, after='title', missing_only=True),
+    derive('updated', _date, after='date', missing_only=True),
+    set_key('categories', ['报告']),
+    set_key('tags', ['案例分析', '用户报告']),
+    set_key('menu_id', 'reports'),
+    set_key('wiki', 'reports'),
+]
 
 def convert_frontmatter(content, filename):
-    # 提取原始 front-matter
-    match = re.match(r'^---\s*\n(.*?)\n---\s*\n(.*)$', content, re.DOTALL)
-    if not match:
-        return content
-    
-    frontmatter = match.group(1)
-    body = match.group(2)
-    
-    # 解析字段
-    title = re.search(r'title:\s*(.+)', frontmatter)
-    date = re.search(r'date:\s*(.+)', frontmatter)
-    updated = re.search(r'updated:\s*(.+)', frontmatter)
-    
-    title_text = title.group(1).strip() if title else filename.replace('.md', '')
-    date_text = date.group(1).strip() if date else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    updated_text = updated.group(1).strip() if updated else date_text
-    
-    # 构建新的 front-matter - 模仿 reports 目录格式
-    new_frontmatter = f'''---
-layout: page
-title: {title_text}
-date: {date_text}
-updated: {updated_text}
-categories: [报告]
-tags:
-  - 案例分析
-  - 用户报告
-menu_id: reports
-wiki: reports
----
-'''
-    
-    return new_frontmatter + '\n' + body
-
-# 处理所有 RP 文件
-rp_dir = '/home/krvy/safeoverwiki/RP'
-count = 0
-for filename in sorted(os.listdir(rp_dir)):
-    if filename.endswith('.md'):
-        filepath = os.path.join(rp_dir, filename)
+    return mutate_text(content, MUTATIONS, filename)
+
+def main():
+    parser = argparse.ArgumentParser(description='将 RP 报告转换为 reports 目录格式')
+    parser.add_argument('--dir', default=str(ROOT / 'RP'), help='待转换的 RP 目录')
+    parser.add_argument('--changed-only', action='store_true', help='只处理上次运行后有变化的文件')
+    args = parser.parse_args()
+
+    # 处理所有 RP 文件
+    rp_dir = args.dir
+    count = 0
+    written = 0
+    filepaths = [os.path.join(rp_dir, filename)
+                 for filename in sorted(os.listdir(rp_dir)) if filename.endswith('.md')]
+
+    manifest = load_manifest(MANIFEST_NAME)
+    if args.changed_only:
+        filepaths = filter_changed(filepaths, manifest)
+
+    for filepath in filepaths:
+        filename = os.path.basename(filepath)
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
-        
+
         new_content = convert_frontmatter(content, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        
+
+        # 内容没变时不写文件，避免刷新 mtime
+        if write_if_changed(filepath, new_content):
+            written += 1
+
         count += 1
         if count <= 5 or count % 20 == 0:  # 只显示前5个和每20个
             print(f'已转换: {filename}')
 
-print(f'\n转换完成！共处理 {count} 个文件')
+    update_manifest(manifest, filepaths)
+    save_manifest(MANIFEST_NAME, manifest)
+    print(f'\n转换完成！共处理 {count} 个文件，写入 {written} 个')
+
+if __name__ == '__main__':
+    main()
@@ -1,44 +1,232 @@
 #!/usr/bin/env python3
+"""
+更新 reports.yml 中各报告目录的 RP 条目
+
+source/reports/ 下每个子目录（odw-reports、pdw-reports …）的 RP-N.md 按编号排序，
+已排序的编号列表保存在 .cache/reports_tree.json 中：
+    - 新增的报告用二分查找插入，删除的报告用二分查找定位后移除，不再每次全部重新排序
+    - 没有报告增删且 reports.yml 未被修改时直接跳过，不读写 YAML
+    - 需要更新时一次流式读写 reports.yml：每组中的 RP 条目按顺序整体替换，
+      其他条目（index 等）、组名和 tree 之外的配置原样保留；
+      还没有对应分组的目录在 tree: 末尾新建一组
+    - 结果与原文件相同时丢弃临时文件，不改动 reports.yml
+编号支持拆分后的子页面（RP-7-1 排在 RP-7 之后、RP-8 之前）。
+"""
+import argparse
+import bisect
+import json
 import os
 import re
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from content_index import CACHE_DIR, SOURCE_DIR
+from frontmatter import read_title
+from wiki_tree import ENTRY_RE, GROUP_RE, TOP_KEY_RE, natural_key
+
+CACHE_PATH = CACHE_DIR / 'reports_tree.json'
+CACHE_VERSION = 1
+RP_RE = re.compile(r'^RP-(\d+(?:-\d+)*)\.md$')
+
+
+def scan_reports(reports_dir):
+    """列出每个报告子目录中的 RP 文件名（不含 .md）"""
+    found = {}
+    for entry in sorted(os.scandir(reports_dir), key=lambda e: e.name):
+        if not entry.is_dir() or entry.name.startswith(('.', '_')):
+            continue
+        found[entry.name] = {name[:-len('.md')] for name in os.listdir(entry.path) if RP_RE.match(name)}
+    return found
+
+
+def load_cache(reports_dir, cache_path=CACHE_PATH, rebuild=False):
+    """读取已排序的编号列表，不存在、版本或报告目录不匹配时返回空"""
+    source = str(Path(reports_dir).resolve())
+    empty = {'source': source, 'yml': None, 'dirs': {}}
+    if rebuild:
+        return empty
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if data.get('version') != CACHE_VERSION or data.get('source') != source:
+        return empty
+    return data
+
+
+def save_cache(cache, cache_path=CACHE_PATH):
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(cache, version=CACHE_VERSION), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, cache_path)
+
+
+def sync_sorted(names, current):
+    """
+    将已排序的 names 同步为 current 集合：删除和插入都用二分查找定位。
+    返回 (新增, 删除)
+    """
+    keys = [natural_key(name) for name in names]
+    known = set(names)
+    removed = sorted(known - current, key=natural_key)
+    added = sorted(current - known, key=natural_key)
+    for name in removed:
+        i = bisect.bisect_left(keys, natural_key(name))
+        while names[i] != name:
+            i += 1
+        del keys[i], names[i]
+    for name in added:
+        key = natural_key(name)
+        i = bisect.bisect_right(keys, key)
+        keys.insert(i, key)
+        names.insert(i, name)
+    return added, removed
+
+
+def stream_tree(lines, dirs, reports_dir):
+    """
+    逐行生成新的 reports.yml：遇到某目录的第一个 RP 条目时输出该目录全部已排序条目，
+    其余旧 RP 条目跳过；分组结束时补上组内还没有 RP 条目的目录；
+    tree: 结束时为没有分组的目录新建分组
+    """
+    in_tree = False
+    emitted = set()
+    group_dirs = []
+    quote = "'"
+    group_indent = '  '
+    entry_indent = '    '
+
+    def entries(directory, indent):
+        emitted.add(directory)
+        for name in dirs[directory]:
+            yield f'{indent}- {directory}/{name}\n'
+
+    def close_group():
+        for directory in group_dirs:
+            if directory not in emitted:
+                yield from entries(directory, entry_indent)
+        group_dirs.clear()
+
+    def new_groups():
+        for directory in dirs:
+            if directory in emitted or not dirs[directory]:
+                continue
+            title = read_title(Path(reports_dir) / directory / 'index.md') \
+                if (Path(reports_dir) / directory / 'index.md').exists() else None
+            title = (title or directory).replace(quote, '') if quote else (title or directory)
+            yield f'{group_indent}{quote}{title}{quote}:\n'
+            if (Path(reports_dir) / directory / 'index.md').exists():
+                yield f'{entry_indent}- {directory}/index\n'
+            yield from entries(directory, entry_indent)
+
+    for line in lines:
+        if TOP_KEY_RE.match(line):
+            if in_tree:
+                yield from close_group()
+                yield from new_groups()
+            in_tree = line.startswith('tree:')
+            yield line
+            continue
+        if not in_tree:
+            yield line
+            continue
+        entry = ENTRY_RE.match(line.rstrip('\n'))
+        if entry:
+            entry_indent = entry.group(1)
+            directory, _, name = entry.group(2).strip('\'"').partition('/')
+            if directory in dirs and RP_RE.match(name + '.md'):
+                if directory not in emitted:
+                    yield from entries(directory, entry_indent)
+                continue
+            if directory in dirs and directory not in group_dirs:
+                group_dirs.append(directory)
+            yield line
+            continue
+        group = GROUP_RE.match(line.rstrip('\n'))
+        if group:
+            yield from close_group()
+            group_indent, quote = group.group(1), group.group(2)
+        yield line
+    if in_tree:
+        yield from close_group()
+        yield from new_groups()
+
+
+def write_streaming(path, lines):
+    """
+    一次流式写出到同目录的临时文件，同时与原文件逐行比较；
+    内容相同时丢弃临时文件，不同则 fsync 后原子替换。返回是否写入
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    changed = False
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as out, open(path, 'r', encoding='utf-8') as old:
+            for line in lines:
+                out.write(line)
+                if not changed and old.readline() != line:
+                    changed = True
+            if old.readline():
+                changed = True
+            if changed:
+                out.flush()
+                os.fsync(out.fileno())
+        if changed:
+            os.chmod(tmp_path, path.stat().st_mode & 0o7777)
+            os.replace(tmp_path, path)
+            return True
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return False
+
+
+def update_reports_tree(reports_dir, yml_path, cache_path=CACHE_PATH, rebuild=False):
+    """同步编号列表并在需要时更新 reports.yml，返回 (是否写入, {目录: (新增, 删除)})"""
+    cache = load_cache(reports_dir, cache_path, rebuild)
+    changes = {}
+    for directory, current in scan_reports(reports_dir).items():
+        names = cache['dirs'].setdefault(directory, [])
+        added, removed = sync_sorted(names, current)
+        if added or removed:
+            changes[directory] = (added, removed)
+    for directory in list(cache['dirs']):
+        if not os.path.isdir(os.path.join(reports_dir, directory)):
+            del cache['dirs'][directory]
+
+    stat = os.stat(yml_path)
+    stamp = [stat.st_size, stat.st_mtime]
+    written = False
+    if changes or cache['yml'] != stamp:
+        with open(yml_path, 'r', encoding='utf-8') as f:
+            written = write_streaming(yml_path, stream_tree(f, cache['dirs'], reports_dir))
+        stat = os.stat(yml_path)
+        cache['yml'] = [stat.st_size, stat.st_mtime]
+    save_cache(cache, cache_path)
+    return written, changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按编号更新 reports.yml 中的 RP 条目')
+    parser.add_argument('--reports-dir', default=str(SOURCE_DIR / 'reports'), help='报告根目录')
+    parser.add_argument('--yml', default=str(SOURCE_DIR / '_data' / 'wiki' / 'reports.yml'),
+                        help='reports.yml 路径')
+    parser.add_argument('--rebuild', action='store_true', help='忽略缓存，重新排序全部编号')
+    args = parser.parse_args()
+
+    written, changes = update_reports_tree(args.reports_dir, args.yml, rebuild=args.rebuild)
+    for directory, (added, removed) in changes.items():
+        print(f'{directory}: 新增 {len(added)}，删除 {len(removed)}')
+        for name in added[:5]:
+            print(f'  + {name}')
+        for name in removed[:5]:
+            print(f'  - {name}')
+    print('已更新 reports.yml' if written else 'reports.yml 无变化')
 
-# 获取所有 RP 文件并按数字排序
-reports_dir = '/home/krvy/safeoverwiki/source/reports'
-rp_files = []
-
-for filename in os.listdir(reports_dir):
-    if filename.startswith('RP-') and filename.endswith('.md'):
-        # 提取数字
-        num_match = re.search(r'RP-(\d+)\.md', filename)
-        if num_match:
-            num = int(num_match.group(1))
-            # 转换为路径格式（去掉 .md）
-            path = filename.replace('.md', '')
-            rp_files.append((num, path))
-
-# 按数字排序
-rp_files.sort(key=lambda x: x[0])
-
-# 生成 tree 列表
-tree_items = ['  - emergency-overdose-treatment', '  - survivor-stories']
-for num, path in rp_files:
-    tree_items.append(f'  - {path}')
-
-tree_section = 'tree:\n' + '\n'.join(tree_items)
-
-# 读取现有的 reports.yml
-reports_yml_path = '/home/krvy/safeoverwiki/source/_data/wiki/reports.yml'
-with open(reports_yml_path, 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# 替换 tree 部分
-content = re.sub(r'tree:.*$', tree_section.rstrip(), content, flags=re.MULTILINE | re.DOTALL)
-
-# 写回文件
-with open(reports_yml_path, 'w', encoding='utf-8') as f:
-    f.write(content)
-
-print(f'已更新 reports.yml，包含 {len(rp_files)} 个 RP 文件')
-print('前 5 个文件:')
-for i in range(min(5, len(rp_files))):
-    print(f'  - {rp_files[i][1]}')
+if __name__ == '__main__':
+    main()
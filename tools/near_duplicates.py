@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近似重复检测：MinHash 签名 + LSH 分段，找出内容相近的报告和药物页面
+
+两两比较 N 个页面需要 N² 次，几千个页面以上就跑不动。这里每个页面只算一次签名：
+    1. 正文规范化后切成字符 5-gram（与 import_reports.py 相同），得到哈希集合
+    2. 单次置换 MinHash（one permutation hashing）：每个 5-gram 只做一次哈希，
+       按哈希值分到 BANDS × ROWS 个桶里各取最小值，空桶从右侧最近的非空桶借值（旋转补齐）；
+       两个签名相同位置相等的比例是 Jaccard 相似度的估计
+    3. LSH：签名分成 BANDS 段，每段 ROWS 个值，任一段完全相同的页面成为候选对；
+       Jaccard 为 s 的两个页面成为候选的概率是 1 - (1 - s^ROWS)^BANDS（默认 24 × 5，s=0.8 时 > 99.9%）
+    4. 候选对按签名估计的相似度过滤（--threshold），用并查集合并成重复簇
+总耗时与页面数近似线性。
+
+签名保存在 .cache/minhash.json（按页面的大小和修改时间判断是否失效），
+再次运行只为新增和修改过的页面计算签名；--changed 只列出包含这些页面的簇，
+--check 把任意文件（例如待导入的报告）与已有页面比较，不写入签名。
+
+    python3 tools/near_duplicates.py                         # reports 和 drugs
+    python3 tools/near_duplicates.py drugs --threshold 0.9
+    python3 tools/near_duplicates.py --changed               # 只看新增/修改页面所在的簇
+    python3 tools/near_duplicates.py --check ~/RP/RP-900.md
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from content_index import CACHE_DIR, SOURCE_DIR, iter_pages, load_index, split_frontmatter
+from executor import add_jobs_argument, atomic_write, run_parallel
+from import_reports import normalize, shingles
+
+SIGNATURES_PATH = CACHE_DIR / 'minhash.json'
+SIGNATURES_VERSION = 1
+SECTIONS = ('reports', 'drugs')
+BANDS = 24
+ROWS = 5
+THRESHOLD = 0.8
+# 5-gram 少于这个数的页面（"Your content here" 之类的占位页）太短，估计值不可靠，不参与比较
+MIN_SHINGLES = 32
+# 2^61 - 1（梅森素数）上的仿射哈希 (A * x + B) mod P，参数固定，签名可以跨运行比较
+PRIME = (1 << 61) - 1
+HASH_A = 0x1F3D5B79A2C4E6F1 % PRIME
+HASH_B = 0x2B7E151628AED2A6 % PRIME
+
+
+def minhash(hashes, size=BANDS * ROWS):
+    """5-gram 哈希集合 -> 长度为 size 的签名（集合为空时返回 None）"""
+    if not hashes:
+        return None
+    empty = PRIME
+    sig = [empty] * size
+    for h in hashes:
+        value = (HASH_A * h + HASH_B) % PRIME
+        slot = value % size
+        value //= size
+        if value < sig[slot]:
+            sig[slot] = value
+    # 空桶借用右侧最近的非空桶，加上距离的偏移，借来的值不会与原生的值相等
+    offset = PRIME // size + 1
+    original = sig[:]
+    for slot in range(size):
+        if original[slot] == empty:
+            distance = 1
+            while original[(slot + distance) % size] == empty:
+                distance += 1
+            sig[slot] = original[(slot + distance) % size] + distance * offset
+    return sig
+
+
+def similarity(a, b):
+    """签名估计的 Jaccard 相似度"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def page_signature(path):
+    """读取页面，返回正文的签名（在工作进程中运行；正文太短时返回 None）"""
+    text = Path(path).read_text(encoding='utf-8', errors='replace')
+    _, body = split_frontmatter(text)
+    hashes = shingles(normalize(body), sample=1)
+    return minhash(hashes) if len(hashes) >= MIN_SHINGLES else None
+
+
+def load_signatures(path=SIGNATURES_PATH):
+    """读取签名缓存，版本或分段参数不匹配时返回空字典"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != SIGNATURES_VERSION or data.get('size') != BANDS * ROWS:
+        return {}
+    return data.get('pages', {})
+
+
+def save_signatures(pages, path=SIGNATURES_PATH):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    atomic_write(path, json.dumps({'version': SIGNATURES_VERSION, 'size': BANDS * ROWS, 'pages': pages},
+                                  ensure_ascii=False, separators=(',', ':')))
+
+
+def update_signatures(index, sections=SECTIONS, jobs=1, cached=None):
+    """
+    为各板块的页面计算签名，返回 ({路径: {'size', 'mtime', 'sig'}}, 重新计算过的路径集合)。
+    大小和修改时间与缓存相同的页面直接沿用
+    """
+    cached = load_signatures() if cached is None else cached
+    pages = {}
+    stale = []
+    for section in sections:
+        for page in iter_pages(index, section + '/'):
+            rel = page['path']
+            old = cached.get(rel)
+            if old and old['size'] == page['size'] and old['mtime'] == page['mtime']:
+                pages[rel] = old
+            else:
+                stale.append(rel)
+    for rel, sig, error in run_parallel(page_signature, [SOURCE_DIR / rel for rel in stale], jobs):
+        rel = rel.relative_to(SOURCE_DIR).as_posix()
+        if error:
+            print(f"✗ {rel}: {error}", file=sys.stderr)
+            continue
+        pages[rel] = {'size': index[rel]['size'], 'mtime': index[rel]['mtime'], 'sig': sig}
+    return pages, set(stale)
+
+
+def band_keys(sig, bands=BANDS, rows=ROWS):
+    return [(band, tuple(sig[band * rows:(band + 1) * rows])) for band in range(bands)]
+
+
+def candidate_pairs(signatures, bands=BANDS, rows=ROWS):
+    """LSH：任一段完全相同的页面对，返回 {(路径, 路径), ...}"""
+    buckets = {}
+    for rel, sig in signatures.items():
+        for key in band_keys(sig, bands, rows):
+            buckets.setdefault(key, []).append(rel)
+    pairs = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        members.sort()
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                pairs.add((a, b))
+    return pairs
+
+
+def clusters(signatures, threshold=THRESHOLD):
+    """
+    返回 [[(路径, 与簇中其他页面的最高相似度), ...], ...]，按簇的大小和路径排序。
+    候选对按签名相似度过滤后用并查集合并
+    """
+    parent = {}
+
+    def find(rel):
+        while parent.get(rel, rel) != rel:
+            parent[rel] = parent.get(parent[rel], parent[rel])
+            rel = parent[rel]
+        return rel
+
+    linked = set()
+    for a, b in candidate_pairs(signatures):
+        if similarity(signatures[a], signatures[b]) >= threshold:
+            linked.update((a, b))
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups = {}
+    for rel in linked:
+        groups.setdefault(find(rel), []).append(rel)
+    result = []
+    for members in groups.values():
+        members.sort()
+        result.append([(rel, max(similarity(signatures[rel], signatures[other])
+                                 for other in members if other != rel)) for rel in members])
+    result.sort(key=lambda cluster: (-len(cluster), cluster[0][0]))
+    return result
+
+
+def check_files(paths, signatures, threshold=THRESHOLD):
+    """把文件与已有页面比较，返回 {文件: [(路径, 相似度), ...]}（只比较 LSH 候选）"""
+    buckets = {}
+    for rel, sig in signatures.items():
+        for key in band_keys(sig):
+            buckets.setdefault(key, []).append(rel)
+    results = {}
+    for path in paths:
+        sig = page_signature(path)
+        matches = set()
+        if sig is not None:
+            for key in band_keys(sig):
+                matches.update(buckets.get(key, ()))
+        scored = [(rel, similarity(sig, signatures[rel])) for rel in matches]
+        results[path] = sorted(((rel, score) for rel, score in scored if score >= threshold),
+                               key=lambda item: (-item[1], item[0]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='用 MinHash + LSH 找出内容相近的报告和药物页面')
+    parser.add_argument('sections', nargs='*', metavar='SECTION',
+                        help=f"检查的板块（默认 {' '.join(SECTIONS)}）")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help=f'相似度阈值（默认 {THRESHOLD}）')
+    parser.add_argument('--changed', action='store_true', help='只列出包含新增或修改页面的簇')
+    parser.add_argument('--check', nargs='+', metavar='FILE', help='把这些文件与已有页面比较')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sections = args.sections or SECTIONS
+    index = load_index()
+    cached = load_signatures()
+    pages, stale = update_signatures(index, sections, args.jobs, cached)
+    # 其他板块的签名保留，已删除页面的签名丢弃
+    kept = {rel: entry for rel, entry in cached.items() if rel in index}
+    if stale or len(kept) != len(cached):
+        save_signatures({**kept, **pages})
+    signatures = {rel: entry['sig'] for rel, entry in pages.items() if entry['sig'] is not None}
+
+    if args.check:
+        results = check_files([Path(path) for path in args.check], signatures, args.threshold)
+        if args.json:
+            json.dump({str(path): matches for path, matches in results.items()},
+                      sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        else:
+            for path, matches in results.items():
+                if not matches:
+                    print(f"✓ {path}: 没有相近的页面")
+                for rel, score in matches:
+                    print(f"~ {path}: 与 {rel} 相近 {score:.2f}")
+        sys.exit(1 if any(results.values()) else 0)
+
+    found = clusters(signatures, args.threshold)
+    if args.changed:
+        found = [cluster for cluster in found if any(rel in stale for rel, _ in cluster)]
+    if args.json:
+        json.dump([[{'path': rel, 'similarity': score} for rel, score in cluster] for cluster in found],
+                  sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for number, cluster in enumerate(found, 1):
+            print(f"[{number}] {len(cluster)} 个页面")
+            for rel, score in cluster:
+                print(f"    {score:.2f}  {rel}")
+    print(f"✓ 页面: {len(signatures)}（重新计算签名 {len(stale)}），重复簇: {len(found)}"
+          f"（{time.perf_counter() - start:.2f} 秒）", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
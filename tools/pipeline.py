@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进程内流水线：按依赖顺序运行各阶段，共享同一份上下文
+
+每个阶段是一个字典：
+    {'func': callable(context) -> 结果, 'requires': [依赖的阶段], 'description': 说明}
+
+    stages = {
+        'index': {'func': lambda ctx: load_index(), 'requires': [], 'description': '刷新内容索引'},
+        'validate': {'func': run_validate, 'requires': ['index'], 'description': '验证 front-matter'},
+    }
+    context, timings = run_pipeline(stages)          # 运行全部阶段
+    context, timings = run_pipeline(stages, ['validate'])  # 只运行 validate 及其依赖
+
+每个阶段的返回值以阶段名保存在 context 中，后续阶段直接读取
+（例如共享同一份内容索引），不再各自启动解释器、重新扫描目录。
+某个阶段失败时，依赖它的阶段会被跳过，其余阶段照常运行。
+"""
+import time
+import traceback
+
+
+def resolve_order(stages, targets=None):
+    """
+    返回需要运行的阶段（targets 及其全部依赖）的拓扑顺序，
+    同一层内保持 stages 中的定义顺序。依赖不存在或有环时抛出 ValueError
+    """
+    targets = list(stages) if targets is None else list(targets)
+    order = []
+    visiting = set()
+
+    def visit(name, chain):
+        if name not in stages:
+            raise ValueError(f"未知阶段: {name}" + (f"（{chain[-1]} 依赖）" if chain else ''))
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"阶段依赖有环: {' -> '.join(chain + [name])}")
+        visiting.add(name)
+        for dep in stages[name].get('requires', ()):
+            visit(dep, chain + [name])
+        visiting.discard(name)
+        order.append(name)
+
+    for name in targets:
+        visit(name, [])
+    return order
+
+
+def run_pipeline(stages, targets=None, context=None, on_start=None):
+    """
+    按依赖顺序运行阶段，返回 (context, timings)。
+    timings: {阶段名: {'seconds': 耗时, 'status': 'ok' | 'failed' | 'skipped'}}
+    on_start(name, stage) 在每个阶段开始前调用，可用于打印标题
+    """
+    context = {} if context is None else context
+    timings = {}
+    for name in resolve_order(stages, targets):
+        stage = stages[name]
+        blocked = [dep for dep in stage.get('requires', ()) if timings[dep]['status'] != 'ok']
+        if blocked:
+            timings[name] = {'seconds': 0.0, 'status': 'skipped'}
+            print(f"⚠ 跳过 {name}：依赖的阶段 {', '.join(blocked)} 未成功")
+            continue
+        if on_start:
+            on_start(name, stage)
+        start = time.perf_counter()
+        try:
+            context[name] = stage['func'](context)
+            status = 'ok'
+        except Exception as e:
+            traceback.print_exc()
+            print(f"✗ 阶段 {name} 失败: {e}")
+            status = 'failed'
+        timings[name] = {'seconds': time.perf_counter() - start, 'status': status}
+    return context, timings
+
+
+def print_timings(timings, stages=None):
+    """打印各阶段耗时"""
+    marks = {'ok': '✓', 'failed': '✗', 'skipped': '-'}
+    total = sum(t['seconds'] for t in timings.values())
+    print("\n阶段耗时:")
+    for name, t in timings.items():
+        description = stages[name].get('description', '') if stages else ''
+        print(f"  {marks[t['status']]} {name:<12} {t['seconds'] * 1000:9.1f} ms  {description}")
+    print(f"  合计 {total * 1000:.1f} ms")
+
+
+def succeeded(timings):
+    """所有阶段是否都成功"""
+    return all(t['status'] == 'ok' for t in timings.values())
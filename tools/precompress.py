@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预压缩 public/（hexo generate 之后运行）
+
+为 HTML、CSS、JS、JSON、XML、SVG 等文本文件生成同目录的 .gz 和 .br
+（需要安装 brotli 模块，没有时只生成 .gz），静态服务器可以直接发送
+预压缩的文件（nginx 的 gzip_static / brotli_static），不再每次请求都压缩。
+
+    - 多进程并行压缩（--jobs）
+    - 内容哈希清单（.cache/manifest/precompress.json）：Hexo 每次生成都会刷新
+      所有文件的修改时间，但内容没变的文件哈希相同，直接跳过
+    - gzip 输出不含时间戳，同样的内容总是得到同样的 .gz，增量部署不会重复上传
+    - 原文件被删除后，对应的压缩文件一并删除
+
+    python3 tools/precompress.py -j 0
+    python3 tools/precompress.py --force      # 忽略清单，全部重新压缩
+"""
+import argparse
+import gzip
+import os
+import time
+
+from content_index import ROOT
+from executor import add_jobs_argument, atomic_write, run_parallel
+from manifest import filter_changed, load_manifest, save_manifest, update_manifest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PUBLIC_DIR = ROOT / 'public'
+MANIFEST_NAME = 'precompress'
+COMPRESSIBLE = ('.html', '.htm', '.css', '.js', '.mjs', '.json', '.xml', '.svg', '.txt',
+                '.map', '.webmanifest', '.ico', '.ttf', '.otf', '.eot')
+# 小于 1 KB 的文件压缩收益不足以抵消额外的文件
+MIN_SIZE = 1024
+
+
+def encoders():
+    """可用的压缩格式：[(后缀, 压缩函数), ...]"""
+    available = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        available.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return available
+
+
+def find_files(public_dir):
+    """public/ 中需要压缩的文件"""
+    found = []
+    for root, dirs, files in os.walk(public_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(COMPRESSIBLE):
+                path = os.path.join(root, name)
+                if os.path.getsize(path) >= MIN_SIZE:
+                    found.append(path)
+    return found
+
+
+def compress_file(path):
+    """
+    压缩单个文件（在工作进程中运行），返回 {后缀: 压缩后大小}；
+    压缩文件的修改时间与原文件一致
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    stat = os.stat(path)
+    sizes = {}
+    for suffix, compress in encoders():
+        target = path + suffix
+        packed = compress(data)
+        atomic_write(target, packed)
+        os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        sizes[suffix] = len(packed)
+    return sizes
+
+
+def remove_orphans(public_dir):
+    """删除原文件已经不存在的压缩文件，返回删除数"""
+    suffixes = tuple(suffix for suffix, _ in encoders()) + ('.gz', '.br')
+    removed = 0
+    for root, _, files in os.walk(public_dir):
+        names = set(files)
+        for name in files:
+            if name.endswith(suffixes):
+                original = name.rsplit('.', 1)[0]
+                if original.lower().endswith(COMPRESSIBLE) and original not in names:
+                    os.unlink(os.path.join(root, name))
+                    removed += 1
+    return removed
+
+
+def precompress(public_dir=PUBLIC_DIR, jobs=1, force=False):
+    """
+    压缩 public/ 中有变化的文件，返回统计信息：
+    {'total', 'compressed', 'skipped', 'removed', 'original', 'packed', 'errors'}
+    """
+    manifest = {} if force else load_manifest(MANIFEST_NAME)
+    files = find_files(public_dir)
+    suffixes = [suffix for suffix, _ in encoders()]
+    # 内容哈希未变且压缩文件都在的跳过
+    missing = [path for path in files if not all(os.path.exists(path + s) for s in suffixes)]
+    candidates = sorted(set(missing) | set(filter_changed(files, manifest)))
+
+    stats = {'total': len(files), 'compressed': 0, 'skipped': len(files) - len(candidates),
+             'removed': 0, 'original': 0, 'packed': 0, 'errors': []}
+    done = []
+    for path, sizes, error in run_parallel(compress_file, candidates, jobs=jobs):
+        if error:
+            stats['errors'].append((path, error))
+            continue
+        done.append(path)
+        stats['compressed'] += 1
+        stats['original'] += os.path.getsize(path)
+        stats['packed'] += min(sizes.values())
+
+    update_manifest(manifest, done)
+    for key in [key for key in manifest if not (ROOT / key).exists()]:
+        del manifest[key]
+    save_manifest(MANIFEST_NAME, manifest)
+
+    stats['removed'] = remove_orphans(public_dir)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='为 public/ 中的文本文件生成 .gz / .br 预压缩文件')
+    parser.add_argument('--public-dir', default=str(PUBLIC_DIR), help='Hexo 输出目录（默认 public/）')
+    parser.add_argument('--force', action='store_true', help='忽略清单，全部重新压缩')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.public_dir):
+        print(f"✗ 目录不存在: {args.public_dir}（先运行 hexo generate）")
+        raise SystemExit(1)
+    if brotli is None:
+        print("⚠ 未安装 brotli 模块，只生成 .gz（pip install brotli）")
+
+    start = time.perf_counter()
+    stats = precompress(args.public_dir, args.jobs, args.force)
+    elapsed = time.perf_counter() - start
+
+    for path, error in stats['errors']:
+        print(f"✗ {path}: {error}")
+    print(f"✓ 文件数: {stats['total']}，压缩: {stats['compressed']}，未变化跳过: {stats['skipped']}")
+    if stats['compressed']:
+        ratio = stats['packed'] / stats['original'] if stats['original'] else 1
+        print(f"✓ {stats['original'] / 1024:.1f} KB -> {stats['packed'] / 1024:.1f} KB（{ratio:.0%}）")
+    if stats['removed']:
+        print(f"✓ 删除过期的压缩文件: {stats['removed']}")
+    print(f"✓ 耗时: {elapsed * 1000:.1f} ms")
+    if stats['errors']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,10 @@ import re
 from pathlib import Path
 from collections import defaultdict
 
+from content_index import ROOT
+from link_graph import files_referencing, load_graph
+from transaction import Transaction
+
 def get_drug_mapping():
     """读取所有 markdown 文件并建立编码到中文名的映射"""
     mapping = {}
@@ -26,54 +30,41 @@ def get_drug_mapping():
     
     return mapping
 
-def find_all_references(mapping):
-    """找到所有引用这些药物代码的文件"""
+def find_all_references(mapping, graph=None):
+    """找到所有引用这些药物代码的文件（查询链接图的反向链接，不再逐个读取文件）"""
+    graph = graph if graph is not None else load_graph()
     references = defaultdict(list)
-    pattern = '|'.join(re.escape(code) for code in mapping.keys())
     
-    # 需要搜索的文件类型
-    for root, dirs, files in os.walk("./source"):
-        # 跳过某些目录
-        dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules']]
-        
-        for file in files:
-            if file.endswith(('.md', '.html', '.yml')):
-                filepath = os.path.join(root, file)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        for match in re.finditer(pattern, content):
-                            code = match.group(0)
-                            references[code].append(filepath)
-                except:
-                    pass
+    for code in mapping.keys():
+        for rel in files_referencing(graph, f"drugs/{code}"):
+            references[code].append(os.path.join("./source", rel))
     
     return references
 
-def rename_files(mapping):
-    """重命名所有药物文件"""
+def rename_files(mapping, tx):
+    """重命名所有药物文件（暂存到事务中）"""
     drugs_dir = Path("./source/drugs")
     
     for code, title in mapping.items():
         old_path = drugs_dir / f"{code}.md"
         new_path = drugs_dir / f"{title}.md"
         
-        if old_path.exists() and not new_path.exists():
-            old_path.rename(new_path)
+        if tx.exists(old_path) and not tx.exists(new_path):
+            tx.rename(old_path, new_path)
             print(f"✓ 重命名: {code}.md -> {title}.md")
-        elif new_path.exists():
+        elif tx.exists(new_path):
             print(f"⚠ 跳过: {title}.md 已存在")
         else:
             print(f"✗ 未找到: {code}.md")
 
-def update_references(mapping):
-    """更新所有引用"""
+def update_references(mapping, tx):
+    """更新所有引用（暂存到事务中）"""
     count = 0
     
     # 更新 source/_data/wiki/drugs.yml
     drugs_yml = Path("./source/_data/wiki/drugs.yml")
     if drugs_yml.exists():
-        content = drugs_yml.read_text(encoding='utf-8')
+        content = tx.read_text(drugs_yml)
         original_content = content
         
         for code, title in mapping.items():
@@ -85,49 +76,46 @@ def update_references(mapping):
             )
         
         if content != original_content:
-            drugs_yml.write_text(content, encoding='utf-8')
+            tx.write_text(drugs_yml, content)
             print(f"✓ 更新: source/_data/wiki/drugs.yml")
 
-    # 更新所有 markdown 和 html 文件中的链接
-    for root, dirs, files in os.walk("./source"):
-        dirs[:] = [d for d in dirs if d not in ['.git', 'node_modules']]
-        
-        for file in files:
-            if file.endswith(('.md', '.html')):
-                filepath = os.path.join(root, file)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    original_content = content
-                    
-                    for code, title in mapping.items():
-                        # 替换各种链接格式
-                        # [text](/drugs/CODE) -> [text](/drugs/TITLE)
-                        content = re.sub(
-                            rf'(?<=/drugs/){re.escape(code)}(?=/|\)|\")',
-                            title,
-                            content
-                        )
-                        # CODE/xxx -> TITLE/xxx
-                        content = re.sub(
-                            rf'^(\s*- ){re.escape(code)}/([^/\s]+)',
-                            rf'\1{title}/\2',
-                            content,
-                            flags=re.MULTILINE
-                        )
-                    
-                    if content != original_content:
-                        with open(filepath, 'w', encoding='utf-8') as f:
-                            f.write(content)
-                        print(f"✓ 更新: {filepath}")
-                        count += 1
-                except Exception as e:
-                    print(f"✗ 错误处理 {filepath}: {e}")
+    # 只更新链接图中引用了这些药物的 markdown 和 html 文件
+    files = sorted({path for paths in find_all_references(mapping).values() for path in paths})
+    for filepath in files:
+        if filepath.endswith(('.md', '.html')):
+            try:
+                content = tx.read_text(filepath)
+                
+                original_content = content
+                
+                for code, title in mapping.items():
+                    # 替换各种链接格式
+                    # [text](/drugs/CODE) -> [text](/drugs/TITLE)
+                    content = re.sub(
+                        rf'(?<=/drugs/){re.escape(code)}(?=/|\)|\")',
+                        title,
+                        content
+                    )
+                    # CODE/xxx -> TITLE/xxx
+                    content = re.sub(
+                        rf'^(\s*- ){re.escape(code)}/([^/\s]+)',
+                        rf'\1{title}/\2',
+                        content,
+                        flags=re.MULTILINE
+                    )
+                
+                if content != original_content:
+                    tx.write_text(filepath, content)
+                    print(f"✓ 更新: {filepath}")
+                    count += 1
+            except Exception as e:
+                print(f"✗ 错误处理 {filepath}: {e}")
     
     return count
 
 def main():
+    os.chdir(ROOT)
+    
     print("=" * 60)
     print("药物文件名称重命名工具")
     print("=" * 60)
@@ -148,15 +136,25 @@ def main():
         print("取消操作")
         return
     
-    # 重命名文件
-    print("\n3. 重命名文件...")
-    rename_files(mapping)
+    # 先暂存所有修改，最后一次性提交，中途出错不会留下半迁移的目录树
+    tx = Transaction()
     
-    # 更新引用
-    print("\n4. 更新所有引用...")
-    count = update_references(mapping)
+    # 更新引用（按当前文件名读取，提交时先写内容再改名）
+    print("\n3. 更新所有引用...")
+    count = update_references(mapping, tx)
     print(f"   共更新 {count} 个文件")
     
+    # 重命名文件
+    print("\n4. 重命名文件...")
+    rename_files(mapping, tx)
+    
+    print(f"\n5. 提交 {len(tx)} 个操作...")
+    try:
+        tx.commit()
+    except Exception as e:
+        print(f"✗ 提交失败，所有修改已回滚: {e}")
+        raise
+    
     print("\n" + "=" * 60)
     print("完成！")
     print("请运行: hexo clean && hexo g")
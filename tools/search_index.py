@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成分片的全文搜索索引（hexo generate 之后运行，输出到 public/search/）
+
+分词：
+    - 连续的汉字按二元组切分（"佐匹克隆" -> 佐匹 匹克 克隆），单个汉字保留为一个词；
+      编入索引时每个汉字另外作为一个单字词，只输入一个字（"药"）也能查到所有含有它的页面
+    - 英文和数字按单词切分并转为小写（NFKC 规范化，全角字母数字等同半角）
+    - 正文去掉 HTML 标签、{% %} 标签、链接地址和代码围栏标记后再分词
+    - front-matter 中 indexing: false 的页面不编入索引
+
+倒排表按词的前缀分片，每个分片是一个 JSON 文件 {词: 倒排表}：
+    - 英文/数字词取前两个字符作为分片名（ketamine -> ke.json）
+    - 汉字词取第一个字的码位（佐匹 -> u4f50.json）
+倒排表是扁平的整数数组 [文档号增量, 权重, 文档号增量, 权重, ...]，
+权重 = 正文词频 + 标题词频 × TITLE_BOOST。
+
+meta.json 记录文档列表 [[URL, 标题], ...]。
+客户端查询时用同样的规则分词（查询不额外切出单字词），只下载 meta.json 和查询词所在的几个分片（分片不存在即没有匹配），
+对各词的文档取交集并按权重之和排序，不再下载整个 search.json。
+
+内容没有变化的分片不重写（保留修改时间，增量部署只上传变化的分片），
+不再需要的分片会被删除。
+"""
+import argparse
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+
+from content_index import ROOT, SOURCE_DIR, load_index
+from executor import add_jobs_argument, run_parallel
+from frontmatter import read_page
+from generate_index import get_title_from_file
+from manifest import write_if_changed
+
+OUTPUT_DIR = ROOT / 'public' / 'search'
+META_NAME = 'meta.json'
+SEARCH_VERSION = 1
+TITLE_BOOST = 10
+
+CJK = '㐀-䶿一-鿿豈-﫿'
+TOKEN_RE = re.compile(f'[{CJK}]+|[a-z0-9]+')
+CJK_RE = re.compile(f'[{CJK}]')
+FENCE_RE = re.compile(r'^\s*(```|~~~).*$', re.MULTILINE)
+TAG_RE = re.compile(r'\{%.*?%\}|<[^>]*>', re.DOTALL)
+LINK_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+URL_RE = re.compile(r'https?://\S+')
+
+
+def tokenize(text, unigrams=False):
+    """
+    将文本切分为汉字二元组和英文/数字单词，返回词列表（保留重复）；
+    unigrams=True 时（编入索引）每个汉字另外作为一个单字词
+    """
+    text = unicodedata.normalize('NFKC', text).lower()
+    tokens = []
+    for match in TOKEN_RE.finditer(text):
+        word = match.group()
+        if CJK_RE.match(word):
+            if len(word) == 1 or unigrams:
+                tokens.extend(word)
+            if len(word) > 1:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        elif len(word) > 1 or word.isdigit():
+            tokens.append(word)
+    return tokens
+
+
+def strip_markup(body):
+    """去掉正文中不参与搜索的标记，保留链接文字"""
+    body = FENCE_RE.sub(' ', body)
+    body = LINK_RE.sub(r' \1 ', body)
+    body = TAG_RE.sub(' ', body)
+    return URL_RE.sub(' ', body)
+
+
+def shard_key(token):
+    """词所在的分片名"""
+    if CJK_RE.match(token):
+        return f'u{ord(token[0]):x}'
+    return token[:2]
+
+
+def page_url(rel):
+    """source/ 相对路径 -> 站点 URL（Hexo 页面保留 .html 后缀）"""
+    return '/' + re.sub(r'\.md$', '.html', rel)
+
+
+def index_page(path):
+    """
+    为单个页面分词（在工作进程中运行），返回 (标题, {词: 权重})；
+    front-matter 设置了 indexing: false 的页面返回 None
+    """
+    page = read_page(path)
+    if (page.frontmatter or {}).get('indexing') is False:
+        return None
+    title = get_title_from_file(path) or Path(path).stem
+    weights = Counter(tokenize(strip_markup(page.body), unigrams=True))
+    for token in tokenize(title, unigrams=True):
+        weights[token] += TITLE_BOOST
+    return title, dict(weights)
+
+
+def build_postings(docs):
+    """
+    docs: [(文档号, {词: 权重}), ...]（文档号递增）
+    返回 {分片名: {词: [文档号增量, 权重, ...]}}
+    """
+    postings = {}
+    last_doc = {}
+    for doc_id, weights in docs:
+        for token, weight in weights.items():
+            entry = postings.get(token)
+            if entry is None:
+                entry = postings[token] = []
+            entry.append(doc_id - last_doc.get(token, 0))
+            entry.append(weight)
+            last_doc[token] = doc_id
+    shards = {}
+    for token, entry in postings.items():
+        shards.setdefault(shard_key(token), {})[token] = entry
+    return shards
+
+
+def dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+
+def build_search_index(index, output_dir=OUTPUT_DIR, source_dir=SOURCE_DIR, jobs=1):
+    """
+    生成搜索索引，返回统计信息 {'docs', 'tokens', 'shards', 'written', 'removed', 'errors'}
+    """
+    output_dir = Path(output_dir)
+    paths = [Path(source_dir) / rel for rel in sorted(index) if rel.endswith('.md')]
+    results = run_parallel(index_page, paths, jobs=jobs)
+
+    docs = []
+    weights = []
+    errors = []
+    for path, result, error in results:
+        if error:
+            errors.append((path, error))
+            continue
+        if result is None:
+            continue
+        title, page_weights = result
+        docs.append([page_url(path.relative_to(source_dir).as_posix()), title])
+        weights.append((len(docs) - 1, page_weights))
+
+    shards = build_postings(weights)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for key, postings in shards.items():
+        written += write_if_changed(output_dir / f'{key}.json', dump(postings))
+    meta = {'version': SEARCH_VERSION, 'title_boost': TITLE_BOOST, 'docs': docs}
+    written += write_if_changed(output_dir / META_NAME, dump(meta))
+
+    removed = 0
+    for entry in os.scandir(output_dir):
+        if entry.name.endswith('.json') and entry.name != META_NAME \
+                and entry.name[:-len('.json')] not in shards:
+            os.unlink(entry.path)
+            removed += 1
+
+    return {'docs': len(docs), 'tokens': sum(len(p) for p in shards.values()),
+            'shards': len(shards), 'written': written, 'removed': removed, 'errors': errors}
+
+
+def search(query, output_dir=OUTPUT_DIR, limit=10):
+    """
+    按客户端的方式查询：只读取 meta.json 和查询词所在的分片，
+    返回 [(权重, URL, 标题), ...]
+    """
+    output_dir = Path(output_dir)
+    with open(output_dir / META_NAME, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    loaded = {}
+    scores = None
+    for token in dict.fromkeys(tokenize(query)):
+        key = shard_key(token)
+        if key not in loaded:
+            if not (output_dir / f'{key}.json').exists():
+                return []
+            with open(output_dir / f'{key}.json', 'r', encoding='utf-8') as f:
+                loaded[key] = json.load(f)
+        postings = loaded[key].get(token)
+        if not postings:
+            return []
+        matched = {}
+        doc_id = 0
+        for i in range(0, len(postings), 2):
+            doc_id += postings[i]
+            matched[doc_id] = postings[i + 1]
+        if scores is None:
+            scores = matched
+        else:
+            scores = {doc: score + matched[doc] for doc, score in scores.items() if doc in matched}
+    ranked = sorted(((score, doc) for doc, score in (scores or {}).items()), key=lambda x: (-x[0], x[1]))
+    return [(score, *meta['docs'][doc]) for score, doc in ranked[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成分片的全文搜索索引')
+    parser.add_argument('--output', default=str(OUTPUT_DIR), help='输出目录（默认 public/search）')
+    parser.add_argument('--query', help='不重新生成，直接在已生成的索引中查询')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+
+    if args.query:
+        for score, url, title in search(args.query, args.output):
+            print(f"{score:6d}  {title}  {url}")
+        return
+
+    start = time.perf_counter()
+    stats = build_search_index(load_index(), args.output, jobs=args.jobs)
+    elapsed = time.perf_counter() - start
+    for path, error in stats['errors']:
+        print(f"✗ {path}: {error}")
+    print(f"✓ 文档数: {stats['docs']}")
+    print(f"✓ 词数: {stats['tokens']}，分片数: {stats['shards']}")
+    print(f"✓ 写入分片: {stats['written']}，删除分片: {stats['removed']}")
+    print(f"✓ 耗时: {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
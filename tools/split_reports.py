@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+拆分过长的报告页面
+
+超过大小阈值（--max-kb）或标题数阈值（--max-headings）的报告
+（source/reports/*/RP-N.md）按 ## 或 ### 标题拆分成多个子页面 RP-N-1、RP-N-2 …：
+    - 选择至少有两个标题的最浅层级（## 优先，否则 ###）作为拆分边界，
+      相邻的小节依次合并，每个子页面约 --part-kb 大小，不会在小节中间断开
+    - 原页面保留 front-matter 和第一个小节之前的导言，末尾加上各分页的链接
+    - 子页面复制原页面的 front-matter（标题加上页码，去掉 order：按 order 排序时不与 RP-N 混在一起，
+      reports.yml 中按 RP-N-k 的编号排在 RP-N 之后），首尾有上一页/下一页导航
+    - 报告内的锚点链接（#标题）如果指向了另一个分页，改写为该分页的地址；
+      其他页面中指向 RP-N#标题 的链接同样改写（通过链接图只处理引用了该报告的页面）
+    - 所有文件在一个事务中写入，然后用 misc/update_tree.py 把子页面登记到 reports.yml
+已经拆分过的报告不再超过阈值，重复运行不会再次拆分。
+
+注意：拆分直接改写 source/，不是生成网站时的临时步骤。拆分之后 RP-N.md 只剩导言和分页目录，
+正文在 RP-N-k.md 中，之后要编辑对应的子页面；需要还原时用 git 恢复。先用 --dry-run 确认拆分计划。
+
+    python3 tools/split_reports.py --dry-run     # 只显示拆分计划
+    python3 tools/split_reports.py               # 拆分所有超过阈值的报告
+    python3 tools/split_reports.py source/reports/odw-reports/RP-7.md
+"""
+import argparse
+import re
+from pathlib import Path
+from urllib.parse import unquote
+
+from content_index import FENCE_RE, SOURCE_DIR, load_index, split_frontmatter
+from frontmatter import parse_scalar
+from frontmatter_edit import insert_after, mutate_text, set_key, unset
+from link_graph import load_graph
+from misc.update_tree import update_reports_tree
+from transaction import Transaction
+
+REPORTS_DIR = SOURCE_DIR / 'reports'
+REPORT_RE = re.compile(r'^RP-(\d+)\.md$')
+HEADING_RE = re.compile(r'^(#{2,6})\s+(.+?)\s*#*\s*$')
+TITLE_RE = re.compile(r'^title:.*$', re.MULTILINE)
+# Hexo（hexo-util slugize）生成标题锚点时替换为 - 的字符
+SLUG_SPECIAL_RE = re.compile(r'[\s~`!@#$%^&*()\-_+=\[\]{}|\\;:"\'<>,.?/]+')
+ANCHOR_LINK_RE = re.compile(r'(\]\(\s*<?|href\s*=\s*["\'])#([^)\s>"\']+)')
+
+MAX_KB = 32
+MAX_HEADINGS = 40
+PART_KB = 16
+
+
+def slugize(text):
+    """标题文字 -> Hexo 生成的锚点 id"""
+    return SLUG_SPECIAL_RE.sub('-', text).strip('-')
+
+
+def find_headings(body):
+    """返回正文中 ##~###### 标题 [(行号, 级别, 文字)]，忽略代码块"""
+    headings = []
+    in_fence = False
+    for lineno, line in enumerate(body.split('\n')):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = HEADING_RE.match(line)
+        if match:
+            headings.append((lineno, len(match.group(1)), match.group(2)))
+    return headings
+
+
+def needs_split(size, headings, max_kb=MAX_KB, max_headings=MAX_HEADINGS):
+    return size > max_kb * 1024 or len(headings) > max_headings
+
+
+def split_level(headings):
+    """拆分边界的标题级别：至少有两个标题的最浅层级（## 或 ###），没有则返回 None"""
+    for level in (2, 3):
+        if sum(1 for _, lvl, _ in headings if lvl == level) >= 2:
+            return level
+    return None
+
+
+def line_size(lines, start, end):
+    return sum(len(line.encode('utf-8')) + 1 for line in lines[start:end])
+
+
+def plan_parts(body, headings, level, part_bytes):
+    """
+    把正文分成 导言 + 若干分页，返回 (导言行, [[行, ...], ...])。
+    导言是第一个边界标题之前的内容；如果它只是空白，第一个小节也算作导言
+    （报告通常以 ## 报告标题 开头）。超过分页大小的 ## 小节再按其中的 ### 标题切开，
+    最后一页过小时并入前一页
+    """
+    lines = body.split('\n')
+    starts = [lineno for lineno, lvl, _ in headings if lvl == level]
+    bounds = starts + [len(lines)]
+    ranges = [(bounds[i], bounds[i + 1]) for i in range(len(starts))]
+    intro_end = starts[0]
+    if not ''.join(lines[:intro_end]).strip() and len(ranges) > 2:
+        intro_end = ranges.pop(0)[1]
+
+    sections = []
+    for start, end in ranges:
+        inner = [lineno for lineno, lvl, _ in headings if lvl == level + 1 and start < lineno < end]
+        if level < 3 and len(inner) >= 2 and line_size(lines, start, end) > part_bytes:
+            # 小节标题和第一个子标题之前的内容跟随第一个子小节
+            cuts = [start] + inner[1:] + [end]
+            sections += [(cuts[i], cuts[i + 1]) for i in range(len(cuts) - 1)]
+        else:
+            sections.append((start, end))
+
+    parts = []
+    for start, end in sections:
+        size = line_size(lines, start, end)
+        if parts and parts[-1][2] + size <= part_bytes:
+            parts[-1] = (parts[-1][0], end, parts[-1][2] + size)
+        else:
+            parts.append((start, end, size))
+    if len(parts) > 1 and parts[-1][2] < part_bytes // 4:
+        last = parts.pop()
+        parts[-1] = (parts[-1][0], last[1], parts[-1][2] + last[2])
+    return lines[:intro_end], [lines[start:end] for start, end, _ in parts]
+
+
+def part_headings(lines):
+    """分页中的标题文字"""
+    return [text for _, _, text in find_headings('\n'.join(lines))]
+
+
+def anchor_map(pages):
+    """{锚点 id: 所在页面名}，pages 为 [(页面名, 行列表), ...]"""
+    anchors = {}
+    for name, lines in pages:
+        for text in part_headings(lines):
+            for anchor in (text, slugize(text)):
+                anchors.setdefault(anchor, name)
+    return anchors
+
+
+def rewrite_anchors(text, own_name, anchors, url_of):
+    """把指向其他分页中标题的 #锚点 改写为该分页的地址"""
+    def replace(match):
+        fragment = match.group(2)
+        target = anchors.get(unquote(fragment))
+        if target is None or target == own_name:
+            return match.group(0)
+        return f'{match.group(1)}{url_of(target)}#{fragment}'
+    return ANCHOR_LINK_RE.sub(replace, text)
+
+
+def nav_line(names, k, url_of, main_title):
+    """子页面的导航：目录 | 上一页 | 下一页"""
+    items = [f'[{main_title}（目录）]({url_of(names[0])})']
+    if k > 1:
+        items.append(f'[← 上一页]({url_of(names[k - 1])})')
+    if k + 1 < len(names):
+        items.append(f'[下一页 →]({url_of(names[k + 1])})')
+    return ' | '.join(items)
+
+
+def build_split(path, source_dir=SOURCE_DIR, part_kb=PART_KB, content=None):
+    """
+    计算一个报告的拆分结果，返回 {页面相对路径: 新内容}（含原页面），
+    以及 (页面名, 对应的锚点表)；不需要拆分时返回 None。
+    content 为尚未写入的新内容（例如已改写过反向链接），默认读取文件
+    """
+    path = Path(path)
+    if content is None:
+        content = path.read_text(encoding='utf-8')
+    block, body = split_frontmatter(content)
+    if block is None:
+        return None
+    headings = find_headings(body)
+    level = split_level(headings)
+    if level is None:
+        return None
+    intro, parts = plan_parts(body, headings, level, part_kb * 1024)
+    if len(parts) < 2:
+        return None
+
+    stem = path.stem
+    rel_dir = path.parent.relative_to(source_dir).as_posix()
+    names = [stem] + [f'{stem}-{k}' for k in range(1, len(parts) + 1)]
+    title_match = TITLE_RE.search(block)
+    main_title = str(parse_scalar(title_match.group(0).split(':', 1)[1]) or stem) if title_match else stem
+
+    def url_of(name):
+        return f'/{rel_dir}/{name}'
+
+    anchors = anchor_map(list(zip(names, [intro] + parts)))
+    files = {}
+
+    toc = ['', '## 分页阅读', '']
+    for k, lines in enumerate(parts, 1):
+        titles = part_headings(lines)
+        summary = titles[0] if titles else f'第 {k} 页'
+        if len(titles) > 1:
+            summary += f' … {titles[-1]}'
+        toc.append(f'- [第 {k} 页：{summary}]({url_of(names[k])})')
+    main_body = '\n'.join(intro).rstrip('\n') + '\n' + '\n'.join(toc) + '\n'
+    files[f'{rel_dir}/{stem}.md'] = (f'---\n{block}\n---\n'
+                                     + rewrite_anchors(main_body, stem, anchors, url_of))
+
+    for k, lines in enumerate(parts, 1):
+        sub_title = f'{main_title}（{k}/{len(parts)}）'
+        title_mutation = set_key('title', sub_title) if title_match else insert_after('title', sub_title)
+        sub_front = mutate_text(f'---\n{block}\n---\n', [title_mutation, unset('order')])
+        nav = nav_line(names, k, url_of, main_title)
+        sub_body = nav + '\n\n' + '\n'.join(lines).strip('\n') + '\n\n' + nav + '\n'
+        files[f'{rel_dir}/{names[k]}.md'] = sub_front + rewrite_anchors(sub_body, names[k], anchors, url_of)
+    return files, anchors
+
+
+def rewrite_backlinks(graph, rel, anchors, source_dir=SOURCE_DIR, pending=None):
+    """
+    改写其他页面中指向 RP-N#锚点 的链接（锚点已移到子页面时），
+    返回 {页面相对路径: 新内容}。pending 为尚未写入的 {页面相对路径: 内容}，
+    其中的页面在待写入的内容上继续改写，不读取文件
+    """
+    pending = pending or {}
+    stem = rel.rsplit('/', 1)[-1][:-len('.md')]
+    url_re = re.compile(rf'(/{re.escape(rel[:-len(".md")])})(?:\.html|\.md)?#([^)\s>"\']+)')
+    changed = {}
+    # 待写入的页面（包括先前拆分出的子页面）不在链接图中，一并检查
+    for src in sorted(set(graph['backward'].get(rel, [])) | set(pending)):
+        if src.startswith('_data/'):
+            continue
+        text = pending.get(src)
+        if text is None:
+            text = (Path(source_dir) / src).read_text(encoding='utf-8')
+
+        def replace(match):
+            target = anchors.get(unquote(match.group(2)))
+            if target is None or target == stem:
+                return match.group(0)
+            return f'{match.group(1).rsplit("/", 1)[0]}/{target}#{match.group(2)}'
+
+        new_text = url_re.sub(replace, text)
+        if new_text != text:
+            changed[src] = new_text
+    return changed
+
+
+def find_reports(reports_dir=REPORTS_DIR, max_kb=MAX_KB, max_headings=MAX_HEADINGS):
+    """超过阈值的报告（不包括已经拆分出的子页面）"""
+    found = []
+    for path in sorted(Path(reports_dir).glob('*/RP-*.md')):
+        if not REPORT_RE.match(path.name):
+            continue
+        _, body = split_frontmatter(path.read_text(encoding='utf-8'))
+        if needs_split(path.stat().st_size, find_headings(body), max_kb, max_headings):
+            found.append(path)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把过长的报告拆分成多个子页面')
+    parser.add_argument('files', nargs='*', help='只处理这些报告（默认处理所有超过阈值的报告）')
+    parser.add_argument('--max-kb', type=int, default=MAX_KB, help=f'大小阈值（KB，默认 {MAX_KB}）')
+    parser.add_argument('--max-headings', type=int, default=MAX_HEADINGS,
+                        help=f'标题数阈值（默认 {MAX_HEADINGS}）')
+    parser.add_argument('--part-kb', type=int, default=PART_KB, help=f'每个分页的目标大小（KB，默认 {PART_KB}）')
+    parser.add_argument('--dry-run', action='store_true', help='只显示拆分计划，不写文件')
+    args = parser.parse_args()
+
+    reports = [Path(f).resolve() for f in args.files] if args.files else \
+        find_reports(max_kb=args.max_kb, max_headings=args.max_headings)
+    if not reports:
+        print("✓ 没有需要拆分的报告")
+        return
+
+    graph = load_graph(load_index())
+    writes = {}
+    for path in reports:
+        try:
+            rel = path.relative_to(SOURCE_DIR).as_posix()
+        except ValueError:
+            print(f"✗ {path}: 不在 source/ 下，跳过")
+            continue
+        result = build_split(path, part_kb=args.part_kb, content=writes.get(rel))
+        if result is None:
+            print(f"- {rel}: 没有可以拆分的 ##/### 小节，跳过")
+            continue
+        files, anchors = result
+        for sub_rel in files:
+            if sub_rel != rel and (SOURCE_DIR / sub_rel).exists():
+                print(f"✗ {rel}: {sub_rel} 已存在，跳过")
+                break
+        else:
+            writes.update(files)
+            writes.update(rewrite_backlinks(graph, rel, anchors, pending=writes))
+            sizes = [len(files[sub].encode('utf-8')) // 1024 for sub in files]
+            print(f"✓ {rel}: {path.stat().st_size // 1024} KB -> {len(files) - 1} 个分页 "
+                  f"（{', '.join(f'{s} KB' for s in sizes)}）")
+
+    if args.dry_run or not writes:
+        return
+    with Transaction() as tx:
+        for rel, content in writes.items():
+            tx.write_text(SOURCE_DIR / rel, content)
+    print(f"✓ 已写入 {len(writes)} 个文件")
+
+    written, _ = update_reports_tree(REPORTS_DIR, SOURCE_DIR / '_data' / 'wiki' / 'reports.yml')
+    print("✓ 已更新 reports.yml" if written else "  reports.yml 无变化")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件事务：暂存所有改名和写入操作，一次性提交，失败时全部回滚
+
+    with Transaction() as tx:
+        tx.write_text(path, content)   # 暂存写入（内容保存在内存中）
+        tx.rename(old, new)            # 暂存改名（文件或目录）
+    # 离开 with 块时提交；块内抛出异常则丢弃所有暂存操作
+
+提交分三步：
+    1. 准备：把所有写入内容写到暂存目录中的临时文件并 fsync，检查改名的源/目标
+    2. 应用：按暂存顺序执行 os.replace / os.rename，同时记录撤销日志
+       （被覆盖的原文件先硬链接到暂存目录，不复制内容）
+    3. 对涉及的目录执行 fsync，清理暂存目录
+任何一步失败都会按相反顺序撤销已执行的操作，然后重新抛出异常，
+不会留下只迁移了一半的目录树。
+
+暂存目录位于 .cache/ 下，与 source/ 在同一文件系统上，保证 os.replace 是原子的。
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from content_index import CACHE_DIR
+
+
+def fsync_dir(path):
+    """对目录执行 fsync，确保目录项（新建、改名）落盘"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Transaction:
+    """暂存文件写入与改名，commit() 时批量原子提交"""
+
+    def __init__(self, staging_root=CACHE_DIR):
+        self.staging_root = Path(staging_root)
+        self.operations = []
+        self._contents = {}
+        self.committed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+    def __len__(self):
+        return len(self.operations)
+
+    # ---- 暂存 ----
+
+    def write_text(self, path, content, encoding='utf-8'):
+        """暂存文本写入"""
+        path = Path(path)
+        self.operations.append(('write', path, content.encode(encoding)))
+        self._contents[path] = content
+
+    def read_text(self, path, encoding='utf-8'):
+        """读取文件内容，优先返回本事务中尚未提交的写入"""
+        path = Path(path)
+        if path in self._contents:
+            return self._contents[path]
+        return path.read_text(encoding=encoding)
+
+    def rename(self, src, dst):
+        """暂存改名；目标已存在（包括本事务中将要出现的路径）时报错"""
+        src, dst = Path(src), Path(dst)
+        if not self.exists(src):
+            raise FileNotFoundError(f'改名源不存在: {src}')
+        if self.exists(dst):
+            raise FileExistsError(f'改名目标已存在: {dst}')
+        self.operations.append(('rename', src, dst))
+        if src in self._contents:
+            self._contents[dst] = self._contents.pop(src)
+
+    def exists(self, path):
+        """判断路径在本事务提交后是否存在"""
+        path = Path(path)
+        state = None
+        for op, a, b in self.operations:
+            if op == 'write' and a == path:
+                state = True
+            elif op == 'rename':
+                if a == path:
+                    state = False
+                elif b == path:
+                    state = True
+        return path.exists() if state is None else state
+
+    def discard(self):
+        """丢弃所有暂存操作"""
+        self.operations = []
+        self._contents = {}
+
+    # ---- 提交 ----
+
+    def commit(self):
+        """批量提交所有暂存操作，失败时回滚并重新抛出异常"""
+        if self.committed:
+            raise RuntimeError('事务已提交')
+        if not self.operations:
+            self.committed = True
+            return
+
+        self.staging_root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix='txn-', dir=self.staging_root))
+        undo = []
+        touched_dirs = set()
+        try:
+            prepared = self._prepare(staging)
+            for i, (op, a, b) in enumerate(self.operations):
+                if op == 'write':
+                    self._apply_write(a, prepared[i], staging, undo)
+                    touched_dirs.add(a.parent)
+                else:
+                    os.rename(a, b)
+                    undo.append(('rename', b, a))
+                    touched_dirs.update((a.parent, b.parent))
+            for directory in touched_dirs:
+                fsync_dir(directory)
+        except BaseException:
+            self._rollback(undo)
+            raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.committed = True
+
+    def _prepare(self, staging):
+        """把所有写入内容写入暂存目录并 fsync，返回 {操作序号: 临时文件}"""
+        prepared = {}
+        for i, (op, a, b) in enumerate(self.operations):
+            if op != 'write':
+                continue
+            tmp_path = staging / f'{i}.new'
+            with open(tmp_path, 'wb') as f:
+                f.write(b)
+                f.flush()
+                os.fsync(f.fileno())
+            prepared[i] = tmp_path
+        fsync_dir(staging)
+        return prepared
+
+    def _apply_write(self, path, tmp_path, staging, undo):
+        """用临时文件替换目标文件，并记录撤销方式"""
+        if path.exists():
+            backup = staging / f'{len(undo)}.orig'
+            try:
+                os.link(path, backup)
+            except OSError:
+                shutil.copy2(path, backup)
+            os.chmod(tmp_path, path.stat().st_mode & 0o7777)
+            os.replace(tmp_path, path)
+            undo.append(('restore', backup, path))
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+            undo.append(('remove', None, path))
+
+    def _rollback(self, undo):
+        """按相反顺序撤销已执行的操作"""
+        for op, a, b in reversed(undo):
+            try:
+                if op == 'restore':
+                    os.replace(a, b)
+                elif op == 'remove':
+                    os.unlink(b)
+                elif op == 'rename':
+                    os.rename(a, b)
+            except OSError as e:
+                print(f"✗ 回滚失败 {b}: {e}")
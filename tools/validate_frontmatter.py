@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+front-matter 规则校验（所有 wiki 共用一份规则表）
+
+SCHEMAS 按 source/ 下的顶层目录定义每个板块的规则：
+    required    必须存在且非空的键
+    wiki        wiki: 的取值必须与目录对应（None 表示该板块不属于任何 wiki，不应设置 wiki:）
+所有板块共同的规则：
+    - 必须有 front-matter
+    - date / updated 为 ISO 格式的日期（YYYY-MM-DD[ HH:MM[:SS[.ffffff]]][Z|±HH:MM]，
+      月、日、时必须是两位数）
+    - order 为整数
+
+页面的 front-matter 直接取自内容索引，不重新读取文件；按板块分组后并行校验（--jobs）。
+输出全部问题，退出码：0 没有问题，1 有问题（--json 输出机器可读的问题列表）。
+
+    python3 tools/validate_frontmatter.py                  # 校验所有板块
+    python3 tools/validate_frontmatter.py drugs reports -j 0
+    python3 tools/validate_frontmatter.py --json > issues.json
+"""
+import argparse
+import json
+import re
+import sys
+import time
+
+from content_index import load_index
+from executor import add_jobs_argument, run_parallel
+
+SCHEMAS = {
+    'drugs': {'required': ('title', 'wiki'), 'wiki': 'drugs'},
+    'reports': {'required': ('title', 'wiki', 'menu_id'), 'wiki': 'reports'},
+    'recovery': {'required': ('title', 'wiki'), 'wiki': 'recovery'},
+    'emergency_treatment': {'required': ('title', 'wiki'), 'wiki': 'emergency_treatment'},
+    'effects': {'required': ('title', 'wiki'), 'wiki': 'effects'},
+    'Others': {'required': ('title',), 'wiki': None},
+}
+DATE_KEYS = ('date', 'updated')
+INT_KEYS = ('order',)
+DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}'
+                     r'(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?$')
+
+
+def section_of(rel):
+    """页面所属板块（顶层目录），不受规则表约束的返回 None"""
+    section = rel.split('/', 1)[0]
+    return section if '/' in rel and section in SCHEMAS else None
+
+
+def check_frontmatter(frontmatter, schema):
+    """按规则校验一个 front-matter 字典，返回问题列表"""
+    if frontmatter is None:
+        return ['缺少 front-matter']
+    issues = []
+    for key in schema['required']:
+        if frontmatter.get(key) in (None, '', []):
+            issues.append(f'缺少 {key}')
+    wiki = frontmatter.get('wiki')
+    if wiki is not None and wiki != schema['wiki']:
+        expected = f"应为 {schema['wiki']!r}" if schema['wiki'] else '该目录不属于任何 wiki'
+        issues.append(f'wiki 与目录不符: {wiki!r}（{expected}）')
+    for key in DATE_KEYS:
+        value = frontmatter.get(key)
+        if value is not None and not DATE_RE.match(str(value).strip()):
+            issues.append(f'{key} 日期格式不正确: {value!r}')
+    for key in INT_KEYS:
+        value = frontmatter.get(key)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            issues.append(f'{key} 不是整数: {value!r}')
+    return issues
+
+
+def page_issues(page):
+    """校验一条内容索引记录，返回问题列表（不受规则表约束的页面返回空列表）"""
+    section = section_of(page['path'])
+    if section is None or not page['path'].endswith('.md'):
+        return []
+    return check_frontmatter(page['frontmatter'], SCHEMAS[section])
+
+
+def check_section(batch):
+    """校验一个板块的 [(路径, front-matter), ...]（在工作进程中运行），返回 [(路径, 问题), ...]"""
+    section, entries = batch
+    return [(rel, issue) for rel, frontmatter in entries
+            for issue in check_frontmatter(frontmatter, SCHEMAS[section])]
+
+
+def validate(index, sections=None, jobs=1):
+    """
+    校验内容索引中各板块的页面，返回 ([(路径, 问题), ...], 校验的页面数)；
+    只传 front-matter 给工作进程，不传整条记录
+    """
+    sections = sections or list(SCHEMAS)
+    batches = {section: [] for section in sections}
+    for rel in sorted(index):
+        section = section_of(rel)
+        if section in batches and rel.endswith('.md'):
+            batches[section].append((rel, index[rel]['frontmatter']))
+
+    issues = []
+    for (section, _), result, error in run_parallel(check_section, list(batches.items()), jobs=jobs):
+        if error:
+            raise RuntimeError(f'{section}: {error}')
+        issues.extend(result)
+    return issues, sum(len(entries) for entries in batches.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按规则表校验各板块页面的 front-matter')
+    parser.add_argument('sections', nargs='*', metavar='SECTION',
+                        help=f"只校验这些板块（可选: {', '.join(SCHEMAS)}）")
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出问题列表')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    unknown = [name for name in args.sections if name not in SCHEMAS]
+    if unknown:
+        parser.error(f"未知板块: {', '.join(unknown)}")
+
+    start = time.perf_counter()
+    issues, total = validate(load_index(), args.sections, args.jobs)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        json.dump([{'path': rel, 'issue': issue} for rel, issue in issues],
+                  sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        for rel, issue in issues:
+            print(f"✗ {rel}: {issue}")
+    pages = len({rel for rel, _ in issues})
+    mark = '✗' if issues else '✓'
+    print(f"{mark} 校验页面: {total}，有问题的页面: {pages}，问题数: {len(issues)}"
+          f"（{elapsed * 1000:.1f} ms）", file=sys.stderr)
+    sys.exit(1 if issues else 0)
+
+
+if __name__ == '__main__':
+    main()
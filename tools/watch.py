@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监视模式：常驻进程，保存文件后只对有变化的文件重新运行相关检查
+
+启动时加载一次内容索引、文件路径集合和链接图并常驻内存，之后每次保存：
+    index     重新解析有变化的页面（删除的页面从索引中移除）
+    validate  检查这些页面的 front-matter（缺失、没有标题、order 不是整数）
+    graph     更新链接图（页面集合不变时只重新解析变化的页面）
+    trees     页面增删或 title/order/wiki 变化时修补相关 wiki 的目录树
+    check     检查变化的页面、引用了被删除页面的页面，以及相关 wiki 配置中的死链
+各阶段通过 tools/pipeline.py 在同一进程中运行，热状态下一次反馈只需几十毫秒。
+
+文件变化优先用 inotify（Linux，通过 ctypes 调用，无第三方依赖），
+不可用时退回定时比较文件的大小和修改时间（--poll 强制使用轮询）。
+连续的事件会合并（--debounce），编辑器保存时的多次写入只处理一次。
+退出（Ctrl+C）时把索引和链接图写回 .cache/，下次启动仍是热缓存。
+
+    python3 tools/watch.py
+    python3 tools/watch.py --poll --interval 1
+"""
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from check_links import build_path_index, check_pages, check_trees
+from content_index import PAGE_SUFFIXES, SKIP_DIRS, SOURCE_DIR, load_index, parse_page, save_index
+from link_graph import backlinks, build_graph, load_graph, read_wiki_tree, save_graph, url_to_path, wiki_files
+from pipeline import print_timings, run_pipeline
+from validate_frontmatter import page_issues, section_of
+from wiki_tree import update_all
+
+WIKI_PREFIX = '_data/wiki/'
+TREE_FIELDS = ('title', 'order', 'wiki')
+IGNORED_SUFFIXES = ('~', '.swp', '.swx', '.tmp')
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def watched_dirs(source_dir):
+    """需要监视的目录：source/ 下除 .git、node_modules 和隐藏目录外的全部目录（包括 _data）"""
+    for root, dirs, _ in os.walk(source_dir):
+        dirs[:] = [d for d in dirs if d not in ('.git', 'node_modules') and not d.startswith('.')]
+        yield root
+
+
+def is_ignored(name):
+    """编辑器的临时文件和隐藏文件"""
+    return name.startswith(('.', '#')) or name.endswith(IGNORED_SUFFIXES)
+
+
+class InotifyWatcher:
+    """基于 inotify 的目录监视（递归添加监视，新建的目录自动加入）"""
+
+    def __init__(self, source_dir):
+        libc_name = ctypes.util.find_library('c')
+        if not sys.platform.startswith('linux') or not libc_name:
+            raise OSError('inotify 不可用')
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 失败')
+        self.dirs = {}
+        for directory in watched_dirs(source_dir):
+            self.add_watch(directory)
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'无法监视 {directory}')
+        self.dirs[wd] = directory
+
+    def wait(self, timeout=None):
+        """
+        等待文件变化，返回变化的文件路径集合；
+        事件队列溢出时返回 None，调用方需要完整重新扫描
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                directory = self.dirs.get(wd)
+                if mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                    continue
+                if directory is None or not name or is_ignored(name):
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        # 新目录：加入监视，并把其中已有的文件当作新增
+                        for sub in watched_dirs(path):
+                            self.add_watch(sub)
+                            changed.update(os.path.join(sub, f) for f in os.listdir(sub))
+                    else:
+                        overflow = True  # 目录被删除或移走，其中的文件需要完整重新扫描
+                    continue
+                changed.add(path)
+        return None if overflow else changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """定时比较所有文件的大小和修改时间"""
+
+    def __init__(self, source_dir, interval=0.5):
+        self.source_dir = source_dir
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for directory in watched_dirs(self.source_dir):
+            for entry in os.scandir(directory):
+                if entry.is_file() and not is_ignored(entry.name):
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_size, stat.st_mtime)
+        return snapshot
+
+    def wait(self, timeout=None):
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+        snapshot = self.scan()
+        changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(source_dir, poll=False, interval=0.5):
+    """优先使用 inotify，不可用时退回轮询"""
+    if not poll:
+        try:
+            return InotifyWatcher(source_dir)
+        except (OSError, AttributeError) as e:
+            print(f"⚠ inotify 不可用（{e}），改用轮询")
+    return PollingWatcher(source_dir, interval)
+
+
+def collect(watcher, debounce):
+    """等待第一批变化，再合并 debounce 秒内陆续到达的变化；返回 None 表示需要完整重新扫描"""
+    changed = watcher.wait()
+    while changed is not None and changed:
+        more = watcher.wait(debounce)
+        if more is None:
+            return None
+        if not more - changed:
+            break
+        changed |= more
+    return changed
+
+
+def source_relative(path, source_dir):
+    try:
+        return Path(path).resolve().relative_to(Path(source_dir).resolve()).as_posix()
+    except ValueError:
+        return None
+
+
+def is_skipped(rel):
+    """是否位于内容索引和路径集合不收录的目录中（_data 等）"""
+    return any(part in SKIP_DIRS or part.startswith('.') for part in rel.split('/')[:-1])
+
+
+def is_page(rel):
+    return rel.endswith(PAGE_SUFFIXES) and not is_skipped(rel)
+
+
+def tree_fields(page):
+    frontmatter = (page or {}).get('frontmatter') or {}
+    return tuple(frontmatter.get(key) for key in TREE_FIELDS)
+
+
+def affected_wikis(wiki_dir, rels, names):
+    """
+    页面变化会影响的 wiki 配置（文件名不含 .yml）：
+    front-matter 中 wiki: 为该名字，或者页面位于该 wiki 的 base_dir 下
+    """
+    affected = set()
+    for yml_path in wiki_files(wiki_dir):
+        base = url_to_path(read_wiki_tree(yml_path)[0]) or ''
+        if yml_path.stem in names or (base and any(rel.startswith(base + '/') for rel in rels)):
+            affected.add(yml_path.stem)
+    return affected
+
+
+def frontmatter_issues(page):
+    """保存时的快速 front-matter 检查，返回问题列表（各板块的页面按 validate_frontmatter 的规则表校验）"""
+    if not page['path'].endswith('.md'):
+        return []
+    if section_of(page['path']) is not None:
+        return page_issues(page)
+    frontmatter = page['frontmatter']
+    if frontmatter is None:
+        return ['缺少 front-matter']
+    issues = []
+    if not page.get('title'):
+        issues.append('缺少 title')
+    order = frontmatter.get('order')
+    if order is not None and (not isinstance(order, int) or isinstance(order, bool)):
+        issues.append(f'order 不是整数: {order!r}')
+    return issues
+
+
+def make_stages(state, source_dir):
+    """构造一次保存对应的流水线阶段，共享常驻内存的 state"""
+    wiki_dir = Path(source_dir) / '_data' / 'wiki'
+
+    def stage_index(context):
+        index, paths = state['index'], state['paths']
+        changes = {'pages': set(), 'added': set(), 'removed': set(), 'wikis': set(),
+                   'tree_pages': set(), 'tree_names': set(), 'referencing': set()}
+        for rel in sorted(context['changed']):
+            path = Path(source_dir) / rel
+            exists = path.is_file()
+            if not is_skipped(rel):
+                if exists:
+                    paths.add(rel)
+                else:
+                    paths.discard(rel)
+            if rel.startswith(WIKI_PREFIX) and rel.endswith('.yml'):
+                changes['wikis'].add(rel)
+                continue
+            if not is_page(rel):
+                continue
+            old = index.get(rel)
+            if exists:
+                index[rel] = parse_page(path, source_dir)
+                changes['pages'].add(rel)
+                if old is None:
+                    changes['added'].add(rel)
+                new = index[rel]
+            elif old is not None:
+                del index[rel]
+                changes['removed'].add(rel)
+                changes['referencing'].update(backlinks(state['graph'], rel))
+                new = None
+            else:
+                continue
+            if old is None or new is None or tree_fields(old) != tree_fields(new):
+                # 页面增删或 title/order/wiki 变化：相关 wiki 的目录树需要修补
+                changes['tree_pages'].add(rel)
+                changes['tree_names'].update(str(fields[2]) for fields in (tree_fields(old), tree_fields(new))
+                                             if fields[2] is not None)
+        if changes['tree_pages']:
+            names = affected_wikis(wiki_dir, changes['tree_pages'], changes['tree_names'])
+            changes['tree_names'] = names
+            changes['wikis'].update(f'{WIKI_PREFIX}{name}.yml' for name in names)
+        return changes
+
+    def stage_validate(context):
+        index = state['index']
+        issues = []
+        for rel in sorted(context['index']['pages']):
+            issues += [(rel, issue) for issue in frontmatter_issues(index[rel])]
+        for rel, issue in issues:
+            print(f"⚠ source/{rel}: {issue}")
+        return issues
+
+    def stage_graph(context):
+        changes = context['index']
+        if not (changes['pages'] or changes['removed'] or changes['wikis']):
+            return 0
+        state['graph'], resolved = build_graph(state['index'], state['graph'], source_dir)
+        return resolved
+
+    def stage_trees(context):
+        names = context['index']['tree_names']
+        if not names:
+            return {}
+        results = update_all(state['index'], names, wiki_dir=wiki_dir)
+        for name, changed in results.items():
+            if changed:
+                print(f"✓ 已更新 {name}")
+        return results
+
+    def stage_check(context):
+        changes = context['index']
+        only = (changes['pages'] | changes['referencing']) & set(state['index'])
+        problems = check_pages(state['index'], state['paths'], only, source_dir)
+        if changes['wikis']:
+            problems += check_trees(state['paths'], source_dir, changes['wikis'])
+        for file, lineno, target in problems:
+            print(f"{file}:{lineno}: {target}")
+        return problems
+
+    return {
+        'index': {'func': stage_index, 'requires': [], 'description': '重新解析变化的页面'},
+        'validate': {'func': stage_validate, 'requires': ['index'], 'description': '检查 front-matter'},
+        'graph': {'func': stage_graph, 'requires': ['index'], 'description': '更新链接图'},
+        'trees': {'func': stage_trees, 'requires': ['index'], 'description': '修补 wiki 目录树'},
+        'check': {'func': stage_check, 'requires': ['graph'], 'description': '检查死链'},
+    }
+
+
+def load_state(source_dir):
+    """启动时加载常驻内存的状态"""
+    index = load_index(source_dir)
+    return {
+        'index': index,
+        'paths': build_path_index(source_dir),
+        'graph': load_graph(index, source_dir),
+    }
+
+
+def process(state, stages, changed, source_dir, verbose=False):
+    """处理一批变化的文件，返回 (耗时秒数, 各阶段结果)"""
+    start = time.perf_counter()
+    rels = {rel for rel in (source_relative(p, source_dir) for p in changed) if rel}
+    context, timings = run_pipeline(stages, context={'changed': rels})
+    elapsed = time.perf_counter() - start
+    names = ', '.join(sorted(rels)[:3]) + (f' 等 {len(rels)} 个文件' if len(rels) > 3 else '')
+    problems = context.get('check') or []
+    issues = context.get('validate') or []
+    mark = '✓' if not problems and not issues else '✗'
+    print(f"{mark} {names}（{elapsed * 1000:.1f} ms，{len(issues)} 个 front-matter 问题，{len(problems)} 个死链）")
+    if verbose:
+        print_timings(timings, stages)
+    return elapsed, context
+
+
+def main():
+    parser = argparse.ArgumentParser(description='监视 source/，保存后只对变化的文件重新运行检查')
+    parser.add_argument('--poll', action='store_true', help='使用轮询代替 inotify')
+    parser.add_argument('--interval', type=float, default=0.5, help='轮询间隔（秒，默认 0.5）')
+    parser.add_argument('--debounce', type=float, default=0.05, help='合并连续事件的等待时间（秒，默认 0.05）')
+    parser.add_argument('--verbose', '-v', action='store_true', help='显示每个阶段的耗时')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    state = load_state(SOURCE_DIR)
+    watcher = open_watcher(SOURCE_DIR, args.poll, args.interval)
+    stages = make_stages(state, SOURCE_DIR)
+    print(f"✓ 已加载 {len(state['index'])} 个页面（{(time.perf_counter() - start) * 1000:.1f} ms），"
+          f"使用 {'inotify' if isinstance(watcher, InotifyWatcher) else '轮询'} 监视 source/，Ctrl+C 退出")
+
+    try:
+        while True:
+            changed = collect(watcher, args.debounce)
+            if changed is None:
+                print("⚠ 事件过多或目录被移动，重新加载全部状态")
+                state.update(load_state(SOURCE_DIR))
+                continue
+            if changed:
+                process(state, stages, changed, SOURCE_DIR, args.verbose)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        save_index(state['index'], source_dir=SOURCE_DIR)
+        save_graph(state['graph'], source_dir=SOURCE_DIR)
+        print("\n✓ 已保存索引和链接图")
+
+
+if __name__ == '__main__':
+    main()
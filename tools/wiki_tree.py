@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+由目录结构生成 wiki 目录树（source/_data/wiki/*.yml 中的 tree:）
+
+每个 wiki 配置文件对应一组页面：front-matter 中 wiki: 为该文件名的页面，
+以及 base_dir 目录下没有写 wiki: 的页面（base_dir 为 / 的只认 wiki:）。
+页面按目录分组，每个目录一组，按目录层级深度优先排列：
+    组内顺序：目录的 index 页在前，其余按 front-matter 中的 order，再按名称自然排序
+    组名：目录 index 页的标题（没有则用目录名），子目录用 '父 / 子'
+
+默认增量修补已有的 tree:：
+    - 删除指向不存在页面的条目（组空了连组名一起删除）
+    - 新页面插入到所在目录对应的组中排序后的位置，没有对应组时在末尾新建一组
+    - 其余行（包括手工调整的分组、顺序、引号风格和 tree 之外的配置）原样保留
+只有内容真正变化时才写文件，Hexo 不会因为 mtime 变化而重新加载数据。
+--rebuild 则按目录结构重新生成整个 tree:。
+
+    python3 tools/wiki_tree.py               # 修补所有 wiki 配置
+    python3 tools/wiki_tree.py drugs         # 只处理 drugs.yml
+    python3 tools/wiki_tree.py --rebuild drugs --dry-run
+"""
+import argparse
+import posixpath
+import re
+import sys
+from pathlib import Path
+
+from content_index import load_index
+from link_graph import WIKI_DIR, read_wiki_tree, resolve_path, tree_slug_to_path, url_to_path
+from manifest import write_if_changed
+
+TOP_KEY_RE = re.compile(r'^[^\s#][^:]*:')
+ENTRY_RE = re.compile(r'^(\s*)-\s+(.+?)\s*$')
+GROUP_RE = re.compile(r'^(\s+)([\'"]?)(.+?)\2:\s*$')
+NUMBER_RE = re.compile(r'(\d+)')
+GROUP_SEPARATOR = ' / '
+YAML_INDICATORS = set('[]{}&*!|>\'"%@`#,?:-')
+
+
+def natural_key(text):
+    """自然排序键：RP-2 排在 RP-10 之前"""
+    return [int(part) if part.isdigit() else part.lower() for part in NUMBER_RE.split(text)]
+
+
+def page_sort_key(page):
+    """组内排序：index 页在前，其次按 order，再按文件名自然排序"""
+    stem = Path(page['path']).stem
+    order = (page['frontmatter'] or {}).get('order')
+    has_order = isinstance(order, int) and not isinstance(order, bool)
+    return (stem != 'index', not has_order, order if has_order else 0, natural_key(stem))
+
+
+def wiki_members(index, name, base_dir):
+    """属于该 wiki 的页面：{相对 source/ 的路径: 页面记录}"""
+    base = url_to_path(base_dir) or ''
+    prefix = base + '/' if base else ''
+    members = {}
+    for rel, page in index.items():
+        if not rel.endswith('.md'):
+            continue
+        wiki = (page['frontmatter'] or {}).get('wiki')
+        if rel.startswith(prefix) and (wiki == name or (wiki is None and prefix)):
+            members[rel] = page
+    return members
+
+
+def page_slug(rel, base_dir):
+    """页面在 tree: 中的写法（相对 base_dir，去掉扩展名）"""
+    base = url_to_path(base_dir) or ''
+    slug = rel[len(base) + 1:] if base else rel
+    return slug[:-len('.md')] if slug.endswith('.md') else slug
+
+
+def _dir_title(index, directory):
+    """目录的显示名：index 页标题，没有则用目录名"""
+    page = index.get(f'{directory}/index.md' if directory else 'index.md')
+    if page and page.get('title'):
+        return str(page['title'])
+    return posixpath.basename(directory)
+
+
+def group_title(index, directory, base):
+    """目录对应的组名，子目录逐级用 ' / ' 连接"""
+    if directory == base:
+        return _dir_title(index, directory) or '概览'
+    rel_dir = directory[len(base) + 1:] if base else directory
+    parts = rel_dir.split('/')
+    prefix = base + '/' if base else ''
+    return GROUP_SEPARATOR.join(_dir_title(index, prefix + '/'.join(parts[:i + 1]))
+                                for i in range(len(parts)))
+
+
+def build_groups(index, members, base_dir):
+    """
+    按目录分组并排序，返回 [(目录, 组名, [(页面路径, slug), ...]), ...]，
+    目录按层级深度优先排列，同级目录按其 index 页的 order 和名称排序
+    """
+    base = url_to_path(base_dir) or ''
+    by_dir = {}
+    for rel in members:
+        by_dir.setdefault(posixpath.dirname(rel), []).append(rel)
+
+    def dir_key(directory):
+        index_page = index.get(f'{directory}/index.md')
+        if index_page:
+            return page_sort_key(index_page)[1:-1] + (natural_key(posixpath.basename(directory)),)
+        return (True, 0, natural_key(posixpath.basename(directory)))
+
+    children = {}
+    for directory in by_dir:
+        node = directory
+        while node != base and node:
+            parent = posixpath.dirname(node)
+            children.setdefault(parent, set()).add(node)
+            node = parent
+
+    groups = []
+
+    def visit(directory):
+        if directory in by_dir:
+            rels = sorted(by_dir[directory], key=lambda rel: page_sort_key(members[rel]))
+            groups.append((directory, group_title(index, directory, base),
+                           [(rel, page_slug(rel, base_dir)) for rel in rels]))
+        for child in sorted(children.get(directory, ()), key=dir_key):
+            visit(child)
+
+    visit(base)
+    return groups
+
+
+def parse_tree_block(lines):
+    """
+    找出 tree: 块并解析分组，返回字典：
+        start/end  tree: 所在行与块结束行（不含）
+        groups     [{'key', 'line', 'entries': [[行号, slug], ...]}]，平铺列表的 key 为 None
+        quote      组名使用的引号
+        indent     (组名缩进, 条目缩进)
+    没有 tree: 时返回 None
+    """
+    start = next((i for i, line in enumerate(lines) if line.startswith('tree:')), None)
+    if start is None:
+        return None
+    end = len(lines)
+    for i in range(start + 1, len(lines)):
+        if TOP_KEY_RE.match(lines[i]):
+            end = i
+            break
+    block = {'start': start, 'end': end, 'groups': [], 'quote': "'",
+             'inline': lines[start].split(':', 1)[1].strip() != '',
+             'indent': ('  ', '    ')}
+    quote_seen = entry_seen = False
+    for i in range(start + 1, end):
+        line = lines[i]
+        entry = ENTRY_RE.match(line)
+        if entry:
+            if not block['groups']:
+                block['groups'].append({'key': None, 'line': None, 'entries': []})
+            block['groups'][-1]['entries'].append([i, entry.group(2).strip('\'"')])
+            if not entry_seen:
+                block['indent'] = (block['indent'][0], entry.group(1))
+                entry_seen = True
+            continue
+        group = GROUP_RE.match(line)
+        if group:
+            block['groups'].append({'key': group.group(3), 'line': i, 'entries': []})
+            block['indent'] = (group.group(1), block['indent'][1])
+            if not quote_seen:
+                block['quote'] = group.group(2)
+                quote_seen = True
+    return block
+
+
+def _format_key(key, quote):
+    """组名写成 YAML 键（单引号内的 ' 写作 ''，双引号内转义 \\ 和 "）"""
+    if quote == '"':
+        escaped = key.replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{escaped}":'
+    return "'" + key.replace("'", "''") + "':"
+
+
+def _format_slug(slug):
+    """条目以 YAML 特殊字符开头或含 ': '、' #' 时加单引号"""
+    if slug[:1] in YAML_INDICATORS or ': ' in slug or ' #' in slug:
+        return "'" + slug.replace("'", "''") + "'"
+    return slug
+
+
+def render_tree(groups, quote="'", indent=('  ', '    ')):
+    """按分组生成完整的 tree: 块"""
+    lines = ['tree:']
+    for _, title, entries in groups:
+        lines.append(f'{indent[0]}{_format_key(title, quote)}')
+        lines += [f'{indent[1]}- {_format_slug(slug)}' for _, slug in entries]
+    return lines
+
+
+def patch_tree(lines, block, groups, members, pages, base_dir):
+    """
+    在原有 tree: 块上做最小修改，返回新的行列表：
+    删除无法解析的条目，插入尚未出现在树中的页面
+    """
+    sort_keys = {rel: page_sort_key(page) for rel, page in members.items()}
+    deletions = set()
+    insertions = {}
+    listed = set()
+    dirs_in_group = []
+
+    for group in block['groups']:
+        dirs = {}
+        alive = 0
+        for lineno, slug in group['entries']:
+            target = resolve_path(tree_slug_to_path(base_dir, slug), pages)
+            if target is None:
+                deletions.add(lineno)
+                continue
+            alive += 1
+            listed.add(target)
+            dirs.setdefault(posixpath.dirname(target), []).append((lineno, target))
+        if not alive and group['line'] is not None:
+            deletions.add(group['line'])
+        dirs_in_group.append((group, dirs, alive))
+
+    new_groups = []
+    for directory, title, entries in groups:
+        missing = [(rel, slug) for rel, slug in entries if rel not in listed]
+        if not missing:
+            continue
+        # 已有分组中包含同目录页面的，插入到该组；否则新建分组（平铺列表直接插入）
+        home = next(((group, dirs) for group, dirs, alive in dirs_in_group
+                     if alive and (directory in dirs or group['key'] is None)), None)
+        if home is None:
+            new_groups.append((directory, title, missing))
+            continue
+        group, dirs = home
+        siblings = dirs.get(directory) or [(lineno, None) for lineno, _ in group['entries']
+                                           if lineno not in deletions]
+        for rel, slug in missing:
+            anchor = siblings[-1][0]
+            for lineno, target in siblings:
+                if target in sort_keys and sort_keys[target] > sort_keys[rel]:
+                    anchor = lineno - 0.5
+                    break
+            insertions.setdefault(anchor, []).append(f"{block['indent'][1]}- {_format_slug(slug)}")
+
+    if new_groups:
+        # 新分组接在 tree: 块最后一个非空行之后
+        last = max(i for i in range(block['start'], block['end']) if lines[i].strip())
+        insertions.setdefault(last, []).extend(
+            render_tree(new_groups, block['quote'], block['indent'])[1:])
+
+    result = []
+    for i, line in enumerate(lines):
+        result += insertions.get(i - 0.5, [])
+        if i not in deletions:
+            result.append(line)
+        result += insertions.get(i, [])
+    return result
+
+
+def update_wiki(yml_path, index, rebuild=False):
+    """
+    更新一个 wiki 配置文件的 tree:，返回 (新内容, 分组) ；
+    没有页面属于该 wiki 时返回 (None, [])，不修改文件
+    """
+    yml_path = Path(yml_path)
+    text = yml_path.read_text(encoding='utf-8')
+    base_dir, _ = read_wiki_tree(yml_path)
+    members = wiki_members(index, yml_path.stem, base_dir)
+    if not members:
+        return None, []
+    groups = build_groups(index, members, base_dir)
+
+    trailing_newline = text.endswith('\n')
+    lines = text.split('\n')
+    if trailing_newline:
+        lines.pop()
+    block = parse_tree_block(lines)
+    if block is None or block['inline'] or not block['groups'] or rebuild:
+        quote, indent = ("'", ('  ', '    ')) if block is None else (block['quote'], block['indent'])
+        tree_lines = render_tree(groups, quote, indent)
+        if block is None:
+            lines = lines + tree_lines
+        else:
+            lines = lines[:block['start']] + tree_lines + lines[block['end']:]
+    else:
+        lines = patch_tree(lines, block, groups, members, set(index), base_dir)
+    return '\n'.join(lines) + '\n', groups
+
+
+def update_all(index=None, names=None, rebuild=False, dry_run=False, wiki_dir=WIKI_DIR):
+    """处理 wiki 目录下的配置文件，返回 {文件名: 是否有变化}"""
+    index = index if index is not None else load_index()
+    results = {}
+    for yml_path in sorted(Path(wiki_dir).glob('*.yml')):
+        if names and yml_path.stem not in names:
+            continue
+        content, _ = update_wiki(yml_path, index, rebuild)
+        if content is None:
+            results[yml_path.name] = None
+            continue
+        if dry_run:
+            results[yml_path.name] = content != yml_path.read_text(encoding='utf-8')
+            if results[yml_path.name]:
+                sys.stdout.write(content)
+        else:
+            results[yml_path.name] = write_if_changed(yml_path, content)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='按目录结构生成/修补 wiki 目录树')
+    parser.add_argument('names', nargs='*', help='只处理这些 wiki（文件名，不含 .yml）')
+    parser.add_argument('--rebuild', action='store_true', help='按目录结构重新生成整个 tree:')
+    parser.add_argument('--dry-run', action='store_true', help='只输出变化后的内容，不写文件')
+    args = parser.parse_args()
+
+    results = update_all(names=args.names, rebuild=args.rebuild, dry_run=args.dry_run)
+    for name, changed in results.items():
+        if changed is None:
+            print(f"- {name}: 没有属于该 wiki 的页面，跳过", file=sys.stderr)
+        elif changed:
+            print(f"✓ {name}: 已更新", file=sys.stderr)
+        else:
+            print(f"  {name}: 无变化", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()